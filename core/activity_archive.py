@@ -0,0 +1,153 @@
+"""
+بایگانی لاگ فعالیت در فایل‌های فشرده روزانه
+ActivityLog retention: archive old rows to day-partitioned gzip JSONL files
+
+دستور archive_activity_logs (از طریق cron) رکوردهای قدیمی‌تر از
+ACTIVITY_LOG_RETENTION_DAYS را در دسته‌های محدود (به ترتیب id) می‌خواند، هر دسته را
+به تفکیک روز در فایل‌های jsonl.gz زیر ACTIVITY_LOG_ARCHIVE_DIR می‌نویسد و سپس همان
+idها را از جدول حذف می‌کند. فایل پیش از حذف به صورت اتمیک و با fsync نوشته می‌شود؛
+نام فایل شامل بازه id است، پس اجرای دوباره پس از خطای بین نوشتن و حذف همان فایل را
+بازنویسی می‌کند و رکورد تکراری ایجاد نمی‌شود.
+
+ساختار: <ARCHIVE_DIR>/<YYYY-MM>/<YYYY-MM-DD>.<first_id>-<last_id>.jsonl.gz (تاریخ میلادی)
+"""
+import gzip
+import json
+import os
+import tempfile
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+import jdatetime
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ActivityLog
+
+ARCHIVE_SUFFIX = '.jsonl.gz'
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'user__username', 'action', 'content_type', 'object_id',
+    'object_description', 'details', 'branch_id', 'amount', 'creditor_id', 'ip_address', 'timestamp',
+)
+
+
+def _gregorian(value):
+    """تبدیل مقدار jdatetime به datetime میلادی (مقادیر میلادی بدون تغییر)"""
+    return value.togregorian() if isinstance(value, (jdatetime.datetime, jdatetime.date)) else value
+
+
+def _record(row):
+    """تبدیل یک ردیف values() به رکورد بایگانی (زمان به صورت ISO میلادی)"""
+    record = dict(row)
+    record['username'] = record.pop('user__username')
+    record['timestamp'] = _gregorian(record['timestamp']).isoformat()
+    return record
+
+
+def archive_cutoff(retention_days=None):
+    """مرز بایگانی: ابتدای روز retention_days روز قبل (میلادی)"""
+    retention_days = settings.ACTIVITY_LOG_RETENTION_DAYS if retention_days is None else retention_days
+    return datetime.combine(datetime.now().date() - timedelta(days=retention_days), time.min)
+
+
+def _archive_path(day, first_id, last_id):
+    return Path(settings.ACTIVITY_LOG_ARCHIVE_DIR) / f'{day:%Y-%m}' / f'{day:%Y-%m-%d}.{first_id}-{last_id}{ARCHIVE_SUFFIX}'
+
+
+def _write_archive(path, records):
+    """نوشتن اتمیک یک فایل jsonl.gz (فایل موقت + fsync + os.replace)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as compressed:
+                for record in records:
+                    compressed.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+                    compressed.write(b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def archive_activity_logs(before=None, batch_size=2000, dry_run=False):
+    """
+    انتقال رکوردهای قدیمی‌تر از before (datetime میلادی) به فایل‌های بایگانی
+    هر دسته: یک SELECT (حداکثر batch_size ردیف)، نوشتن فایل‌های روزانه و یک DELETE با id
+    dry_run: فقط شمارش رکوردهای قابل بایگانی
+    خروجی: (تعداد رکورد بایگانی‌شده، تعداد فایل نوشته‌شده)
+    """
+    before = archive_cutoff() if before is None else before
+    old_logs = ActivityLog.objects.filter(timestamp__lt=jdatetime.datetime.fromgregorian(datetime=before))
+    if dry_run:
+        return old_logs.count(), 0
+
+    archived = files = 0
+    last_id = 0
+    while True:
+        rows = list(
+            old_logs.filter(id__gt=last_id).order_by('id').values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+
+        by_day = defaultdict(list)
+        for row in rows:
+            record = _record(row)
+            by_day[record['timestamp'][:10]].append(record)
+        for day, records in by_day.items():
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+            _write_archive(_archive_path(day, records[0]['id'], records[-1]['id']), records)
+            files += 1
+
+        # حذف فقط پس از نوشتن کامل فایل‌ها روی دیسک (ActivityLog سیگنال حذف ندارد: یک DELETE)
+        ActivityLog.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        archived += len(rows)
+    return archived, files
+
+
+def _archive_files(start=None, end=None):
+    """فایل‌های بایگانی روزهای بازه [start, end] (تاریخ میلادی) - مرتب بر اساس روز و id"""
+    root = Path(settings.ACTIVITY_LOG_ARCHIVE_DIR)
+    if not root.is_dir():
+        return []
+    files = []
+    for month_dir in sorted(root.iterdir()):
+        if not month_dir.is_dir():
+            continue
+        if (start and month_dir.name < f'{start:%Y-%m}') or (end and month_dir.name > f'{end:%Y-%m}'):
+            continue
+        for path in month_dir.iterdir():
+            if not path.name.endswith(ARCHIVE_SUFFIX):
+                continue
+            day, id_range = path.name[:-len(ARCHIVE_SUFFIX)].split('.', 1)
+            if (start and day < f'{start:%Y-%m-%d}') or (end and day > f'{end:%Y-%m-%d}'):
+                continue
+            files.append((day, int(id_range.split('-', 1)[0]), path))
+    return [path for _day, _first_id, path in sorted(files)]
+
+
+def read_archived_activity_logs(start=None, end=None, user_id=None, action=None):
+    """
+    خواندن رکوردهای بایگانی‌شده (dict) در بازه روزهای [start, end] (date میلادی، شامل هر دو سر)
+    فقط فایل‌های روزهای بازه باز می‌شوند؛ فیلتر کاربر و عملیات هنگام خواندن اعمال می‌شود
+    رکوردها به ترتیب روز و id و بدون تکرار برگردانده می‌شوند
+    """
+    seen = set()
+    for path in _archive_files(start, end):
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                record = json.loads(line)
+                if record['id'] in seen:
+                    continue
+                if user_id is not None and record['user_id'] != user_id:
+                    continue
+                if action is not None and record['action'] != action:
+                    continue
+                seen.add(record['id'])
+                yield record
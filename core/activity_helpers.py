@@ -2,23 +2,62 @@
 راهنمای ایجاد گزارش‌های فعالیت خودکار
 Helper functions for automatic activity reporting
 """
+import jdatetime
 from django.utils import timezone
-from django.db.models import Count, Q
-from .models import ActivityLog
-from datetime import timedelta
+from django.db.models import Count, Q, Sum
+from .models import ActivityDailyStat, ActivityLog
+from .activity_stats import jalali_day
+from datetime import datetime, time, timedelta
+
+# تعداد رکوردهای تفصیلی (آخرین فعالیت‌ها) در گزارش‌ها
+RECENT_ACTIVITY_LIMIT = 50
+ACTION_LABELS = dict(ActivityLog.ACTION_CHOICES)
+
+
+def _day_range(date):
+    """
+    بازه نیم‌باز [ابتدای روز، ابتدای روز بعد) برای فیلتر timestamp
+    برخلاف timestamp__date روی ستون تابع اعمال نمی‌شود و ایندکس‌های timestamp قابل استفاده‌اند
+    """
+    if isinstance(date, jdatetime.date):
+        date = date.togregorian()
+    start = datetime.combine(date, time.min)
+    return (
+        jdatetime.datetime.fromgregorian(datetime=start),
+        jdatetime.datetime.fromgregorian(datetime=start + timedelta(days=1)),
+    )
+
+
+def _logs_of_day(date, **filters):
+    start, end = _day_range(date)
+    return ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end, **filters)
+
+
+def _user_name(first_name, last_name, user_id):
+    """نام کامل کاربر مثل User.get_full_name - بدون کاربر: سیستم"""
+    if user_id is None:
+        return 'سیستم'
+    return f'{first_name} {last_name}'.strip()
+
+
+def _recent(logs, limit=RECENT_ACTIVITY_LIMIT):
+    """آخرین رکوردهای تفصیلی با نام کاربر در همان کوئری"""
+    return logs.select_related('user').order_by('-timestamp')[:limit]
 
 
 def get_user_activity_summary(user, days=7):
     """
     خلاصه فعالیت کاربر برای تعداد روز معین
     Get user activity summary for last N days
+    
+    از آمار روزانه (ActivityDailyStat) - روز شروع بازه کامل شمرده می‌شود
     """
     start_date = timezone.now() - timedelta(days=days)
     
-    activities = ActivityLog.objects.filter(
+    activities = list(ActivityDailyStat.objects.filter(
         user=user,
-        timestamp__gte=start_date
-    ).values('action').annotate(count=Count('id'))
+        day__gte=jalali_day(start_date)
+    ).values('action').annotate(count=Sum('count')).order_by())
     
     summary = {
         'total_actions': sum(item['count'] for item in activities),
@@ -35,18 +74,25 @@ def get_system_activity_stats(days=7):
     """
     آمار کلی فعالیت سیستم
     Get overall system activity statistics
+    
+    از آمار روزانه (ActivityDailyStat) - روز شروع بازه کامل شمرده می‌شود
     """
     start_date = timezone.now() - timedelta(days=days)
     
-    logs = ActivityLog.objects.filter(
-        timestamp__gte=start_date
-    )
+    stat_rows = ActivityDailyStat.objects.filter(
+        day__gte=jalali_day(start_date)
+    ).order_by()
     
+    by_action = dict(stat_rows.values('action').annotate(count=Sum('count')).values_list('action', 'count'))
     stats = {
-        'total_actions': logs.count(),
-        'by_action': dict(logs.values('action').annotate(count=Count('id')).values_list('action', 'count')),
-        'by_model': dict(logs.values('content_type').annotate(count=Count('id')).values_list('content_type', 'count')),
-        'by_user': dict(logs.filter(user__isnull=False).values('user__username').annotate(count=Count('id')).values_list('user__username', 'count')),
+        'total_actions': sum(by_action.values()),
+        'by_action': by_action,
+        # نوع مدل خالی در آمار روزانه همان NULL در ActivityLog است
+        'by_model': {
+            content_type or None: count
+            for content_type, count in stat_rows.values('content_type').annotate(count=Sum('count')).values_list('content_type', 'count')
+        },
+        'by_user': dict(stat_rows.filter(user__isnull=False).values('user__username').annotate(count=Sum('count')).values_list('user__username', 'count')),
         'period_days': days,
     }
     
@@ -60,10 +106,7 @@ def get_employee_daily_activity(employee, date):
     """
     user = employee.user
     
-    activities = ActivityLog.objects.filter(
-        user=user,
-        timestamp__date=date
-    ).order_by('-timestamp')
+    activities = _logs_of_day(date, user=user).order_by('-timestamp')
     
     formatted_activities = []
     for activity in activities:
@@ -84,17 +127,12 @@ def get_employee_daily_activity(employee, date):
     }
 
 
-def get_model_changes_today(model_name):
+def get_model_changes_today(model_name, limit=RECENT_ACTIVITY_LIMIT):
     """
-    دریافت تمام تغییرات یک مدل در امروز
-    Get all changes to a model today
+    دریافت آخرین تغییرات یک مدل در امروز (حداکثر limit رکورد)
+    Get the latest changes to a model today
     """
-    today = timezone.now().date()
-    
-    changes = ActivityLog.objects.filter(
-        content_type=model_name,
-        timestamp__date=today
-    ).order_by('-timestamp')
+    changes = _recent(_logs_of_day(timezone.now().date(), content_type=model_name), limit)
     
     formatted_changes = []
     for change in changes:
@@ -109,18 +147,35 @@ def get_model_changes_today(model_name):
     return formatted_changes
 
 
-def get_critical_activities():
+def get_object_history(model_name, object_id, limit=50):
     """
-    دریافت فعالیت‌های حساس (حذف، تغییر بزرگ)
-    Get critical activities (deletions, major changes)
+    تاریخچه تغییرات یک رکورد (ایندکس content_type + object_id + timestamp)
+    Get change history of a single record
     """
-    today = timezone.now().date()
+    changes = ActivityLog.objects.filter(
+        content_type=model_name,
+        object_id=str(object_id)
+    ).select_related('user').order_by('-timestamp')[:limit]
     
+    return [
+        {
+            'action': change.get_action_display(),
+            'user': change.user.get_full_name() if change.user else 'سیستم',
+            'record': change.object_description,
+            'time': change.timestamp.strftime('%Y/%m/%d %H:%M:%S'),
+            'details': change.details,
+        }
+        for change in changes
+    ]
+
+
+def get_critical_activities(limit=RECENT_ACTIVITY_LIMIT):
+    """
+    دریافت فعالیت‌های حساس امروز (حذف) - حداکثر limit رکورد آخر
+    Get critical activities (deletions, major changes)
+    """
     # فعالیت‌های حذف
-    deletions = ActivityLog.objects.filter(
-        action='delete',
-        timestamp__date=today
-    ).order_by('-timestamp')
+    deletions = _recent(_logs_of_day(timezone.now().date(), action='delete'), limit)
     
     activities = []
     for deletion in deletions:
@@ -140,39 +195,45 @@ def generate_daily_activity_report(date=None):
     """
     ایجاد گزارش فعالیت روزانه
     Generate daily activity report
+
+    آمار با سه کوئری GROUP BY و فعالیت‌های تفصیلی با یک کوئری (آخرین RECENT_ACTIVITY_LIMIT رکورد)
+    - هزینه گزارش به تعداد گروه‌ها بستگی دارد، نه تعداد لاگ‌های روز
     """
     if date is None:
         date = timezone.now().date()
     
-    activities = ActivityLog.objects.filter(
-        timestamp__date=date
-    ).order_by('-timestamp')
+    activities = _logs_of_day(date)
+    
+    # آماری‌گیری
+    by_action = {}
+    for row in activities.values('action').annotate(count=Count('id')).order_by('-count'):
+        action_key = ACTION_LABELS.get(row['action'], row['action'])
+        by_action[action_key] = by_action.get(action_key, 0) + row['count']
+    
+    by_user = {}
+    user_rows = activities.values('user_id', 'user__first_name', 'user__last_name').annotate(
+        count=Count('id')
+    ).order_by('-count')
+    for row in user_rows:
+        user_name = _user_name(row['user__first_name'], row['user__last_name'], row['user_id'])
+        by_user[user_name] = by_user.get(user_name, 0) + row['count']
+    
+    by_model = dict(
+        activities.values('content_type').annotate(count=Count('id')).order_by('-count')
+        .values_list('content_type', 'count')
+    )
     
     report = {
         'date': date,
-        'total_activities': activities.count(),
-        'by_action': {},
-        'by_user': {},
-        'by_model': {},
+        'total_activities': sum(by_model.values()),
+        'by_action': by_action,
+        'by_user': by_user,
+        'by_model': by_model,
         'activities': []
     }
     
-    # آماری‌گیری
-    for activity in activities:
-        # by action
-        action_key = activity.get_action_display()
-        report['by_action'][action_key] = report['by_action'].get(action_key, 0) + 1
-        
-        # by user
-        user_name = activity.user.get_full_name() if activity.user else 'سیستم'
-        report['by_user'][user_name] = report['by_user'].get(user_name, 0) + 1
-        
-        # by model
-        model_name = activity.content_type
-        report['by_model'][model_name] = report['by_model'].get(model_name, 0) + 1
-    
     # فعالیت‌های تفصیلی
-    for activity in activities[:50]:  # آخرین 50 فعالیت
+    for activity in _recent(activities):  # آخرین 50 فعالیت
         report['activities'].append({
             'time': activity.timestamp.strftime('%H:%M:%S'),
             'user': activity.user.get_full_name() if activity.user else 'سیستم',
@@ -182,4 +243,4 @@ def generate_daily_activity_report(date=None):
             'ip': activity.ip_address,
         })
     
-    return report
\ No newline at end of file
+    return report
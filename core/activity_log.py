@@ -0,0 +1,126 @@
+"""
+نویسنده بافردار لاگ فعالیت
+Buffered, in-process ActivityLog writer
+
+create_activity_log به جای یک INSERT هم‌زمان در هر سیگنال، رکورد را در صف حافظه
+process قرار می‌دهد. رکوردهای داخل تراکنش فقط پس از commit (transaction.on_commit)
+به صف اضافه می‌شوند تا با rollback همراه تراکنش حذف شوند. صف با یک bulk_create
+تخلیه می‌شود:
+- وقتی اندازه صف به ACTIVITY_LOG_BUFFER_SIZE برسد یا از آخرین تخلیه
+  ACTIVITY_LOG_FLUSH_INTERVAL ثانیه گذشته باشد؛ این شرط هنگام افزودن رکورد و در
+  پایان هر درخواست (ActivityLogMiddleware) بررسی می‌شود، پس لاگ‌های چند درخواست با
+  یک INSERT نوشته می‌شوند و صف بدون رکورد جدید هم حداکثر تا درخواست بعدی می‌ماند
+- هنگام خروج عادی process: hook worker_exit در gunicorn.conf.py و atexit (پایان دستور
+  مدیریتی)
+خروج ناگهانی (SIGKILL، timeout در gunicorn) این مسیرها را اجرا نمی‌کند و رکوردهای صف
+(حداکثر ACTIVITY_LOG_BUFFER_SIZE رکورد یا ACTIVITY_LOG_FLUSH_INTERVAL ثانیه) از دست
+می‌روند؛ جایی که هیچ رکوردی نباید گم شود ACTIVITY_LOG_BUFFERED=False تنظیم شود.
+در `manage.py test` صف غیرفعال است (phonix/settings.py).
+پس از هر نوشتن، تعداد رکوردها به آمار روزانه (core.activity_stats) اضافه می‌شود.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+
+from .activity_stats import record_activity_stats
+from .models import ActivityLog
+
+logger = logging.getLogger('phonix')
+
+_lock = threading.Lock()
+_buffer = []
+_last_flush = time.monotonic()
+
+
+def _flush_due():
+    """آیا صف باید تخلیه شود (فراخوانی با _lock)"""
+    return bool(_buffer) and (
+        len(_buffer) >= settings.ACTIVITY_LOG_BUFFER_SIZE
+        or time.monotonic() - _last_flush >= settings.ACTIVITY_LOG_FLUSH_INTERVAL
+    )
+
+
+def _append(entry):
+    with _lock:
+        _buffer.append(entry)
+        due = _flush_due()
+    if due:
+        flush_activity_logs()
+
+
+def _record_stats(entries):
+    """بروزرسانی آمار روزانه - خطای آمار باعث از دست رفتن لاگ نمی‌شود (rebuild_activity_stats)"""
+    try:
+        record_activity_stats(entries)
+    except DatabaseError as e:
+        logger.error(f"خطا در بروزرسانی آمار روزانه فعالیت: {e}", exc_info=True)
+
+
+def enqueue_activity_log(entry):
+    """افزودن یک رکورد ActivityLog (ذخیره‌نشده) به صف - پس از commit تراکنش جاری"""
+    if not settings.ACTIVITY_LOG_BUFFERED:
+        entry.save()
+        _record_stats([entry])
+        return
+    transaction.on_commit(lambda: _append(entry))
+
+
+def _requeue(entries):
+    """بازگرداندن رکوردها به ابتدای صف (حداکثر ACTIVITY_LOG_MAX_BUFFER رکورد)"""
+    with _lock:
+        _buffer[:0] = entries
+        overflow = len(_buffer) - settings.ACTIVITY_LOG_MAX_BUFFER
+        if overflow > 0:
+            del _buffer[:overflow]
+            logger.error(f"صف لاگ فعالیت پر است؛ {overflow} رکورد قدیمی حذف شد")
+
+
+def flush_activity_logs():
+    """تخلیه صف با bulk_create - خروجی: تعداد رکوردهای نوشته‌شده"""
+    global _last_flush
+    with _lock:
+        entries = _buffer[:]
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    if not entries:
+        return 0
+
+    try:
+        ActivityLog.objects.bulk_create(entries, batch_size=500)
+        written = entries
+    except IntegrityError:
+        # یک رکورد نامعتبر (مثلاً کاربر حذف‌شده) نباید بقیه دسته را از بین ببرد
+        written = []
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    entry.save()
+                written.append(entry)
+            except IntegrityError as e:
+                logger.error(f"خطا در ذخیره لاگ فعالیت: {e}", exc_info=True)
+    except DatabaseError as e:
+        logger.error(f"خطا در تخلیه صف لاگ فعالیت ({len(entries)} رکورد): {e}", exc_info=True)
+        _requeue(entries)
+        return 0
+    _record_stats(written)
+    return len(written)
+
+
+def flush_activity_logs_if_due():
+    """تخلیه صف فقط با رسیدن به اندازه یا بازه تخلیه - خروجی: تعداد رکوردهای نوشته‌شده"""
+    with _lock:
+        due = _flush_due()
+    return flush_activity_logs() if due else 0
+
+
+def pending_activity_logs():
+    """تعداد رکوردهای در صف"""
+    with _lock:
+        return len(_buffer)
+
+
+atexit.register(flush_activity_logs)
@@ -0,0 +1,130 @@
+"""
+آمار روزانه لاگ فعالیت
+Incremental daily ActivityLog counts (ActivityDailyStat)
+
+نویسنده لاگ (core.activity_log) پس از هر نوشتن دسته‌ای، تعداد رکوردها را به تفکیک
+(روز، عملیات، نوع مدل، کاربر) شمرده و با یک UPDATE و حداکثر یک INSERT به جدول
+ActivityDailyStat اضافه می‌کند. آمار داشبورد (activity_helpers) به جای COUNT/GROUP BY
+روی کل لاگ‌ها از همین چند صد ردیف خوانده می‌شود. دستور rebuild_activity_stats جدول را
+از روی لاگ‌های موجود بازسازی می‌کند.
+
+کلید یکتای هر ردیف (روز، عملیات، نوع مدل، user_key) است؛ user_key برای لاگ‌های بدون
+کاربر 0 است، پس درج هم‌زمان دو process برای یک کلید به IntegrityError و تکرار با UPDATE
+می‌رسد. ردیف‌های کاربر حذف‌شده با همان user_key می‌مانند؛ خواندن آمار با Sum انجام می‌شود.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+import jdatetime
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Min, PositiveIntegerField, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ActivityDailyStat, ActivityLog
+
+
+def jalali_day(day):
+    """تاریخ شمسی روز (ورودی میلادی یا شمسی، date یا datetime)"""
+    if isinstance(day, jdatetime.date):
+        return jdatetime.date(day.year, day.month, day.day)
+    return jdatetime.date.fromgregorian(date=day)
+
+
+def _day_start(day):
+    """ابتدای روز (datetime شمسی) برای فیلتر نیم‌باز timestamp"""
+    if isinstance(day, jdatetime.date):
+        day = day.togregorian()
+    return jdatetime.datetime.fromgregorian(datetime=datetime.combine(day, time.min))
+
+
+def _stat_key(entry):
+    return (jalali_day(entry.timestamp), entry.action, entry.content_type or '', entry.user_id or 0)
+
+
+def _add_counts(counts):
+    """افزودن تعدادها: یک SELECT، یک UPDATE (F + Case) برای کلیدهای موجود و یک INSERT برای بقیه"""
+    existing = {}
+    rows = ActivityDailyStat.objects.filter(
+        day__in={key[0] for key in counts},
+        action__in={key[1] for key in counts},
+        content_type__in={key[2] for key in counts},
+    ).values_list('pk', 'day', 'action', 'content_type', 'user_key')
+    for pk, *key in rows:
+        existing[tuple(key)] = pk
+
+    increments = {existing[key]: count for key, count in counts.items() if key in existing}
+    if increments:
+        ActivityDailyStat.objects.filter(pk__in=increments).update(
+            count=F('count') + Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in increments.items()],
+                output_field=PositiveIntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+    ActivityDailyStat.objects.bulk_create([
+        ActivityDailyStat(
+            day=day, action=action, content_type=content_type, user_id=user_key or None, user_key=user_key,
+            count=count,
+        )
+        for (day, action, content_type, user_key), count in counts.items()
+        if (day, action, content_type, user_key) not in existing
+    ])
+
+
+def record_activity_stats(entries):
+    """افزودن رکوردهای ActivityLog ذخیره‌شده به آمار روزانه"""
+    counts = Counter(_stat_key(entry) for entry in entries)
+    if not counts:
+        return
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _add_counts(counts)
+            return
+        except IntegrityError:
+            # ردیف همان کلید هم‌زمان در process دیگری ساخته شد؛ تکرار یک‌باره با UPDATE
+            if attempt:
+                raise
+
+
+def rebuild_activity_stats(start=None, end=None):
+    """
+    بازسازی آمار روزهای [start, end] (پیش‌فرض: از قدیمی‌ترین تا جدیدترین لاگ موجود)
+    ابتدای بازه همیشه به روز قدیمی‌ترین لاگ موجود محدود می‌شود تا آمار روزهای
+    بایگانی‌شده (core.activity_archive) که لاگشان دیگر در جدول نیست حذف نشود
+    خروجی: تعداد ردیف‌های آمار نوشته‌شده
+    """
+    logs = ActivityLog.objects.all()
+    if start:
+        logs = logs.filter(timestamp__gte=_day_start(start))
+    if end:
+        logs = logs.filter(timestamp__lt=_day_start(jalali_day(end).togregorian() + timedelta(days=1)))
+    bounds = logs.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+    if bounds['first'] is None:
+        return 0
+
+    rows = [
+        ActivityDailyStat(
+            day=jalali_day(row['day']), action=row['action'], content_type=row['content_type'] or '',
+            user_id=row['user_id'], user_key=row['user_id'] or 0, count=row['count'],
+        )
+        for row in logs.annotate(day=TruncDate('timestamp')).order_by()
+        .values('day', 'action', 'content_type', 'user_id').annotate(count=Count('id'))
+    ]
+    # NULL و '' در content_type یک گروه‌اند
+    merged = {}
+    for row in rows:
+        key = (row.day, row.action, row.content_type, row.user_key)
+        if key in merged:
+            merged[key].count += row.count
+        else:
+            merged[key] = row
+
+    # لاگ‌ها به start فیلتر شده‌اند، پس bounds['first'] همان max(start، قدیمی‌ترین لاگ) است
+    first_day = jalali_day(bounds['first'])
+    last_day = jalali_day(end) if end else jalali_day(bounds['last'])
+    with transaction.atomic():
+        ActivityDailyStat.objects.filter(day__gte=first_day, day__lte=last_day).delete()
+        ActivityDailyStat.objects.bulk_create(merged.values(), batch_size=1000)
+    return len(merged)
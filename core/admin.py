@@ -9,12 +9,15 @@ from django.forms.models import BaseInlineFormSet
 from django_jalali.admin.filters import JDateFieldListFilter
 from django_jalali.db import models as jmodels
 from admincharts.admin import AdminChartMixin
+from .formatters import format_number_with_thousand_sep
+from .leaves import remaining_days
 from .models import (
     UserProfile,
     Branch, Employee, ActivityReport,
     Income, Expense,
     Loan, LoanBuyer, LoanBuyerStatusHistory, LoanCreditor, LoanCreditorInstallment,
-    ActivityLog
+    ActivityLog, ActivityDailyStat, FinancialMonthlyRollup, AttendanceMonthlySummary, PayrollResult,
+    CompanySettings, DayWorkSchedule, LeaveBalance,
 )
 
 # ثبتی خدمات
@@ -687,7 +690,8 @@ class LoanAdmin(admin.ModelAdmin):
 @admin.register(LoanBuyer)
 class LoanBuyerAdmin(admin.ModelAdmin):
     """مدیریت خریداران وام - فقط ادمین"""
-    list_display = ('get_full_name', 'national_id', 'loan', 'requested_amount', 'current_status', 'broker')
+    list_display = ('get_full_name', 'national_id', 'loan', 'requested_amount', 'current_status',
+                    'get_profit', 'broker')
     list_filter = ('loan__loan_type', 'current_status', ('application_date', JDateFieldListFilter), 
                    'sale_type', 'broker')
     search_fields = ('first_name', 'last_name', 'national_id', 'phone')
@@ -742,9 +746,17 @@ class LoanBuyerAdmin(admin.ModelAdmin):
         return f"{obj.first_name} {obj.last_name}"
     get_full_name.short_description = "نام و نام خانوادگی"
     
+    def get_profit(self, obj):
+        """سود فروش محاسبه‌شده در دیتابیس (with_profit)"""
+        if obj.profit is None:
+            return '-'
+        return format_number_with_thousand_sep(obj.profit)
+    get_profit.short_description = "سود فروش"
+    get_profit.admin_order_field = 'profit'
+    
     def get_queryset(self, request):
         """تصفیه بر اساس نقش کاربر"""
-        qs = super().get_queryset(request)
+        qs = super().get_queryset(request).with_profit()
         if is_pure_admin(request.user):
             return qs
         return qs.none()
@@ -958,6 +970,197 @@ class LoanCreditorInstallmentAdmin(admin.ModelAdmin):
     get_remaining_amount.short_description = "باقی‌مانده"
 
 
+@admin.register(FinancialMonthlyRollup)
+class FinancialMonthlyRollupAdmin(admin.ModelAdmin):
+    """نمایش تجمیع ماهانه مالی - فقط خواندنی و فقط ادمین"""
+    list_display = ('year', 'month', 'branch', 'metric', 'get_formatted_amount', 'updated_at')
+    list_filter = ('year', 'metric', 'branch')
+    readonly_fields = ('year', 'month', 'branch', 'metric', 'amount', 'updated_at')
+    list_select_related = ('branch',)
+    
+    def has_module_permission(self, request):
+        """فقط ادمین می‌تواند این مدل را ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_add_permission(self, request):
+        """ردیف‌ها فقط توسط سیگنال‌ها و دستور بازسازی ایجاد می‌شوند"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """جلوگیری از ویرایش دستی"""
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        """جلوگیری از حذف دستی"""
+        return False
+    
+    def get_formatted_amount(self, obj):
+        return f"{obj.amount:,.0f} ریال"
+    get_formatted_amount.short_description = "مبلغ"
+
+
+class DayWorkScheduleInline(admin.TabularInline):
+    """جدول کاری هفت روز هفته"""
+    model = DayWorkSchedule
+    extra = 0
+    max_num = 7
+    fields = ('day_of_week', 'work_status', 'work_start_range_start', 'work_start_range_end', 'work_end')
+    ordering = ['day_of_week']
+
+
+@admin.register(CompanySettings)
+class CompanySettingsAdmin(admin.ModelAdmin):
+    """تنظیمات ساعات کاری و اضافه‌کاری شرکت - تک‌ردیفی و فقط ادمین"""
+    list_display = (
+        '__str__', 'standard_work_minutes', 'max_daily_overtime', 'max_monthly_overtime', 'annual_leave_days',
+        'updated_at',
+    )
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = [DayWorkScheduleInline]
+    
+    def has_module_permission(self, request):
+        """فقط ادمین می‌تواند این مدل را ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_add_permission(self, request):
+        """فقط یک ردیف تنظیمات وجود دارد"""
+        return is_pure_admin(request.user) and not CompanySettings.objects.exists()
+    
+    def has_change_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند تنظیمات را تغییر بدهد"""
+        return is_pure_admin(request.user)
+    
+    def has_delete_permission(self, request, obj=None):
+        """جلوگیری از حذف تنظیمات"""
+        return False
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    """دفتر مانده مرخصی کارمندان - فقط خواندنی و فقط ادمین"""
+    list_display = ('employee', 'year', 'leave_type', 'entitlement_days', 'used_days', 'used_hours',
+                    'get_remaining_days', 'updated_at')
+    list_filter = ('year', 'leave_type', 'employee__branch')
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__personnel_id')
+    readonly_fields = [field.name for field in LeaveBalance._meta.fields]
+    list_select_related = ('employee__user',)
+    
+    def has_module_permission(self, request):
+        """فقط ادمین می‌تواند این مدل را ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_add_permission(self, request):
+        """ردیف‌ها فقط با تایید/لغو مرخصی و دستور بازسازی ایجاد می‌شوند"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """جلوگیری از ویرایش دستی"""
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        """جلوگیری از حذف دستی"""
+        return False
+    
+    def get_remaining_days(self, obj):
+        if not obj.entitlement_days:
+            return '-'
+        return f"{remaining_days(obj.entitlement_days, obj.used_days, obj.used_hours):g}"
+    get_remaining_days.short_description = "مانده (روز)"
+
+
+@admin.register(AttendanceMonthlySummary)
+class AttendanceMonthlySummaryAdmin(admin.ModelAdmin):
+    """گزارش ماهانه حضور و غیاب همه کارمندان - فقط خواندنی و فقط ادمین"""
+    list_display = (
+        'employee', 'year', 'month', 'present_days', 'absent_days', 'late_days', 'leave_days',
+        'incomplete_days', 'get_work_hours', 'get_overtime_hours', 'updated_at',
+    )
+    list_filter = ('year', 'month', 'employee__branch')
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__personnel_id')
+    readonly_fields = [field.name for field in AttendanceMonthlySummary._meta.fields]
+    list_select_related = ('employee__user',)
+    
+    def has_module_permission(self, request):
+        """فقط ادمین می‌تواند این مدل را ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_add_permission(self, request):
+        """ردیف‌ها فقط توسط سیگنال‌ها و دستور بازسازی ایجاد می‌شوند"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """جلوگیری از ویرایش دستی"""
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        """جلوگیری از حذف دستی"""
+        return False
+    
+    def get_work_hours(self, obj):
+        return f"{obj.total_work_minutes // 60}:{obj.total_work_minutes % 60:02d}"
+    get_work_hours.short_description = "کارکرد"
+    get_work_hours.admin_order_field = 'total_work_minutes'
+    
+    def get_overtime_hours(self, obj):
+        return f"{obj.total_overtime_minutes // 60}:{obj.total_overtime_minutes % 60:02d}"
+    get_overtime_hours.short_description = "اضافه‌کاری"
+    get_overtime_hours.admin_order_field = 'total_overtime_minutes'
+
+
+@admin.register(PayrollResult)
+class PayrollResultAdmin(admin.ModelAdmin):
+    """حقوق ماهانه محاسبه‌شده (compute_payroll) - فقط خواندنی و فقط ادمین"""
+    list_display = (
+        'employee', 'year', 'month', 'base_salary', 'get_overtime_hours', 'overtime_pay',
+        'paid_leave_hours', 'unpaid_leave_hours', 'leave_deduction', 'net_pay', 'computed_at',
+    )
+    list_filter = ('year', 'month', 'employee__branch')
+    search_fields = ('employee__user__first_name', 'employee__user__last_name', 'employee__personnel_id')
+    readonly_fields = [field.name for field in PayrollResult._meta.fields]
+    list_select_related = ('employee__user',)
+    
+    def has_module_permission(self, request):
+        """فقط ادمین می‌تواند این مدل را ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_add_permission(self, request):
+        """ردیف‌ها فقط توسط دستور compute_payroll ایجاد می‌شوند"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """جلوگیری از ویرایش دستی"""
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        """جلوگیری از حذف دستی"""
+        return False
+    
+    def get_overtime_hours(self, obj):
+        return f"{obj.overtime_minutes // 60}:{obj.overtime_minutes % 60:02d}"
+    get_overtime_hours.short_description = "اضافه‌کاری"
+    get_overtime_hours.admin_order_field = 'overtime_minutes'
+
+
 # User Admin customization
 class UserProfileInline(admin.StackedInline):
     """نمایش پروفایل در User Admin"""
@@ -1011,7 +1214,8 @@ class ActivityLogAdmin(admin.ModelAdmin):
     list_display = ('get_timestamp_display', 'get_action_display_colored', 'get_user_display', 'content_type', 'get_description_short', 'ip_address')
     list_filter = ('action', 'content_type')
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'object_description', 'ip_address')
-    readonly_fields = ('timestamp', 'user', 'action', 'content_type', 'object_id', 'object_description', 'details_formatted', 'ip_address')
+    readonly_fields = ('timestamp', 'user', 'action', 'content_type', 'object_id', 'object_description',
+                       'branch_id', 'amount', 'creditor_id', 'details_formatted', 'ip_address')
     
     fieldsets = (
         ('اطلاعات کاربر', {
@@ -1021,7 +1225,7 @@ class ActivityLogAdmin(admin.ModelAdmin):
             'fields': ('action', 'content_type')
         }),
         ('اطلاعات رکورد', {
-            'fields': ('object_id', 'object_description')
+            'fields': ('object_id', 'object_description', 'branch_id', 'amount', 'creditor_id')
         }),
         ('جزئیات تغییرات', {
             'fields': ('details_formatted',),
@@ -1102,17 +1306,13 @@ class ActivityLogAdmin(admin.ModelAdmin):
     get_description_short.short_description = "توضیح"
     
     def details_formatted(self, obj):
-        """نمایش تنسیق‌شده جزئیات JSON"""
+        """نمایش تنسیق‌شده جزئیات JSON (details از قبل به صورت dict خوانده شده است)"""
         if obj.details:
             import json
-            try:
-                data = json.loads(obj.details)
-                html = '<pre style="direction: rtl; text-align: right; background-color: #f5f5f5; padding: 10px; border-radius: 5px;">'
-                html += json.dumps(data, ensure_ascii=False, indent=2)
-                html += '</pre>'
-                return html
-            except:
-                return f'<pre>{obj.details}</pre>'
+            html = '<pre style="direction: rtl; text-align: right; background-color: #f5f5f5; padding: 10px; border-radius: 5px;">'
+            html += json.dumps(obj.details, ensure_ascii=False, indent=2)
+            html += '</pre>'
+            return html
         return "بدون جزئیات"
     details_formatted.short_description = "جزئیات تغییرات"
     details_formatted.allow_tags = True
@@ -1123,6 +1323,36 @@ class ActivityLogAdmin(admin.ModelAdmin):
         return qs.select_related('user').order_by('-timestamp')
 
 
+@admin.register(ActivityDailyStat)
+class ActivityDailyStatAdmin(admin.ModelAdmin):
+    """آمار روزانه لاگ‌های فعالیت - فقط خواندنی و فقط ادمین"""
+    list_display = ('day', 'action', 'content_type', 'user', 'count', 'updated_at')
+    list_filter = ('action', 'content_type')
+    search_fields = ('user__username', 'user__first_name', 'user__last_name')
+    readonly_fields = [field.name for field in ActivityDailyStat._meta.fields]
+    list_select_related = ('user',)
+    
+    def has_module_permission(self, request):
+        """فقط ادمین می‌تواند این مدل را ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_view_permission(self, request, obj=None):
+        """فقط ادمین می‌تواند ببیند"""
+        return is_pure_admin(request.user)
+    
+    def has_add_permission(self, request):
+        """ردیف‌ها فقط توسط نویسنده لاگ و دستور بازسازی ایجاد می‌شوند"""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """جلوگیری از ویرایش دستی"""
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        """جلوگیری از حذف دستی"""
+        return False
+
+
 # سفارشی‌سازی Admin Site
 admin.site.site_header = "⚖️ مدیریت Phonix"
 admin.site.site_title = "Phonix Admin"
@@ -0,0 +1,149 @@
+"""
+خلاصه ماهانه حضور و غیاب (AttendanceMonthlySummary)
+Monthly attendance summaries per employee and Jalali month
+
+هر ردیف خلاصه از روی رکوردهای Attendance همان کارمند در همان ماه شمسی محاسبه
+می‌شود. با هر ذخیره/حذف رکورد حضور (signals.py) و پس از نوشتن‌های دسته‌ای
+(create_daily_attendance، همگام‌سازی آفلاین، ثبت ورود) فقط خانه‌های
+(کارمند، سال، ماه) تغییرکرده دوباره محاسبه می‌شوند؛ برای هر ماه یک کوئری GROUP BY.
+"""
+from collections import defaultdict
+
+import jdatetime
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum, Min, Max
+from django.db.models.functions import Coalesce
+
+from .models import Attendance, AttendanceMonthlySummary
+from .financial_reports import jalali_month_start, next_jalali_month
+
+SUMMARY_AGGREGATES = {
+    'total_work_minutes': Coalesce(Sum('work_duration'), 0),
+    'total_overtime_minutes': Coalesce(Sum('overtime_duration'), 0),
+    'present_days': Count('id', filter=Q(status='present')),
+    'absent_days': Count('id', filter=Q(status='absent')),
+    'late_days': Count('id', filter=Q(status='late')),
+    'leave_days': Count('id', filter=Q(status='leave')),
+    'early_leave_days': Count('id', filter=Q(status='early_leave')),
+    'incomplete_days': Count('id', filter=Q(check_in__isnull=False, check_out__isnull=True)),
+}
+SUMMARY_FIELDS = tuple(SUMMARY_AGGREGATES)
+
+
+def summary_month(day):
+    """(سال، ماه) شمسی یک تاریخ میلادی"""
+    jday = jdatetime.date.fromgregorian(date=day)
+    return jday.year, jday.month
+
+
+def month_bounds(year, month):
+    """بازه میلادی نیمه‌باز [شروع، شروع ماه بعد) یک ماه شمسی"""
+    start = jdatetime.date(year, month, 1)
+    return start.togregorian(), next_jalali_month(start).togregorian()
+
+
+def summary_cells(employee_id, dates):
+    """خانه‌های (کارمند، سال، ماه) برای مجموعه‌ای از تاریخ‌ها"""
+    return {(employee_id,) + summary_month(day) for day in dates}
+
+
+def summary_cells_for(instance):
+    """خانه خلاصه‌ای که وضعیت فعلی رکورد حضور در پایگاه داده در آن شمرده می‌شود"""
+    if instance.pk is None:
+        return set()
+    row = Attendance.objects.filter(pk=instance.pk).values('employee_id', 'date').first()
+    if row is None:
+        return set()
+    return summary_cells(row['employee_id'], [row['date']])
+
+
+def _store_summaries(rows):
+    """upsert دسته‌ای ردیف‌های خلاصه بر اساس unique (employee, year, month)"""
+    if not rows:
+        return
+    # MySQL هدف برخورد (unique_fields) را نمی‌پذیرد
+    unique_fields = (
+        ['employee', 'year', 'month'] if connection.features.supports_update_conflicts_with_target else None
+    )
+    AttendanceMonthlySummary.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=list(SUMMARY_FIELDS) + ['updated_at'],
+    )
+
+
+def refresh_attendance_summaries(cells):
+    """
+    محاسبه مجدد و ذخیره خانه‌های (employee_id, year, month)
+    خانه‌هایی که دیگر رکوردی ندارند حذف می‌شوند
+    """
+    by_month = defaultdict(set)
+    for employee_id, year, month in cells:
+        by_month[(year, month)].add(employee_id)
+
+    for (year, month), employee_ids in by_month.items():
+        start, end = month_bounds(year, month)
+        totals = {
+            row.pop('employee_id'): row
+            for row in Attendance.objects.filter(
+                employee_id__in=employee_ids, date__gte=start, date__lt=end,
+            ).order_by().values('employee_id').annotate(**SUMMARY_AGGREGATES)
+        }
+        with transaction.atomic():
+            _store_summaries([
+                AttendanceMonthlySummary(employee_id=employee_id, year=year, month=month, **values)
+                for employee_id, values in totals.items()
+            ])
+            empty = employee_ids - set(totals)
+            if empty:
+                AttendanceMonthlySummary.objects.filter(
+                    employee_id__in=empty, year=year, month=month,
+                ).delete()
+
+
+def remember_summary_cells(instance):
+    """ذخیره خانه خلاصه وضعیت قبلی رکورد (در pre_save / pre_delete)"""
+    instance._attendance_summary_cells = summary_cells_for(instance)
+
+
+def refresh_summaries_for(instance, deleted=False):
+    """بروزرسانی خانه‌های وضعیت قبلی و فعلی رکورد (در post_save / post_delete)"""
+    cells = set(getattr(instance, '_attendance_summary_cells', set()))
+    if not deleted:
+        cells |= summary_cells(instance.employee_id, [instance.date])
+    refresh_attendance_summaries(cells)
+
+
+def rebuild_attendance_summaries(start=None, end=None):
+    """
+    بازسازی خلاصه‌های ماهانه (کل جدول یا ماه‌های شامل بازه [start, end])
+    Rebuild monthly summaries month by month; returns the number of rows written
+    """
+    queryset = Attendance.objects.all()
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    bounds = queryset.aggregate(first=Min('date'), last=Max('date'))
+    if bounds['first'] is None:
+        return 0
+
+    count = 0
+    month = jalali_month_start(bounds['first'])
+    last = jalali_month_start(bounds['last'])
+    while month <= last:
+        month_start, month_end = month_bounds(month.year, month.month)
+        rows = [
+            AttendanceMonthlySummary(employee_id=row.pop('employee_id'), year=month.year, month=month.month, **row)
+            for row in Attendance.objects.filter(
+                date__gte=month_start, date__lt=month_end,
+            ).order_by().values('employee_id').annotate(**SUMMARY_AGGREGATES)
+        ]
+        with transaction.atomic():
+            AttendanceMonthlySummary.objects.filter(year=month.year, month=month.month).delete()
+            AttendanceMonthlySummary.objects.bulk_create(rows, batch_size=1000)
+        count += len(rows)
+        month = next_jalali_month(month)
+    return count
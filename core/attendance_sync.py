@@ -0,0 +1,206 @@
+"""
+همگام‌سازی دسته‌ای رویدادهای آفلاین ورود/خروج
+Offline batch sync of check-in/check-out events from kiosks and mobile clients
+
+کیوسک‌ها و داشبورد موبایل در شعب با اتصال ناپایدار رویدادها را ذخیره و یکجا ارسال
+می‌کنند. رکوردهای موجود (کارمند، تاریخ) با یک کوئری خوانده، رویدادها به ترتیب زمان
+در حافظه اعمال (همراه با calculate_work_duration) و همه تغییرات در یک تراکنش با
+upsert دسته‌ای نوشته می‌شوند.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Employee, Attendance
+from .attendance_summaries import refresh_attendance_summaries, summary_cells
+from .leaves import hourly_leave_minutes
+
+MAX_SYNC_EVENTS = 500
+# رویدادهای قدیمی‌تر از این تعداد روز پذیرفته نمی‌شوند
+SYNC_MAX_AGE_DAYS = 31
+# اختلاف مجاز ساعت دستگاه با سرور
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+
+EVENT_TYPES = ('check_in', 'check_out')
+SYNC_FIELDS = ('check_in', 'check_out', 'work_duration', 'overtime_duration', 'status')
+
+SyncEvent = namedtuple('SyncEvent', 'index event_id kind timestamp employee_id')
+
+
+class SyncError(ValueError):
+    """خطای اعتبارسنجی یک رویداد"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _parse_timestamp(value):
+    if not isinstance(value, str):
+        raise SyncError('invalid_timestamp', 'زمان رویداد نامعتبر است')
+    try:
+        timestamp = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise SyncError('invalid_timestamp', f'زمان رویداد نامعتبر است: {value}')
+    if timezone.is_aware(timestamp):
+        timestamp = timezone.make_naive(timestamp)
+    return timestamp.replace(microsecond=0)
+
+
+def parse_events(payload, default_employee_id, allowed_employee_ids=None):
+    """
+    تبدیل رویدادهای خام به SyncEvent
+    خروجی: (رویدادهای معتبر، نتایج رد شده)
+    allowed_employee_ids=None یعنی کاربر فقط برای خودش رویداد ثبت می‌کند
+    """
+    now = datetime.now()
+    events, rejected = [], []
+    for index, raw in enumerate(payload['events']):
+        event_id = raw.get('id') if isinstance(raw, dict) else None
+        try:
+            if not isinstance(raw, dict):
+                raise SyncError('invalid_event', 'رویداد نامعتبر است')
+            kind = raw.get('type')
+            if kind not in EVENT_TYPES:
+                raise SyncError('invalid_type', f'نوع رویداد نامعتبر است: {kind}')
+            timestamp = _parse_timestamp(raw.get('timestamp'))
+            if timestamp > now + SYNC_CLOCK_SKEW:
+                raise SyncError('future_timestamp', 'زمان رویداد در آینده است')
+            if timestamp < now - timedelta(days=SYNC_MAX_AGE_DAYS):
+                raise SyncError('expired', f'رویدادهای قدیمی‌تر از {SYNC_MAX_AGE_DAYS} روز پذیرفته نمی‌شوند')
+
+            employee_id = raw.get('employee_id') or default_employee_id
+            if employee_id is None:
+                raise SyncError('unknown_employee', 'کارمند رویداد مشخص نیست')
+            if employee_id != default_employee_id:
+                if allowed_employee_ids is None:
+                    raise SyncError('forbidden', 'ثبت رویداد برای کارمند دیگر مجاز نیست')
+                if employee_id not in allowed_employee_ids:
+                    raise SyncError('unknown_employee', f'کارمند یافت نشد: {employee_id}')
+            events.append(SyncEvent(index, event_id, kind, timestamp, employee_id))
+        except SyncError as e:
+            rejected.append({'index': index, 'id': event_id, 'status': 'rejected', 'reason': e.reason, 'message': str(e)})
+    return events, rejected
+
+
+def _apply_event(attendance, event):
+    """اعمال یک رویداد روی رکورد (در حافظه) - خروجی: applied یا duplicate"""
+    moment = event.timestamp.time()
+    if event.kind == 'check_in':
+        if attendance.check_in:
+            if attendance.check_in.replace(microsecond=0) == moment:
+                return 'duplicate'
+            raise SyncError('already_checked_in', 'برای این روز قبلاً ورود ثبت شده است')
+        if attendance.status == 'leave':
+            raise SyncError('on_leave', 'برای این روز مرخصی ثبت شده است')
+        attendance.check_in = moment
+        return 'applied'
+
+    if not attendance.check_in:
+        raise SyncError('not_checked_in', 'برای این روز ورودی ثبت نشده است')
+    if attendance.check_out:
+        if attendance.check_out.replace(microsecond=0) == moment:
+            return 'duplicate'
+        raise SyncError('already_checked_out', 'برای این روز قبلاً خروج ثبت شده است')
+    if moment <= attendance.check_in:
+        raise SyncError('before_check_in', 'زمان خروج قبل از زمان ورود است')
+    attendance.check_out = moment
+    attendance.calculate_work_duration()
+    return 'applied'
+
+
+def apply_events(events):
+    """
+    اعمال رویدادها در یک تراکنش
+    رکوردهای موجود با یک کوئری (قفل‌شده) خوانده و تغییرات با یک upsert دسته‌ای نوشته می‌شوند
+    خروجی: (نتایج هر رویداد، تعداد رکوردهای نوشته‌شده)
+    """
+    if not events:
+        return [], 0
+
+    keys = {(event.employee_id, event.timestamp.date()) for event in events}
+    results = []
+    with transaction.atomic():
+        rows = {
+            (row.employee_id, row.date): row
+            for row in Attendance.objects.select_for_update().filter(
+                employee_id__in={employee_id for employee_id, _ in keys},
+                date__in={day for _, day in keys},
+            )
+        }
+        # رکوردهای جدید دقایق مرخصی ساعتی تاییدشده را از همان ابتدا دارند
+        missing = keys - rows.keys()
+        leave_minutes = hourly_leave_minutes(
+            {employee_id for employee_id, _ in missing}, min(day for _, day in missing), max(day for _, day in missing),
+        ) if missing else {}
+
+        changed = {}
+        for event in sorted(events, key=lambda event: (event.timestamp, event.kind != 'check_in')):
+            key = (event.employee_id, event.timestamp.date())
+            attendance = rows.get(key) or Attendance(
+                employee_id=key[0], date=key[1], leave_minutes=leave_minutes.get(key, 0),
+            )
+            try:
+                status = _apply_event(attendance, event)
+            except SyncError as e:
+                results.append({
+                    'index': event.index, 'id': event.event_id, 'status': 'rejected',
+                    'reason': e.reason, 'message': str(e),
+                })
+                continue
+            rows[key] = attendance
+            if status == 'applied':
+                changed[key] = attendance
+            results.append({'index': event.index, 'id': event.event_id, 'status': status})
+
+        if changed:
+            # upsert بر اساس unique (employee, date)؛ MySQL هدف برخورد را نمی‌پذیرد
+            unique_fields = ['employee', 'date'] if connection.features.supports_update_conflicts_with_target else None
+            Attendance.objects.bulk_create(
+                [
+                    Attendance(
+                        employee_id=attendance.employee_id,
+                        date=attendance.date,
+                        leave_minutes=attendance.leave_minutes,
+                        **{field: getattr(attendance, field) for field in SYNC_FIELDS},
+                    )
+                    for attendance in changed.values()
+                ],
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=list(SYNC_FIELDS) + ['updated_at'],
+            )
+            refresh_attendance_summaries({
+                cell for employee_id, day in changed for cell in summary_cells(employee_id, [day])
+            })
+    return results, len(changed)
+
+
+def sync_attendance(payload, employee, allow_other_employees=False):
+    """
+    نقطه ورود همگام‌سازی: اعتبارسنجی و اعمال یک دسته رویداد
+    employee: کارمند پیش‌فرض رویدادهای بدون employee_id (کاربر جاری)
+    payload: {'device_id': ..., 'events': [{'id', 'type', 'timestamp', 'employee_id'?}, ...]}
+    """
+    allowed = None
+    if allow_other_employees:
+        requested = {
+            raw.get('employee_id') for raw in payload['events']
+            if isinstance(raw, dict) and raw.get('employee_id')
+        }
+        allowed = set(Employee.objects.filter(pk__in=[
+            pk for pk in requested if isinstance(pk, int)
+        ]).values_list('pk', flat=True))
+
+    events, rejected = parse_events(payload, employee.pk if employee else None, allowed)
+    results, written = apply_events(events)
+    results = sorted(results + rejected, key=lambda result: result['index'])
+    return {
+        'applied': sum(1 for result in results if result['status'] == 'applied'),
+        'duplicates': sum(1 for result in results if result['status'] == 'duplicate'),
+        'rejected': sum(1 for result in results if result['status'] == 'rejected'),
+        'records': written,
+        'results': results,
+    }
@@ -0,0 +1,78 @@
+"""
+تشخیص کارمند کاربر جاری با کش
+Request-scoped, cached resolution of the Employee behind the current user
+
+EmployeeMiddleware مقدار request.employee را به صورت lazy تنظیم می‌کند؛ کارمند فقط
+در اولین دسترسی و فقط یک بار در هر درخواست از کش (یا در صورت نبود، از دیتابیس)
+خوانده می‌شود. اگر کاربر هنوز کارمند نداشته باشد، یک بار از روی UserProfile ساخته
+می‌شود. ذخیره Employee یا UserProfile کش همان کاربر را باطل می‌کند (signals.py).
+
+کش بین درخواست‌ها فقط روی backend مشترک (فایل، دیتابیس، Redis) استفاده می‌شود؛ روی
+LocMem باطل‌سازی به workerهای دیگر نمی‌رسد و فقط حافظه همان درخواست استفاده می‌شود.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Employee
+
+EMPLOYEE_CACHE_TIMEOUT = 3600
+
+# فیلدهایی که هنگام ساخت کارمند مستقیماً از UserProfile کپی می‌شوند
+PROFILE_FIELDS = (
+    'national_id', 'phone', 'birth_date', 'gender', 'address', 'branch_id', 'personnel_id',
+    'contract_type', 'employment_status', 'hire_date', 'base_salary', 'benefits',
+    'payment_method', 'bank_account_number', 'insurance_info', 'education', 'profile_picture',
+)
+
+
+def employee_cache_key(user_id):
+    return f'employee:user:{user_id}'
+
+
+def employee_cache_enabled():
+    """کش کارمند بین درخواست‌ها فقط وقتی backend بین processها مشترک است"""
+    return not settings.CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+
+def invalidate_employee_cache(user_id):
+    if user_id:
+        cache.delete(employee_cache_key(user_id))
+
+
+def _profile_defaults(user):
+    """مقادیر اولیه کارمند جدید از روی پروفایل کاربر"""
+    profile = getattr(user, 'profile', None)
+    if profile is None:
+        return {}
+    defaults = {field: getattr(profile, field) for field in PROFILE_FIELDS}
+    defaults['job_title'] = 'lawyer' if profile.role == 'lawyer' else 'other'
+    return defaults
+
+
+def provision_employee(user):
+    """دریافت یا ساخت کارمند کاربر (ساخت در یک INSERT با اطلاعات پروفایل)"""
+    employee = Employee.objects.select_related('branch').filter(user=user).first()
+    if employee is None:
+        employee, _ = Employee.objects.get_or_create(user=user, defaults=_profile_defaults(user))
+    return employee
+
+
+def resolve_employee(user):
+    """کارمند کاربر از کش؛ در صورت نبود از دیتابیس خوانده/ساخته و کش می‌شود"""
+    if not user.is_authenticated:
+        return None
+    if not employee_cache_enabled():
+        return provision_employee(user)
+    key = employee_cache_key(user.pk)
+    employee = cache.get(key)
+    if employee is None:
+        employee = provision_employee(user)
+        cache.set(key, employee, EMPLOYEE_CACHE_TIMEOUT)
+    return employee
+
+
+def get_request_employee(request):
+    """کارمند درخواست جاری - حداکثر یک بار برای هر درخواست محاسبه می‌شود"""
+    if not hasattr(request, '_cached_employee'):
+        request._cached_employee = resolve_employee(request.user)
+    return request._cached_employee
@@ -0,0 +1,294 @@
+"""
+خروجی استریم دفاتر مالی (CSV / XLSX)
+Streaming CSV/XLSX export of the ledgers behind the financial chart
+
+ردیف‌ها به صورت دسته‌ای (صفحه‌بندی بر اساس کلید اصلی) خوانده و بلافاصله به
+خروجی نوشته می‌شوند؛ مصرف حافظه مستقل از تعداد ردیف‌هاست. صفحه‌بندی کلیدی به
+جای iterator() انتخاب شده چون درایور MySQL کل نتیجه iterator را در حافظه
+کلاینت بافر می‌کند.
+"""
+import csv
+import zipfile
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+import jdatetime
+
+from .models import Income, Expense, LoanCreditorInstallment
+from .financial_reports import CONSULTATION_INCOME, _day_bounds
+from vekalet.models import Consultation
+from registry.models import TradeAcquisition, TradePartnership, Company, License
+
+EXPORT_CHUNK_SIZE = 2000
+
+# هر منبع خروجی: مدل، فیلتر پایه، فیلد تاریخ، آیا تاریخ-زمان است، مسیر شعبه،
+# ستون‌ها به صورت (عنوان، مسیر فیلد) و annotationهای اضافی
+ExportSource = namedtuple(
+    'ExportSource',
+    'model queryset date_field is_datetime branch_field columns annotations',
+)
+
+REGISTRY_COLUMNS = (
+    ('شناسه', 'pk'),
+    ('تاریخ ثبت', 'created_at'),
+    ('نام', 'contact_info__first_name'),
+    ('نام خانوادگی', 'contact_info__last_name'),
+    ('مبلغ دریافتی', 'amount_received'),
+)
+
+EXPORT_LEDGERS = {
+    'income': (
+        ExportSource(
+            Income, lambda: Income.objects.all(), 'registration_date', False, 'branch',
+            (
+                ('شناسه', 'pk'),
+                ('تاریخ ثبت', 'registration_date'),
+                ('عنوان', 'title'),
+                ('دسته‌بندی', 'category'),
+                ('وضعیت پرداخت', 'payment_status'),
+                ('شعبه', 'branch__name'),
+                ('مبلغ', 'amount'),
+            ),
+            {},
+        ),
+    ),
+    'expense': (
+        ExportSource(
+            Expense, lambda: Expense.objects.all(), 'registration_date', False, 'branch',
+            (
+                ('شناسه', 'pk'),
+                ('تاریخ ثبت', 'registration_date'),
+                ('عنوان', 'title'),
+                ('دسته‌بندی', 'category'),
+                ('وضعیت پرداخت', 'payment_status'),
+                ('شعبه', 'branch__name'),
+                ('مبلغ', 'amount'),
+            ),
+            {},
+        ),
+    ),
+    # پرداخت‌های اقساط بستانکاران (بر اساس تاریخ پرداخت)
+    'installments': (
+        ExportSource(
+            LoanCreditorInstallment,
+            lambda: LoanCreditorInstallment.objects.filter(payment_date__isnull=False),
+            'payment_date', False, 'creditor__branch',
+            (
+                ('شناسه', 'pk'),
+                ('تاریخ پرداخت', 'payment_date'),
+                ('نام بستانکار', 'creditor__first_name'),
+                ('نام خانوادگی بستانکار', 'creditor__last_name'),
+                ('شماره قسط', 'installment_number'),
+                ('شعبه', 'creditor__branch__name'),
+                ('مبلغ پرداخت‌شده', 'paid_amount'),
+            ),
+            {},
+        ),
+    ),
+    'consultations': (
+        ExportSource(
+            Consultation, lambda: Consultation.objects.all(), 'consultation_date', True, None,
+            (
+                ('شناسه', 'pk'),
+                ('تاریخ مشاوره', 'consultation_date'),
+                ('نام مراجع', 'client_name'),
+                ('موضوع', 'consultation_subject'),
+                ('وضعیت پرداخت', 'payment_status'),
+                ('هزینه مشاوره', 'consultation_fee'),
+                ('مبلغ پرداخت‌شده', 'amount_paid'),
+                ('درآمد شناسایی‌شده', 'recognized_income'),
+            ),
+            {'recognized_income': CONSULTATION_INCOME},
+        ),
+    ),
+    # دریافتی‌های ثبتی: هر چهار مدل پشت سر هم با ستون نوع خدمت
+    'registry': tuple(
+        ExportSource(
+            model, model.objects.all, 'created_at', True, None, REGISTRY_COLUMNS, {},
+        )
+        for model in (TradeAcquisition, TradePartnership, Company, License)
+    ),
+}
+
+
+def _choice_labels(source, lookup):
+    """برچسب فارسی گزینه‌ها برای فیلدهای مستقیم دارای choices"""
+    if '__' in lookup or lookup == 'pk' or lookup in source.annotations:
+        return None
+    field = source.model._meta.get_field(lookup)
+    return dict(field.flatchoices) if field.choices else None
+
+
+def _format_value(value):
+    if isinstance(value, (jdatetime.datetime, datetime)):
+        if isinstance(value, datetime):
+            value = jdatetime.datetime.fromgregorian(datetime=value)
+        return value.strftime('%Y/%m/%d %H:%M')
+    if isinstance(value, (jdatetime.date, date)):
+        if isinstance(value, date):
+            value = jdatetime.date.fromgregorian(date=value)
+        return value.strftime('%Y/%m/%d')
+    return value
+
+
+def export_headers(kind):
+    headers = [header for header, _ in EXPORT_LEDGERS[kind][0].columns]
+    if kind == 'registry':
+        headers.insert(1, 'نوع خدمت')
+    return headers
+
+
+def export_rows(kind, start, end, branch=None):
+    """
+    تولید ردیف‌های یک دفتر در بازه [start, end] (تاریخ‌های میلادی، end شامل)
+    خواندن به صورت صفحه‌های EXPORT_CHUNK_SIZE تایی بر اساس کلید اصلی
+    """
+    for source in EXPORT_LEDGERS[kind]:
+        if branch is not None and not source.branch_field:
+            continue
+        # بازه نیمه‌باز [start, end + 1) روی خود ستون تا ایندکس تاریخ استفاده شود (بدون __date)
+        lower, upper = _day_bounds(source, start, end + timedelta(days=1))
+        queryset = source.queryset().filter(**{
+            f'{source.date_field}__gte': lower,
+            f'{source.date_field}__lt': upper,
+        })
+        if branch is not None:
+            queryset = queryset.filter(**{source.branch_field: branch})
+
+        lookups = [lookup for _, lookup in source.columns]
+        labels = [_choice_labels(source, lookup) for lookup in lookups]
+        queryset = queryset.annotate(**source.annotations).values_list(*lookups).order_by('pk')
+
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(page[:EXPORT_CHUNK_SIZE])
+            if not rows:
+                break
+            for row in rows:
+                values = [
+                    choices.get(value, value) if choices else _format_value(value)
+                    for value, choices in zip(row, labels)
+                ]
+                if kind == 'registry':
+                    values.insert(1, str(source.model._meta.verbose_name))
+                yield values
+            last_pk = rows[-1][0]
+
+
+# ============================================
+# نویسنده‌های CSV / XLSX
+# ============================================
+
+class _Echo:
+    """شیء شبه‌فایل برای csv.writer که خط نوشته‌شده را برمی‌گرداند"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    """خطوط CSV (با BOM برای نمایش درست فارسی در Excel)"""
+    writer = csv.writer(_Echo())
+    yield '﻿' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _StreamBuffer:
+    """بافر فقط‌نوشتنی و غیرقابل seek برای zipfile - بایت‌های نوشته‌شده را تحویل می‌دهد"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        elif value is None or value == '':
+            cells.append('<c/>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def stream_xlsx(headers, rows, flush_every=500):
+    """
+    تولید تدریجی فایل XLSX (یک شیت، راست‌به‌چپ، رشته‌های inline)
+    هر flush_every ردیف، بایت‌های فشرده‌شده تا آن لحظه تحویل داده می‌شوند
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as package:
+        for name, content in XLSX_STATIC_PARTS.items():
+            package.writestr(name, content)
+        yield buffer.pop()
+
+        with package.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView rightToLeft="1" workbookViewId="0"/></sheetViews>'
+                '<sheetData>' + _xlsx_row(headers)
+            ).encode('utf-8'))
+            for index, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if index % flush_every == 0:
+                    data = buffer.pop()
+                    if data:
+                        yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.pop()
@@ -0,0 +1,891 @@
+"""
+موتور گزارش‌گیری مالی - محاسبه تمام سری‌های نمودار مالی در یک گذر
+Financial reporting engine - computes every chart series in a single pass
+
+به جای اجرای یک aggregate جداگانه برای هر ماه و هر سری، برای هر جدول منبع
+فقط یک کوئری گروه‌بندی‌شده بر اساس روز اجرا می‌شود و جمع‌های روزانه در پایتون
+به بازه‌های زمانی (ماه شمسی) تخصیص داده می‌شوند. تعداد کوئری‌ها به طول بازه
+زمانی وابسته نیست.
+"""
+import hashlib
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import jdatetime
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Income, Expense, Loan, LoanBuyer, LoanCreditor, LoanCreditorInstallment,
+    FinancialMonthlyRollup,
+)
+from .financial_snapshots import invalidate_financial_snapshots
+from vekalet.models import Consultation, CaseFile
+from registry.models import TradeAcquisition, TradePartnership, Company, License
+
+
+JALALI_MONTH_NAMES = [
+    'فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
+    'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند',
+]
+
+# ============================================
+# بازه‌های زمانی (Buckets)
+# ============================================
+
+def to_gregorian(value):
+    """تبدیل تاریخ شمسی/میلادی به datetime.date میلادی"""
+    if value is None:
+        return None
+    if isinstance(value, (jdatetime.datetime, jdatetime.date)):
+        value = value.togregorian()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def jalali_month_start(day):
+    """اولین روز ماه شمسی شامل تاریخ داده‌شده"""
+    jday = jdatetime.date.fromgregorian(date=day)
+    return jdatetime.date(jday.year, jday.month, 1)
+
+
+def next_jalali_month(jday):
+    """اولین روز ماه شمسی بعدی"""
+    if jday.month == 12:
+        return jdatetime.date(jday.year + 1, 1, 1)
+    return jdatetime.date(jday.year, jday.month + 1, 1)
+
+
+def jalali_month_buckets(count=12, today=None):
+    """
+    بازه‌های ماهانه شمسی برای count ماه اخیر (شامل ماه جاری)
+    Returns a list of (label, start, end) tuples with gregorian half-open bounds
+    """
+    today = today or date.today()
+    month_start = jalali_month_start(today)
+    starts = [month_start]
+    for _ in range(count - 1):
+        previous_day = starts[0].togregorian() - timedelta(days=1)
+        starts.insert(0, jalali_month_start(previous_day))
+
+    buckets = []
+    for jstart in starts:
+        label = f'{JALALI_MONTH_NAMES[jstart.month - 1]} {jstart.year}'
+        buckets.append((label, jstart.togregorian(), next_jalali_month(jstart).togregorian()))
+    return buckets
+
+
+JALALI_SEASON_NAMES = ['بهار', 'تابستان', 'پاییز', 'زمستان']
+
+# دقت‌های زمانی قابل استفاده در گزارش‌ها (سال مالی = سال شمسی از فروردین)
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+# سقف تعداد بازه‌های یک گزارش (جلوگیری از درخواست‌های بسیار سنگین)
+MAX_REPORT_BUCKETS = 1000
+
+
+def parse_report_date(value):
+    """
+    تبدیل رشته تاریخ (شمسی مثل 1405/01/15 یا میلادی مثل 2026-04-04) به date میلادی
+    سال‌های کمتر از 1700 شمسی در نظر گرفته می‌شوند
+    """
+    parts = value.strip().replace('/', '-').split('-')
+    if len(parts) != 3:
+        raise ValueError(f'تاریخ نامعتبر: {value}')
+    year, month, day = (int(part) for part in parts)
+    if year < 1700:
+        return jdatetime.date(year, month, day).togregorian()
+    return date(year, month, day)
+
+
+def _period_start(jday, granularity):
+    """ابتدای دوره شمسی شامل تاریخ داده‌شده"""
+    if granularity == 'day':
+        return jday
+    if granularity == 'week':
+        # هفته از شنبه شروع می‌شود (weekday شنبه = 0)
+        return jday - timedelta(days=jday.weekday())
+    if granularity == 'month':
+        return jdatetime.date(jday.year, jday.month, 1)
+    if granularity == 'quarter':
+        return jdatetime.date(jday.year, (jday.month - 1) // 3 * 3 + 1, 1)
+    return jdatetime.date(jday.year, 1, 1)
+
+
+def _next_period(jstart, granularity):
+    """ابتدای دوره شمسی بعدی"""
+    if granularity == 'day':
+        return jstart + timedelta(days=1)
+    if granularity == 'week':
+        return jstart + timedelta(days=7)
+    if granularity == 'month':
+        return next_jalali_month(jstart)
+    if granularity == 'quarter':
+        for _ in range(3):
+            jstart = next_jalali_month(jstart)
+        return jstart
+    return jdatetime.date(jstart.year + 1, 1, 1)
+
+
+def _period_label(jstart, granularity):
+    if granularity == 'day':
+        return jstart.strftime('%Y/%m/%d')
+    if granularity == 'week':
+        return f"هفته {jstart.strftime('%Y/%m/%d')}"
+    if granularity == 'month':
+        return f'{JALALI_MONTH_NAMES[jstart.month - 1]} {jstart.year}'
+    if granularity == 'quarter':
+        return f'{JALALI_SEASON_NAMES[(jstart.month - 1) // 3]} {jstart.year}'
+    return f'سال مالی {jstart.year}'
+
+
+def period_buckets(start, end, granularity='month'):
+    """
+    بازه‌های شمسی بین دو تاریخ میلادی (end شامل می‌شود) با دقت داده‌شده
+    بازه اول و آخر به start و end محدود می‌شوند
+    Returns a list of (label, start, end) tuples with gregorian half-open bounds
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'دقت زمانی نامعتبر: {granularity}')
+    if end < start:
+        raise ValueError('تاریخ پایان نباید قبل از تاریخ شروع باشد')
+
+    range_end = end + timedelta(days=1)
+    jstart = _period_start(jdatetime.date.fromgregorian(date=start), granularity)
+    buckets = []
+    while jstart.togregorian() < range_end:
+        if len(buckets) >= MAX_REPORT_BUCKETS:
+            raise ValueError(f'تعداد بازه‌ها بیش از {MAX_REPORT_BUCKETS} است؛ دقت زمانی بزرگ‌تری انتخاب کنید')
+        jnext = _next_period(jstart, granularity)
+        buckets.append((
+            _period_label(jstart, granularity),
+            max(jstart.togregorian(), start),
+            min(jnext.togregorian(), range_end),
+        ))
+        jstart = jnext
+    return buckets
+
+
+def is_month_aligned(buckets):
+    """آیا همه بازه‌ها از ابتدای ماه شمسی شروع و در ابتدای ماه شمسی تمام می‌شوند"""
+    return all(
+        jdatetime.date.fromgregorian(date=day).day == 1
+        for _, start, end in buckets for day in (start, end)
+    )
+
+
+# ============================================
+# منابع داده (Source tables)
+# ============================================
+
+# هر منبع یک متریک تولید می‌کند و با یک کوئری گروه‌بندی‌شده خوانده می‌شود
+# metric: نام سری / model: مدل منبع / queryset: فیلتر پایه
+# date_field: فیلد تاریخ گروه‌بندی / is_datetime: آیا فیلد تاریخ-زمان است
+# branch_field: مسیر شعبه (None برای مدل‌های بدون شعبه) / aggregate: عبارت جمع
+FinancialSource = namedtuple(
+    'FinancialSource',
+    'metric model queryset date_field is_datetime branch_field aggregate',
+)
+
+# درآمد شناسایی‌شده هر مشاوره: پرداخت‌شده/رایگان با هزینه کامل و جزئی با مبلغ پرداخت‌شده
+CONSULTATION_INCOME = Case(
+    When(payment_status__in=['paid', 'free'], then=F('consultation_fee')),
+    When(payment_status='partial', then=F('amount_paid')),
+    default=Value(0),
+    output_field=DecimalField(max_digits=15, decimal_places=2),
+)
+
+FINANCIAL_SOURCES = (
+    FinancialSource(
+        'base_income', Income, lambda: Income.objects.all(),
+        'registration_date', False, 'branch', Sum('amount'),
+    ),
+    FinancialSource(
+        'consultation_income', Consultation, lambda: Consultation.objects.all(),
+        'consultation_date', True, None, Sum(CONSULTATION_INCOME),
+    ),
+    FinancialSource(
+        'case_income', CaseFile, lambda: CaseFile.objects.all(),
+        'case_start_date', False, None, Sum('contract_amount'),
+    ),
+    FinancialSource(
+        'registry_trade_acquisition', TradeAcquisition, lambda: TradeAcquisition.objects.all(),
+        'created_at', True, None, Sum('amount_received'),
+    ),
+    FinancialSource(
+        'registry_trade_partnership', TradePartnership, lambda: TradePartnership.objects.all(),
+        'created_at', True, None, Sum('amount_received'),
+    ),
+    FinancialSource(
+        'registry_company', Company, lambda: Company.objects.all(),
+        'created_at', True, None, Sum('amount_received'),
+    ),
+    FinancialSource(
+        'registry_license', License, lambda: License.objects.all(),
+        'created_at', True, None, Sum('amount_received'),
+    ),
+    FinancialSource(
+        'expense', Expense, lambda: Expense.objects.all(),
+        'registration_date', False, 'branch', Sum('amount'),
+    ),
+    # بستانکاری پرداخت‌شده بر اساس تاریخ پرداخت
+    FinancialSource(
+        'creditor_paid', LoanCreditorInstallment,
+        lambda: LoanCreditorInstallment.objects.filter(payment_date__isnull=False),
+        'payment_date', False, 'creditor__branch', Sum('paid_amount'),
+    ),
+    # بستانکاری معوق بر اساس تاریخ ایجاد
+    FinancialSource(
+        'creditor_unpaid', LoanCreditorInstallment,
+        lambda: LoanCreditorInstallment.objects.filter(payment_date__isnull=True),
+        'created_at', True, 'creditor__branch', Sum('paid_amount'),
+    ),
+    # سود فروش وام: قیمت فروش - قیمت خرید (فقط خریداران تکمیل‌شده)
+    FinancialSource(
+        'loan_sale_profit', LoanBuyer,
+        lambda: LoanBuyer.objects.profitable(),
+        'created_at', True, 'loan__branch', Sum('profit'),
+    ),
+)
+
+REGISTRY_SERIES = tuple(source.metric for source in FINANCIAL_SOURCES
+                        if source.metric.startswith('registry_'))
+
+# سری‌های خروجی گزارش و متریک‌های منبع مورد نیاز هر کدام
+INCOME_METRICS = ('base_income', 'consultation_income', 'case_income') + REGISTRY_SERIES
+SERIES_METRICS = {
+    'income': INCOME_METRICS,
+    'consultation_income': ('consultation_income',),
+    'case_income': ('case_income',),
+    **{name: (name,) for name in REGISTRY_SERIES},
+    'expense': ('expense',),
+    'creditor_paid': ('creditor_paid',),
+    'creditor_unpaid': ('creditor_unpaid',),
+    'loan_sale_profit': ('loan_sale_profit',),
+    'net_profit': INCOME_METRICS + ('loan_sale_profit', 'expense', 'creditor_paid'),
+}
+FINANCIAL_SERIES = tuple(SERIES_METRICS)
+
+
+def _day_bounds(source, start, end):
+    """تبدیل بازه نیمه‌باز روزها به مقادیر قابل مقایسه با فیلد تاریخ منبع"""
+    if source.is_datetime:
+        return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+    return start, end
+
+
+def _grouped_totals(source, start=None, end=None, by_branch=False, branch=None):
+    """
+    اجرای یک کوئری گروه‌بندی‌شده بر اساس روز (و در صورت نیاز شعبه)
+    Run one GROUP BY day (and optionally branch) query for a source table
+    """
+    queryset = source.queryset().order_by()
+    if branch is not None:
+        queryset = queryset.filter(**{source.branch_field: branch})
+    if start is not None:
+        lower, upper = _day_bounds(source, start, end)
+        queryset = queryset.filter(**{
+            f'{source.date_field}__gte': lower,
+            f'{source.date_field}__lt': upper,
+        })
+    else:
+        queryset = queryset.filter(**{f'{source.date_field}__isnull': False})
+
+    day_expr = TruncDate(source.date_field) if source.is_datetime else F(source.date_field)
+    group_by = {'report_day': day_expr}
+    if by_branch and source.branch_field:
+        group_by['report_branch'] = F(source.branch_field)
+
+    return queryset.annotate(**group_by).values(*group_by).annotate(total=source.aggregate)
+
+
+# ============================================
+# محاسبه سری‌ها
+# ============================================
+
+def _empty_series(buckets):
+    return [Decimal('0')] * len(buckets)
+
+
+def _report_sources(metrics, branch):
+    """منابع مورد نیاز متریک‌ها؛ با فیلتر شعبه، منابع بدون شعبه کنار گذاشته می‌شوند"""
+    return [source for source in FINANCIAL_SOURCES
+            if source.metric in metrics and (branch is None or source.branch_field)]
+
+
+def _live_totals(buckets, metrics, branch=None, by_branch=False):
+    """
+    جمع متریک‌ها برای هر بازه مستقیماً از جداول منبع
+    با by_branch خروجی به تفکیک شعبه است: {شناسه شعبه: {متریک: سری}}
+    """
+    starts = [bucket[1] for bucket in buckets]
+    range_start = buckets[0][1]
+    range_end = buckets[-1][2]
+
+    grouped = {}
+    for source in _report_sources(metrics, branch):
+        for row in _grouped_totals(source, range_start, range_end, by_branch=by_branch, branch=branch):
+            day = to_gregorian(row['report_day'])
+            index = bisect_right(starts, day) - 1
+            if index < 0 or day >= buckets[index][2] or not row['total']:
+                continue
+            totals = grouped.setdefault(row.get('report_branch'), {})
+            totals.setdefault(source.metric, _empty_series(buckets))[index] += row['total']
+    return grouped if by_branch else grouped.get(None, {})
+
+
+def _rollup_totals(buckets, metrics, branch=None, by_branch=False):
+    """جمع متریک‌ها برای بازه‌های هم‌تراز با ماه شمسی از جدول تجمیع ماهانه"""
+    bucket_index = {}
+    for index, (_, start, end) in enumerate(buckets):
+        jmonth = jdatetime.date.fromgregorian(date=start)
+        while jmonth.togregorian() < end:
+            bucket_index[(jmonth.year, jmonth.month)] = index
+            jmonth = next_jalali_month(jmonth)
+
+    sources = _report_sources(metrics, branch)
+    years = [year for year, _ in bucket_index]
+    rows = (
+        FinancialMonthlyRollup.objects
+        .filter(year__gte=min(years), year__lte=max(years),
+                metric__in=[source.metric for source in sources])
+    )
+    if branch is not None:
+        rows = rows.filter(branch_id=branch)
+    group_by = ('year', 'month', 'metric') + (('branch_id',) if by_branch else ())
+    rows = rows.values(*group_by).annotate(total=Sum('amount')).order_by()
+
+    grouped = {}
+    for row in rows:
+        index = bucket_index.get((row['year'], row['month']))
+        if index is None or not row['total']:
+            continue
+        totals = grouped.setdefault(row.get('branch_id'), {})
+        totals.setdefault(row['metric'], _empty_series(buckets))[index] += row['total']
+    return grouped if by_branch else grouped.get(None, {})
+
+
+def _derive_series(totals, names, buckets):
+    """ساخت سری‌های خروجی (شامل سری‌های مشتق درآمد کل و سود خالص) از جمع متریک‌ها"""
+    def metric(name):
+        return totals.get(name) or _empty_series(buckets)
+
+    def total_income():
+        return [int(sum(values)) for values in zip(*(metric(name) for name in INCOME_METRICS))]
+
+    result = {}
+    for name in names:
+        if name == 'income':
+            result[name] = total_income()
+        elif name == 'net_profit':
+            # سود خالص (شامل سود فروش وام)
+            result[name] = [
+                income + int(loan_profit) - int(expense) - int(creditor_paid)
+                for income, loan_profit, expense, creditor_paid in zip(
+                    total_income(), metric('loan_sale_profit'), metric('expense'), metric('creditor_paid')
+                )
+            ]
+        else:
+            result[name] = [int(value) for value in metric(name)]
+    return result
+
+
+def compute_financial_series(buckets, from_rollups=False, series=None, branch=None):
+    """
+    محاسبه سری‌های مالی برای تمام بازه‌ها با یک کوئری برای هر جدول منبع
+    Compute the requested financial series for all buckets at once
+
+    buckets: لیست (label, start, end) با بازه نیمه‌باز [start, end)
+    from_rollups: خواندن از جدول تجمیع ماهانه (فقط برای بازه‌های هم‌تراز با ماه شمسی)
+    series: نام سری‌های مورد نیاز (پیش‌فرض: همه) - فقط جداول منبع همین سری‌ها خوانده می‌شوند
+    branch: شناسه شعبه؛ سری‌های بدون شعبه (مشاوره، پرونده، ثبت) در این حالت صفر هستند
+    خروجی: dict از نام سری به لیست اعداد صحیح (یک عدد برای هر بازه)
+    """
+    names = tuple(series or FINANCIAL_SERIES)
+    metrics = {metric for name in names for metric in SERIES_METRICS[name]}
+    if from_rollups:
+        totals = _rollup_totals(buckets, metrics, branch)
+    else:
+        totals = _live_totals(buckets, metrics, branch)
+    return _derive_series(totals, names, buckets)
+
+
+def compute_financial_series_by_branch(buckets, from_rollups=False, series=None):
+    """
+    محاسبه سری‌های مالی به تفکیک شعبه با یک کوئری GROUP BY (روز، شعبه) برای هر جدول منبع
+    (یا یک کوئری GROUP BY (ماه، شعبه) روی جدول تجمیع) - مستقل از تعداد شعب
+    خروجی: dict از شناسه شعبه به dict سری‌ها؛ کلید None برای رکوردهای بدون شعبه
+    (از جمله تمام درآمدهای مشاوره، پرونده و ثبت که شعبه ندارند)
+    """
+    names = tuple(series or FINANCIAL_SERIES)
+    metrics = {metric for name in names for metric in SERIES_METRICS[name]}
+    if from_rollups:
+        grouped = _rollup_totals(buckets, metrics, by_branch=True)
+    else:
+        grouped = _live_totals(buckets, metrics, by_branch=True)
+    return {branch_id: _derive_series(totals, names, buckets) for branch_id, totals in grouped.items()}
+
+
+def budget_series(buckets, monthly_budget):
+    """
+    بودجه هر بازه بر اساس بودجه ماهانه شعبه
+    برای بازه‌های کوتاه‌تر یا ناقص، بودجه به نسبت روزهای پوشش‌داده‌شده از هر ماه شمسی تقسیم می‌شود
+    """
+    if not monthly_budget:
+        return [0] * len(buckets)
+    result = []
+    for _, start, end in buckets:
+        amount = Decimal('0')
+        jmonth = jalali_month_start(start)
+        while jmonth.togregorian() < end:
+            month_start, month_end = jmonth.togregorian(), next_jalali_month(jmonth).togregorian()
+            covered = (min(end, month_end) - max(start, month_start)).days
+            amount += monthly_budget * covered / (month_end - month_start).days
+            jmonth = next_jalali_month(jmonth)
+        result.append(int(amount))
+    return result
+
+
+# ============================================
+# داده نمودار مالی (Chart payload)
+# ============================================
+
+def financial_chart_payload(buckets, branch=None):
+    """ساخت داده‌های کامل نمودار مالی (پاسخ financial_chart_api) برای بازه‌های داده‌شده"""
+    labels = [label for label, _, _ in buckets]
+    series = compute_financial_series(buckets, from_rollups=settings.FINANCIAL_ROLLUPS_ENABLED, branch=branch)
+
+    income_data = series['income']
+    consultation_income_data = series['consultation_income']
+    case_income_data = series['case_income']
+    registry_trade_acquisition_income_data = series['registry_trade_acquisition']  # درآمد بازرگانی اخذ
+    registry_trade_partnership_income_data = series['registry_trade_partnership']  # درآمد بازرگانی مشارکتی
+    registry_company_income_data = series['registry_company']  # درآمد ثبت شرکت
+    registry_license_income_data = series['registry_license']  # درآمد مجوزها
+    expense_data = series['expense']
+    creditor_paid_data = series['creditor_paid']
+    creditor_unpaid_data = series['creditor_unpaid']
+    loan_sale_profit_data = series['loan_sale_profit']  # سود فروش وام
+    net_profit_data = series['net_profit']
+
+    # جمع کل 12 ماه
+    total_income_12m = sum(income_data)
+    total_consultation_income_12m = sum(consultation_income_data)
+    total_case_income_12m = sum(case_income_data)
+    total_registry_trade_acquisition_12m = sum(registry_trade_acquisition_income_data)
+    total_registry_trade_partnership_12m = sum(registry_trade_partnership_income_data)
+    total_registry_company_12m = sum(registry_company_income_data)
+    total_registry_license_12m = sum(registry_license_income_data)
+    total_expense_12m = sum(expense_data)
+    total_creditor_paid_12m = sum(creditor_paid_data)
+    total_creditor_unpaid_12m = sum(creditor_unpaid_data)
+    total_loan_sale_profit_12m = sum(loan_sale_profit_data)
+    total_net_profit_12m = sum(net_profit_data)
+
+    return {
+        'summary': {
+            'total_income': total_income_12m,
+            'total_consultation_income': total_consultation_income_12m,
+            'total_case_income': total_case_income_12m,
+            'total_registry_trade_acquisition': total_registry_trade_acquisition_12m,
+            'total_registry_trade_partnership': total_registry_trade_partnership_12m,
+            'total_registry_company': total_registry_company_12m,
+            'total_registry_license': total_registry_license_12m,
+            'total_expense': total_expense_12m,
+            'total_creditor_paid': total_creditor_paid_12m,
+            'total_creditor_unpaid': total_creditor_unpaid_12m,
+            'total_loan_sale_profit': total_loan_sale_profit_12m,
+            'net_profit': total_net_profit_12m,
+            'period': '12 ماه اخیر'
+        },
+        'labels': labels,
+        'datasets': [
+            {
+                'label': 'درآمدها (کل)',
+                'data': income_data,
+                'borderColor': 'rgba(46, 204, 113, 1)',
+                'backgroundColor': 'rgba(46, 204, 113, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': True,
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            },
+            {
+                'label': 'درآمد مشاورات',
+                'data': consultation_income_data,
+                'borderColor': 'rgba(52, 211, 153, 1)',
+                'backgroundColor': 'rgba(52, 211, 153, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': False,
+                'pointRadius': 3,
+                'pointHoverRadius': 5,
+                'borderDash': [5, 5]
+            },
+            {
+                'label': 'درآمد پرونده‌ها',
+                'data': case_income_data,
+                'borderColor': 'rgba(34, 197, 94, 1)',
+                'backgroundColor': 'rgba(34, 197, 94, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': False,
+                'pointRadius': 3,
+                'pointHoverRadius': 5,
+                'borderDash': [5, 5]
+            },
+            {
+                'label': 'درآمد بازرگانی اخذ',
+                'data': registry_trade_acquisition_income_data,
+                'borderColor': 'rgba(230, 126, 34, 1)',
+                'backgroundColor': 'rgba(230, 126, 34, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': False,
+                'pointRadius': 3,
+                'pointHoverRadius': 5,
+                'borderDash': [5, 5]
+            },
+            {
+                'label': 'درآمد بازرگانی مشارکتی',
+                'data': registry_trade_partnership_income_data,
+                'borderColor': 'rgba(189, 195, 199, 1)',
+                'backgroundColor': 'rgba(189, 195, 199, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': False,
+                'pointRadius': 3,
+                'pointHoverRadius': 5,
+                'borderDash': [5, 5]
+            },
+            {
+                'label': 'درآمد شرکت‌ها',
+                'data': registry_company_income_data,
+                'borderColor': 'rgba(192, 57, 43, 1)',
+                'backgroundColor': 'rgba(192, 57, 43, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': False,
+                'pointRadius': 3,
+                'pointHoverRadius': 5,
+                'borderDash': [5, 5]
+            },
+            {
+                'label': 'درآمد مجوزها',
+                'data': registry_license_income_data,
+                'borderColor': 'rgba(127, 140, 141, 1)',
+                'backgroundColor': 'rgba(127, 140, 141, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': False,
+                'pointRadius': 3,
+                'pointHoverRadius': 5,
+                'borderDash': [5, 5]
+            },
+            {
+                'label': 'هزینه‌ها',
+                'data': expense_data,
+                'borderColor': 'rgba(231, 76, 60, 1)',
+                'backgroundColor': 'rgba(231, 76, 60, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': True,
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            },
+            {
+                'label': 'بستانکاری پرداخت‌شده',
+                'data': creditor_paid_data,
+                'borderColor': 'rgba(52, 152, 219, 1)',
+                'backgroundColor': 'rgba(52, 152, 219, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': True,
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            },
+            {
+                'label': 'بستانکاری معوق',
+                'data': creditor_unpaid_data,
+                'borderColor': 'rgba(241, 196, 15, 1)',
+                'backgroundColor': 'rgba(241, 196, 15, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': True,
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            },
+            {
+                'label': 'سود فروش وام',
+                'data': loan_sale_profit_data,
+                'borderColor': 'rgba(155, 89, 182, 1)',
+                'backgroundColor': 'rgba(155, 89, 182, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': True,
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            },
+            {
+                'label': 'سود خالص',
+                'data': net_profit_data,
+                'borderColor': 'rgba(26, 188, 156, 1)',
+                'backgroundColor': 'rgba(26, 188, 156, 0.1)',
+                'borderWidth': 2,
+                'tension': 0.3,
+                'fill': True,
+                'pointRadius': 4,
+                'pointHoverRadius': 6
+            },
+        ]
+    }
+
+
+# ============================================
+# تجمیع ماهانه (Financial Monthly Rollup)
+# ============================================
+
+def _month_key(value):
+    """(سال، ماه) شمسی برای یک تاریخ یا تاریخ-زمان"""
+    day = to_gregorian(value)
+    if day is None:
+        return None
+    jday = jdatetime.date.fromgregorian(date=day)
+    return jday.year, jday.month
+
+
+def _cells_from_rows(model, queryset):
+    """
+    استخراج خانه‌های تجمیع (metric, year, month, branch_id) برای ردیف‌های یک مدل
+    Collect the rollup cells touched by the given rows of a source model
+    """
+    sources = [source for source in FINANCIAL_SOURCES if source.model is model]
+    if not sources:
+        return set()
+
+    fields = set()
+    for source in sources:
+        fields.add(source.date_field)
+        if source.branch_field:
+            fields.add(source.branch_field)
+
+    cells = set()
+    for row in queryset.order_by().values(*fields):
+        for source in sources:
+            key = _month_key(row[source.date_field])
+            if key is None:
+                continue
+            branch_id = row[source.branch_field] if source.branch_field else None
+            cells.add((source.metric, key[0], key[1], branch_id))
+    return cells
+
+
+def rollup_cells_for(instance):
+    """خانه‌های تجمیعی که وضعیت فعلی رکورد در پایگاه داده در آن‌ها شمرده می‌شود"""
+    if instance.pk is None:
+        return set()
+    model = type(instance)
+    return _cells_from_rows(model, model.objects.filter(pk=instance.pk))
+
+
+def _cell_total(source, year, month, branch_id):
+    """محاسبه مجدد مقدار یک خانه تجمیع از جدول منبع"""
+    start = jdatetime.date(year, month, 1)
+    lower, upper = _day_bounds(source, start.togregorian(), next_jalali_month(start).togregorian())
+    queryset = source.queryset().filter(**{
+        f'{source.date_field}__gte': lower,
+        f'{source.date_field}__lt': upper,
+    })
+    if source.branch_field:
+        if branch_id is None:
+            queryset = queryset.filter(**{f'{source.branch_field}__isnull': True})
+        else:
+            queryset = queryset.filter(**{source.branch_field: branch_id})
+    return queryset.aggregate(total=source.aggregate)['total'] or Decimal('0')
+
+
+def _store_rollup(metric, year, month, branch_id, amount):
+    """
+    به‌روزرسانی درجا یا ایجاد ردیف تجمیع
+    کلید یکتا روی branch_key (بدون NULL) است، پس درج هم‌زمان یک خانه به IntegrityError می‌رسد
+    """
+    cell = FinancialMonthlyRollup.objects.filter(
+        year=year, month=month, metric=metric, branch_key=branch_id or 0,
+    )
+    updated = cell.update(amount=amount, updated_at=timezone.now())
+    if updated or not amount:
+        return
+    try:
+        with transaction.atomic():
+            FinancialMonthlyRollup.objects.create(
+                year=year, month=month, metric=metric, branch_id=branch_id, amount=amount,
+            )
+    except IntegrityError:
+        # درج هم‌زمان توسط درخواست دیگر - مقدار را بروزرسانی کن
+        cell.update(amount=amount, updated_at=timezone.now())
+
+
+def refresh_rollup_cells(cells):
+    """
+    محاسبه مجدد و ذخیره مجموعه‌ای از خانه‌های تجمیع
+    با FINANCIAL_ROLLUPS_ENABLED خاموش جدول تجمیع خوانده نمی‌شود و بروزرسانی نمی‌شود
+    (پس از روشن کردن، rebuild_financial_rollups اجرا شود) - فقط کش باطل می‌شود
+    """
+    if cells or not settings.FINANCIAL_ROLLUPS_ENABLED:
+        # هر تغییری در داده مالی، پاسخ‌های کش‌شده گزارش مالی را باطل می‌کند
+        invalidate_financial_cache()
+    if not settings.FINANCIAL_ROLLUPS_ENABLED:
+        return
+    sources = {source.metric: source for source in FINANCIAL_SOURCES}
+    for metric, year, month, branch_id in cells:
+        amount = _cell_total(sources[metric], year, month, branch_id)
+        _store_rollup(metric, year, month, branch_id, amount)
+
+
+def remember_rollup_cells(instance):
+    """ذخیره خانه‌های تجمیع وضعیت قبلی رکورد (در pre_save / pre_delete)"""
+    if not settings.FINANCIAL_ROLLUPS_ENABLED:
+        return
+    instance._financial_rollup_cells = rollup_cells_for(instance)
+
+
+def refresh_rollups_for(instance, deleted=False):
+    """بروزرسانی خانه‌های وضعیت قبلی و فعلی رکورد (در post_save / post_delete)"""
+    cells = set(getattr(instance, '_financial_rollup_cells', set()))
+    if not deleted and settings.FINANCIAL_ROLLUPS_ENABLED:
+        cells |= rollup_cells_for(instance)
+    refresh_rollup_cells(cells)
+
+
+# مدل‌هایی که تغییرشان متریک‌های رکوردهای وابسته را تغییر می‌دهد
+# مدل والد: (مدل وابسته، فیلد ارتباط، فیلدهای والد موثر در متریک)
+ROLLUP_DEPENDANTS = {
+    Loan: (LoanBuyer, 'loan', ('purchase_rate', 'branch_id')),
+    LoanCreditor: (LoanCreditorInstallment, 'creditor', ('branch_id',)),
+}
+
+
+def _dependant_cells(instance):
+    dependant_model, relation, _ = ROLLUP_DEPENDANTS[type(instance)]
+    return _cells_from_rows(dependant_model, dependant_model.objects.filter(**{relation: instance.pk}))
+
+
+def remember_dependant_rollup_cells(instance, update_fields=None):
+    """
+    اگر فیلدهای موثر والد (قیمت خرید وام / شعبه) تغییر کرده باشد،
+    خانه‌های فعلی رکوردهای وابسته را ذخیره کن
+    """
+    instance._financial_rollup_dependants = None
+    _, _, fields = ROLLUP_DEPENDANTS[type(instance)]
+    if instance.pk is None or not settings.FINANCIAL_ROLLUPS_ENABLED:
+        return
+    if update_fields is not None and not {field.replace('_id', '') for field in fields} & set(update_fields):
+        return
+    old = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    if old is None:
+        return
+    if any(old[field] != getattr(instance, field) for field in fields):
+        instance._financial_rollup_dependants = _dependant_cells(instance)
+
+
+def refresh_dependant_rollups(instance):
+    """بروزرسانی خانه‌های رکوردهای وابسته پس از تغییر والد"""
+    if not settings.FINANCIAL_ROLLUPS_ENABLED:
+        # قیمت خرید وام در سود فروش وام محاسبه زنده اثر دارد
+        invalidate_financial_cache()
+        return
+    cells = getattr(instance, '_financial_rollup_dependants', None)
+    if cells is None:
+        return
+    refresh_rollup_cells(cells | _dependant_cells(instance))
+
+
+def rebuild_financial_rollups():
+    """
+    بازسازی کامل جدول تجمیع ماهانه از جداول منبع
+    Full rebuild of the monthly rollup table; returns the number of rows written
+    """
+    amounts = {}
+    for source in FINANCIAL_SOURCES:
+        for row in _grouped_totals(source, by_branch=True):
+            key = _month_key(row['report_day'])
+            if key is None or not row['total']:
+                continue
+            cell = (source.metric, key[0], key[1], row.get('report_branch'))
+            amounts[cell] = amounts.get(cell, Decimal('0')) + row['total']
+
+    rollups = [
+        FinancialMonthlyRollup(
+            year=year, month=month, metric=metric, branch_id=branch_id, branch_key=branch_id or 0, amount=amount,
+        )
+        for (metric, year, month, branch_id), amount in amounts.items()
+    ]
+    with transaction.atomic():
+        FinancialMonthlyRollup.objects.all().delete()
+        FinancialMonthlyRollup.objects.bulk_create(rollups, batch_size=1000)
+        invalidate_financial_cache()
+    return len(rollups)
+
+
+# ============================================
+# کش پاسخ گزارش‌های مالی (Financial Report Cache)
+# ============================================
+# به جای حذف تک‌تک کلیدها، یک شماره نسخه در کش نگهداری می‌شود که جزئی از
+# تمام کلیدهای گزارش مالی است. با هر تغییر داده مالی نسخه افزایش می‌یابد و
+# کلیدهای قدیمی دیگر خوانده نمی‌شوند (و با TTL منقضی می‌شوند). این روش با
+# تمام backendهای کش جنگو (locmem، file-based، redis، ...) کار می‌کند.
+
+FINANCIAL_CACHE_VERSION_KEY = 'financial_reports:version'
+
+
+def financial_cache_enabled():
+    """
+    کش پاسخ‌ها و ETag مبتنی بر نسخه فقط با backend مشترک بین processها استفاده می‌شوند
+    نسخه در locmem مختص هر process است و باطل شدن آن در workerهای دیگر دیده نمی‌شود
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    return settings.DEBUG or not backend.endswith('.LocMemCache')
+
+
+def financial_cache_version():
+    """شماره نسخه فعلی داده‌های مالی در کش"""
+    version = cache.get(FINANCIAL_CACHE_VERSION_KEY)
+    if version is None:
+        # مقدار اولیه بر اساس زمان تا پس از حذف کلید نسخه، نسخه‌های قدیمی دوباره استفاده نشوند
+        cache.add(FINANCIAL_CACHE_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(FINANCIAL_CACHE_VERSION_KEY)
+    return version
+
+
+def financial_cache_key(name, scope, buckets):
+    """کلید کش یک گزارش مالی بر اساس نام گزارش، دامنه کاربر و بازه زمانی"""
+    start, end = buckets[0][1], buckets[-1][2]
+    # هش برای محدود ماندن طول کلید (سری‌های درخواستی می‌توانند طولانی باشند)
+    digest = hashlib.md5(f'{name}:{scope}:{start.isoformat()}:{end.isoformat()}'.encode()).hexdigest()
+    return f'financial_reports:{financial_cache_version()}:{digest}'
+
+
+def _bump_financial_cache_version():
+    try:
+        cache.incr(FINANCIAL_CACHE_VERSION_KEY)
+    except ValueError:
+        # کلید نسخه وجود ندارد - با مقدار جدید ساخته می‌شود
+        financial_cache_version()
+    invalidate_financial_snapshots()
+
+
+def invalidate_financial_cache():
+    """
+    باطل کردن تمام پاسخ‌های کش‌شده و اسنپ‌شات‌های گزارش مالی پس از commit تراکنش جاری
+    (تا درخواست هم‌زمان داده قدیمی را با نسخه جدید کش نکند)
+    """
+    transaction.on_commit(_bump_financial_cache_version)
@@ -0,0 +1,138 @@
+"""
+اسنپ‌شات‌های از پیش محاسبه‌شده نمودار مالی
+Precomputed financial chart snapshots stored on disk as gzip JSON
+
+دستور build_financial_snapshots (از طریق cron) داده کامل نمودار مالی را برای هر
+دامنه (کل سازمان و هر شعبه) محاسبه و در یک فایل نسخه‌دار فشرده ذخیره می‌کند.
+نوشتن فایل اتمیک است (فایل موقت + os.replace) تا درخواست‌ها هرگز فایل نیمه‌کاره
+نخوانند. financial_chart_api آخرین اسنپ‌شات تازه را مستقیماً از دیسک استریم می‌کند.
+
+نسخه داده‌های مالی (financial_cache_version) هنگام ساخت در نام فایل ثبت می‌شود و
+اسنپ‌شاتی که نسخه‌اش با نسخه فعلی برابر نباشد کهنه است؛ invalidate_financial_cache
+پس از هر تغییر مالی فایل‌های موجود را هم حذف می‌کند.
+"""
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+SNAPSHOT_SUFFIX = '.json.gz'
+SNAPSHOT_CHUNK_SIZE = 64 * 1024
+
+
+def scope_name(branch=None):
+    """نام دامنه اسنپ‌شات: global برای کل سازمان یا branch-<id> برای هر شعبه"""
+    return 'global' if branch is None else f'branch-{branch}'
+
+
+def _scope_dir(scope):
+    return Path(settings.FINANCIAL_SNAPSHOT_DIR) / scope
+
+
+def _snapshot_files(scope):
+    """فایل‌های اسنپ‌شات یک دامنه - مرتب از قدیمی به جدید"""
+    directory = _scope_dir(scope)
+    if not directory.is_dir():
+        return []
+    return sorted(path for path in directory.iterdir() if path.name.endswith(SNAPSHOT_SUFFIX))
+
+
+def write_snapshot(scope, window_start, payload, version, keep=3):
+    """
+    ذخیره اتمیک اسنپ‌شات جدید و حذف نسخه‌های قدیمی‌تر از keep
+    version: نسخه داده‌های مالی که payload از روی آن ساخته شده (پیش از محاسبه خوانده شود)
+    نام فایل: <شروع بازه>-<زمان ساخت به میلی‌ثانیه>-<نسخه داده>.json.gz (مرتب‌سازی نام = ترتیب نسخه)
+    """
+    directory = _scope_dir(scope)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f'{window_start:%Y%m%d}-{int(time.time() * 1000)}-{version}{SNAPSHOT_SUFFIX}'
+
+    body = json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as compressed:
+                compressed.write(body)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    for old in _snapshot_files(scope)[:-keep]:
+        try:
+            old.unlink()
+        except FileNotFoundError:
+            pass
+    return target
+
+
+def latest_snapshot(scope, window_start, version, max_age=None):
+    """
+    مسیر آخرین اسنپ‌شات تازه دامنه یا None
+    اسنپ‌شات کهنه است اگر برای بازه دیگری یا نسخه دیگری از داده‌های مالی ساخته شده
+    یا قدیمی‌تر از max_age ثانیه باشد
+    """
+    max_age = settings.FINANCIAL_SNAPSHOT_MAX_AGE if max_age is None else max_age
+    files = _snapshot_files(scope)
+    if not files:
+        return None
+    latest = files[-1]
+    # نام فایل: <شروع بازه>-<زمان ساخت>-<نسخه داده>
+    parts = latest.name[:-len(SNAPSHOT_SUFFIX)].split('-')
+    if len(parts) != 3 or parts[0] != f'{window_start:%Y%m%d}' or parts[2] != str(version):
+        return None
+    try:
+        age = time.time() - latest.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    return latest if age <= max_age else None
+
+
+def invalidate_financial_snapshots():
+    """حذف تمام اسنپ‌شات‌های موجود (پس از تغییر داده‌های مالی)"""
+    root = Path(settings.FINANCIAL_SNAPSHOT_DIR)
+    if not root.is_dir():
+        return
+    for directory in root.iterdir():
+        if not directory.is_dir():
+            continue
+        for path in _snapshot_files(directory.name):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _read_chunks(snapshot, raw):
+    with raw, snapshot:
+        while True:
+            chunk = snapshot.read(SNAPSHOT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def snapshot_response(request, path):
+    """
+    استریم اسنپ‌شات از دیسک؛ برای کلاینت‌های پشتیبان gzip همان فایل فشرده ارسال می‌شود
+    فایل پیش از ساخت پاسخ باز می‌شود تا حذف هم‌زمان نسخه‌های قدیمی مشکلی ایجاد نکند
+    """
+    accepts_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    raw = open(path, 'rb')
+    snapshot = raw if accepts_gzip else gzip.GzipFile(fileobj=raw, mode='rb')
+    response = StreamingHttpResponse(_read_chunks(snapshot, raw), content_type='application/json')
+    if accepts_gzip:
+        response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = str(os.fstat(raw.fileno()).st_size)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,72 @@
+"""
+پشتیبانی از هدر Idempotency-Key برای APIهای ثبت
+Idempotency-Key support for state-changing API endpoints
+
+پاسخ اولین درخواست هر کاربر با یک کلید در کش ذخیره می‌شود؛ تکرار همان درخواست
+(دوبار کلیک، تلاش مجدد پس از قطعی شبکه) بدون اجرای دوباره همان پاسخ را دریافت
+می‌کند. درخواست هم‌زمان با کلیدی که هنوز در حال پردازش است پاسخ 409 می‌گیرد.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+IDEMPOTENCY_TIMEOUT = 24 * 3600
+# قفل درخواست در حال پردازش (اگر process وسط کار از بین برود خودبه‌خود آزاد می‌شود)
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+MAX_KEY_LENGTH = 200
+PENDING = '__pending__'
+
+
+def idempotency_cache_key(user_id, path, key):
+    digest = hashlib.md5(f'{user_id}:{path}:{key}'.encode('utf-8')).hexdigest()
+    return f'idempotency:{digest}'
+
+
+def idempotent(view):
+    """
+    دکوراتور view: در صورت وجود هدر Idempotency-Key پاسخ را برای همان کاربر و کلید ذخیره
+    و در درخواست‌های تکراری بازپخش می‌کند (پاسخ‌های 5xx ذخیره نمی‌شوند)
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER, '').strip()
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({
+                'success': False,
+                'message': 'کلید Idempotency-Key نامعتبر است'
+            }, status=400)
+
+        cache_key = idempotency_cache_key(request.user.pk, request.path, key)
+        if not cache.add(cache_key, PENDING, IDEMPOTENCY_LOCK_TIMEOUT):
+            stored = cache.get(cache_key)
+            if stored is None or stored == PENDING:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'درخواست مشابه در حال پردازش است'
+                }, status=409)
+            response = HttpResponse(stored['content'], status=stored['status'], content_type=stored['content_type'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code < 500 and not response.streaming:
+            cache.set(cache_key, {
+                'status': response.status_code,
+                'content': response.content,
+                'content_type': response.get('Content-Type'),
+            }, IDEMPOTENCY_TIMEOUT)
+        else:
+            cache.delete(cache_key)
+        return response
+
+    return wrapper
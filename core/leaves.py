@@ -0,0 +1,340 @@
+"""
+همگام‌سازی مرخصی‌های تاییدشده با رکوردهای حضور و غیاب
+Materializes approved leaves into Attendance rows
+
+با تایید یک مرخصی روزانه، رکورد حضور همه روزهای کاری بازه آن با یک upsert
+دسته‌ای با وضعیت «مرخصی» ثبت می‌شود؛ مرخصی ساعتی مجموع دقایق مرخصی تاییدشده
+آن روز را در Attendance.leave_minutes رکورد موجود می‌نویسد (از ساعات کاری لازم آن
+روز کسر می‌شود). مرخصی ساعتی رکورد جدیدی نمی‌سازد؛ رکوردی که بعداً ساخته شود
+(ورود، همگام‌سازی آفلاین، create_daily_attendance) دقایق را از hourly_leave_minutes
+می‌خواند. لغو/رد یا حذف مرخصی تاییدشده و ویرایش بازه آن همین تغییرات را برمی‌گرداند.
+
+دفتر مانده مرخصی (LeaveBalance) به ازای کارمند، سال شمسی و نوع مرخصی با همان
+تغییر به صورت افزایشی (F expression) بروزرسانی می‌شود؛ درخواست جدید با یک کوئری
+روی ایندکس (employee, start_date, end_date) و یک خواندن از دفتر اعتبارسنجی می‌شود.
+Leave.save و Leave.delete این توابع را در همان تراکنش فراخوانی می‌کنند.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+import jdatetime
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, PositiveIntegerField, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .models import Attendance, Leave, LeaveBalance
+from .attendance_summaries import refresh_attendance_summaries, summary_cells
+from .financial_reports import to_gregorian
+from .work_schedule import get_work_schedule, is_work_day
+
+# انواع مرخصی دارای سقف سالانه (استحقاق از تنظیمات شرکت)
+ENTITLED_LEAVE_TYPES = ('annual',)
+# وضعیت‌هایی که در بررسی هم‌پوشانی درخواست جدید لحاظ می‌شوند
+ACTIVE_LEAVE_STATUSES = ('pending', 'approved')
+# سهم یک روز کامل برای مرخصی نیم‌روز
+HALF_DAY_FRACTION = 0.5
+
+# وضعیت مرخصی در لحظه ذخیره (فقط فیلدهایی که روی حضور و مانده مرخصی اثر دارند)
+LeaveSpan = namedtuple(
+    'LeaveSpan',
+    'pk employee_id status leave_type duration_type start_date end_date date start_time end_time duration_hours',
+)
+
+
+def leave_span(leave):
+    """snapshot مرخصی با تاریخ‌های میلادی (None برای مرخصی ناموجود)"""
+    if leave is None:
+        return None
+    return LeaveSpan(
+        leave.pk, leave.employee_id, leave.status, leave.leave_type, leave.duration_type,
+        to_gregorian(leave.start_date), to_gregorian(leave.end_date), to_gregorian(leave.date),
+        leave.start_time, leave.end_time, leave.duration_hours,
+    )
+
+
+def span_days(span):
+    """روزهای کاری (باز در جدول کاری) یک مرخصی روزانه"""
+    if not span.start_date or not span.end_date or span.end_date < span.start_date:
+        return []
+    days = (span.start_date + timedelta(days=offset) for offset in range((span.end_date - span.start_date).days + 1))
+    return [day for day in days if is_work_day(day)]
+
+
+def _upsert_attendance(rows, update_fields):
+    """upsert دسته‌ای بر اساس unique (employee, date)؛ MySQL هدف برخورد را نمی‌پذیرد"""
+    unique_fields = ['employee', 'date'] if connection.features.supports_update_conflicts_with_target else None
+    Attendance.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=list(update_fields) + ['updated_at'],
+    )
+
+
+def _apply_daily(span):
+    days = span_days(span)
+    if days:
+        _upsert_attendance(
+            [Attendance(employee_id=span.employee_id, date=day, status='leave') for day in days],
+            ['status'],
+        )
+    return days
+
+
+def _revoke_daily(span):
+    """بازگرداندن وضعیت روزهایی که مرخصی تاییدشده دیگری آن‌ها را پوشش نمی‌دهد"""
+    days = span_days(span)
+    if not days:
+        return days
+    covered = set()
+    for start, end in Leave.objects.filter(
+        employee_id=span.employee_id, status='approved', duration_type='daily',
+        start_date__lte=max(days), end_date__gte=min(days),
+    ).exclude(pk=span.pk).values_list('start_date', 'end_date'):
+        start, end = to_gregorian(start), to_gregorian(end)
+        covered.update(day for day in days if start <= day <= end)
+    released = [day for day in days if day not in covered]
+    if released:
+        Attendance.objects.filter(
+            employee_id=span.employee_id, date__in=released, status='leave',
+        ).update(
+            status=Case(When(check_in__isnull=False, then=Value('present')), default=Value('absent')),
+            updated_at=timezone.now(),
+        )
+    return released
+
+
+def hourly_leave_minutes(employee_ids, start, end):
+    """
+    دقایق مرخصی‌های ساعتی تاییدشده در بازه روزهای [start, end] (میلادی) - یک کوئری
+    employee_ids=None یعنی همه کارمندان
+    خروجی: {(employee_id, date): دقیقه} فقط برای روزهای دارای مرخصی
+    """
+    leaves = Leave.objects.filter(status='approved', duration_type='hourly', date__gte=start, date__lte=end)
+    if employee_ids is not None:
+        leaves = leaves.filter(employee_id__in=employee_ids)
+    rows = leaves.order_by().values('employee_id', 'date').annotate(total=Sum('duration_hours'))
+    return {
+        (row['employee_id'], to_gregorian(row['date'])): round((row['total'] or 0) * 60)
+        for row in rows
+    }
+
+
+def hourly_leave_minutes_expression(employee_id, day):
+    """
+    همان دقایق hourly_leave_minutes برای یک کارمند و روز به صورت زیرکوئری
+    برای مقداردهی leave_minutes در همان INSERT رکورد حضور (بدون کوئری جداگانه)
+    """
+    total = Leave.objects.filter(
+        employee_id=employee_id, date=day, status='approved', duration_type='hourly',
+    ).order_by().values('employee_id').annotate(total=Sum('duration_hours')).values('total')
+    return Cast(
+        Round(Coalesce(Subquery(total, output_field=FloatField()), Value(0.0)) * 60),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _refresh_hourly(span):
+    """نوشتن مجموع دقایق مرخصی‌های ساعتی تاییدشده آن روز در رکورد حضور موجود"""
+    if not span.date:
+        return []
+    minutes = hourly_leave_minutes([span.employee_id], span.date, span.date).get((span.employee_id, span.date), 0)
+    # رکورد جدید (مثلاً برای روز آینده) ساخته نمی‌شود؛ وضعیت پیش‌فرض آن «غایب» است
+    updated = Attendance.objects.filter(employee_id=span.employee_id, date=span.date).update(
+        leave_minutes=minutes, updated_at=timezone.now(),
+    )
+    if not updated:
+        return []
+    # روز کامل‌شده: اضافه‌کاری با ساعات لازم جدید دوباره محاسبه می‌شود
+    attendance = Attendance.objects.filter(
+        employee_id=span.employee_id, date=span.date, check_in__isnull=False, check_out__isnull=False,
+    ).first()
+    if attendance and attendance.calculate_work_duration():
+        attendance.save(update_fields=['work_duration', 'overtime_duration', 'status', 'updated_at'])
+    return [span.date]
+
+
+def sync_leave_attendance(previous, current):
+    """
+    اعمال تغییر وضعیت مرخصی روی رکوردهای حضور
+    previous/current: LeaveSpan قبل و بعد از ذخیره (None برای ایجاد/حذف)
+    """
+    old = previous if previous and previous.status == 'approved' else None
+    new = current if current and current.status == 'approved' else None
+    if old == new:
+        return
+
+    touched = set()
+    if old:
+        touched.update((old.employee_id, day) for day in (
+            _refresh_hourly(old) if old.duration_type == 'hourly' else _revoke_daily(old)
+        ))
+    if new:
+        touched.update((new.employee_id, day) for day in (
+            _refresh_hourly(new) if new.duration_type == 'hourly' else _apply_daily(new)
+        ))
+    # bulk_create و update سیگنال ندارند؛ خلاصه ماهانه مستقیماً بروزرسانی می‌شود
+    refresh_attendance_summaries({
+        cell for employee_id, day in touched for cell in summary_cells(employee_id, [day])
+    })
+
+
+# ============================================
+# دفتر مانده مرخصی (LeaveBalance)
+# ============================================
+
+def _jalali(day):
+    return jdatetime.date.fromgregorian(date=day)
+
+
+def leave_entitlement(leave_type):
+    """استحقاق سالانه یک نوع مرخصی (0 یعنی بدون سقف)"""
+    return get_work_schedule().annual_leave_days if leave_type in ENTITLED_LEAVE_TYPES else 0
+
+
+def leave_usage(span):
+    """مصرف یک مرخصی به تفکیک سال شمسی: {year: [روز، ساعت]}"""
+    usage = defaultdict(lambda: [0.0, 0.0])
+    if span.duration_type == 'hourly':
+        if span.date:
+            usage[_jalali(span.date).year][1] += span.duration_hours or 0
+    else:
+        weight = HALF_DAY_FRACTION if span.leave_type == 'half_day' else 1
+        for day in span_days(span):
+            usage[_jalali(day).year][0] += weight
+    return usage
+
+
+def remaining_days(entitlement_days, used_days, used_hours):
+    """مانده مرخصی بر حسب روز (ساعت‌ها با ساعات کاری استاندارد به روز تبدیل می‌شوند)"""
+    return entitlement_days - used_days - used_hours * 60 / get_work_schedule().standard_work_minutes
+
+
+def update_leave_balances(previous, current):
+    """
+    بروزرسانی افزایشی دفتر مانده مرخصی با تغییر وضعیت یک مرخصی
+    previous/current: LeaveSpan قبل و بعد از ذخیره (None برای ایجاد/حذف)
+    """
+    old = previous if previous and previous.status == 'approved' else None
+    new = current if current and current.status == 'approved' else None
+    if old == new:
+        return
+
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    for span, sign in ((old, -1), (new, 1)):
+        if span is None:
+            continue
+        for year, (days, hours) in leave_usage(span).items():
+            delta = deltas[(span.employee_id, year, span.leave_type)]
+            delta[0] += sign * days
+            delta[1] += sign * hours
+
+    now = timezone.now()
+    for (employee_id, year, leave_type), (days, hours) in deltas.items():
+        if not days and not hours:
+            continue
+        balance, _ = LeaveBalance.objects.get_or_create(
+            employee_id=employee_id, year=year, leave_type=leave_type,
+            defaults={'entitlement_days': leave_entitlement(leave_type)},
+        )
+        LeaveBalance.objects.filter(pk=balance.pk).update(
+            used_days=F('used_days') + days, used_hours=F('used_hours') + hours, updated_at=now,
+        )
+
+
+def overlapping_leaves(span):
+    """مرخصی‌های در انتظار یا تاییدشده کارمند که با بازه درخواست هم‌پوشانی دارند"""
+    if span.duration_type == 'hourly':
+        day = _jalali(span.date)
+        overlap = (
+            Q(duration_type='daily', start_date__lte=day, end_date__gte=day)
+            | Q(duration_type='hourly', date=day, start_time__lt=span.end_time, end_time__gt=span.start_time)
+        )
+    else:
+        start, end = _jalali(span.start_date), _jalali(span.end_date)
+        overlap = (
+            Q(duration_type='daily', start_date__lte=end, end_date__gte=start)
+            | Q(duration_type='hourly', date__gte=start, date__lte=end)
+        )
+    queryset = Leave.objects.filter(overlap, employee_id=span.employee_id, status__in=ACTIVE_LEAVE_STATUSES)
+    if span.pk:
+        queryset = queryset.exclude(pk=span.pk)
+    return queryset
+
+
+def validate_leave_request(leave):
+    """اعتبارسنجی درخواست مرخصی: عدم هم‌پوشانی و کافی بودن مانده (ValidationError)"""
+    span = leave_span(leave)
+    if span.duration_type == 'hourly':
+        if not (span.date and span.start_time and span.end_time):
+            return
+    elif not (span.start_date and span.end_date) or span.end_date < span.start_date:
+        return
+
+    conflict = overlapping_leaves(span).first()
+    if conflict:
+        period = (
+            f'{str(conflict.date)} ساعتی' if conflict.duration_type == 'hourly'
+            else f'{str(conflict.start_date)} تا {str(conflict.end_date)}'
+        )
+        raise ValidationError(
+            f'این درخواست با مرخصی دیگری هم‌پوشانی دارد: {conflict.get_leave_type_display()} '
+            f'({period} - {conflict.get_status_display()})'
+        )
+
+    if span.leave_type not in ENTITLED_LEAVE_TYPES:
+        return
+    usage = leave_usage(span)
+    # مصرف نسخه تاییدشده قبلی همین مرخصی (در ویرایش) در دفتر ثبت شده است
+    previous = leave_span(Leave.objects.filter(pk=span.pk).first()) if span.pk else None
+    released = leave_usage(previous) if previous and previous.status == 'approved' else {}
+    balances = {
+        balance.year: balance
+        for balance in LeaveBalance.objects.filter(
+            employee_id=span.employee_id, leave_type=span.leave_type, year__in=list(usage),
+        )
+    }
+    standard_work_minutes = get_work_schedule().standard_work_minutes
+    for year, (days, hours) in usage.items():
+        balance = balances.get(year)
+        remaining = (
+            remaining_days(balance.entitlement_days, balance.used_days, balance.used_hours)
+            if balance else leave_entitlement(span.leave_type)
+        )
+        released_days, released_hours = released.get(year, (0, 0))
+        remaining += released_days + released_hours * 60 / standard_work_minutes
+        if days + hours * 60 / standard_work_minutes > remaining + 1e-6:
+            raise ValidationError(f'مانده مرخصی سال {year} کافی نیست (مانده: {max(remaining, 0):g} روز)')
+
+
+def rebuild_leave_balances(year=None):
+    """
+    بازسازی دفتر مانده مرخصی از مرخصی‌های تاییدشده (کل جدول یا یک سال شمسی)
+    Rebuild the ledger from approved leaves; returns the number of rows written
+    """
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for leave in Leave.objects.filter(status='approved').order_by():
+        span = leave_span(leave)
+        for usage_year, (days, hours) in leave_usage(span).items():
+            if year is None or usage_year == year:
+                total = totals[(span.employee_id, usage_year, span.leave_type)]
+                total[0] += days
+                total[1] += hours
+
+    rows = [
+        LeaveBalance(
+            employee_id=employee_id, year=usage_year, leave_type=leave_type,
+            entitlement_days=leave_entitlement(leave_type), used_days=days, used_hours=hours,
+        )
+        for (employee_id, usage_year, leave_type), (days, hours) in totals.items()
+    ]
+    with transaction.atomic():
+        balances = LeaveBalance.objects.all()
+        if year is not None:
+            balances = balances.filter(year=year)
+        balances.delete()
+        LeaveBalance.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,55 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.activity_archive import archive_activity_logs, archive_cutoff
+
+
+class Command(BaseCommand):
+    """
+    دستور برای انتقال لاگ‌های فعالیت قدیمی به فایل‌های فشرده بایگانی
+    رکوردهای قدیمی‌تر از ACTIVITY_LOG_RETENTION_DAYS روز در دسته‌های محدود در فایل‌های
+    روزانه jsonl.gz زیر ACTIVITY_LOG_ARCHIVE_DIR نوشته و از جدول حذف می‌شوند.
+    خواندن بایگانی: core.activity_archive.read_archived_activity_logs
+
+    کاربرد:
+        python manage.py archive_activity_logs
+        python manage.py archive_activity_logs --days=90
+        python manage.py archive_activity_logs --before=2024-01-01 --batch-size=5000
+        python manage.py archive_activity_logs --dry-run
+
+    cron (هر شب ساعت 3):
+        0 3 * * * cd /path/to/phonix && python manage.py archive_activity_logs
+    """
+
+    help = 'انتقال لاگ‌های فعالیت قدیمی به فایل‌های فشرده بایگانی و حذف از جدول'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='مدت نگهداری در جدول (روز - پیش‌فرض ACTIVITY_LOG_RETENTION_DAYS)')
+        parser.add_argument('--before', type=str, default=None,
+                            help='بایگانی رکوردهای قبل از این تاریخ (فرمت: YYYY-MM-DD) - به جای --days')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='تعداد رکورد در هر دسته خواندن و حذف (پیش‌فرض: 2000)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='فقط نمایش تعداد رکوردهای قابل بایگانی')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                before = datetime.combine(datetime.strptime(options['before'], '%Y-%m-%d').date(), time.min)
+            except ValueError:
+                raise CommandError('فرمت تاریخ نادرست است. از YYYY-MM-DD استفاده کنید.')
+        else:
+            before = archive_cutoff(options['days'])
+        if options['batch_size'] < 1:
+            raise CommandError('اندازه دسته باید بزرگتر از صفر باشد.')
+
+        archived, files = archive_activity_logs(before, options['batch_size'], options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(f'{archived} رکورد قبل از {before:%Y-%m-%d} قابل بایگانی است (بدون تغییر)')
+            )
+            return
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! {archived} رکورد قبل از {before:%Y-%m-%d} در {files} فایل بایگانی شد')
+        )
@@ -0,0 +1,130 @@
+import json
+import statistics
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from core.models import Employee, Income, Expense, LoanBuyer, Attendance, ActivityLog
+from vekalet.models import Consultation
+
+
+# سناریوهای بنچمارک: (نام، آدرس، نوع کاربر)
+# admin: مدیر سیستم / employee: کارمند دارای رکورد حضور و غیاب
+SCENARIOS = (
+    ('financial_chart_api', '/api/financial-chart/', 'admin'),
+    ('financial_analytics_quarter', '/api/financial-analytics/?granularity=quarter', 'admin'),
+    ('financial_analytics_branches', '/api/financial-analytics/?breakdown=branch', 'admin'),
+    ('admin_income_changelist', '/admin/core/income/', 'admin'),
+    ('admin_expense_changelist', '/admin/core/expense/', 'admin'),
+    ('admin_loanbuyer_changelist', '/admin/core/loanbuyer/', 'admin'),
+    ('admin_activitylog_changelist', '/admin/core/activitylog/', 'admin'),
+    ('attendance_status', '/api/attendance-status/', 'employee'),
+    ('attendance_history', '/api/attendance-history/', 'employee'),
+)
+
+
+class Command(BaseCommand):
+    """
+    دستور برای سنجش زمان پاسخ و تعداد کوئری‌های گزارش‌ها و صفحات مدیریت
+    هر سناریو یک بار با کش خالی (cold) و چند بار با کش گرم (warm) اجرا می‌شود
+    و نتیجه در یک فایل JSON ذخیره می‌شود تا اجراهای مختلف با هم مقایسه شوند.
+
+    کاربرد:
+        python manage.py seed_synthetic_data --scale=0.1
+        python manage.py benchmark_reports
+        python manage.py benchmark_reports --repeat=10 --output=bench/after.json
+        python manage.py benchmark_reports --only=financial_chart_api,attendance_history
+    """
+
+    help = 'بنچمارک گزارش‌ها و صفحات مدیریت (زمان و تعداد کوئری) با خروجی JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='تعداد اجرای گرم هر سناریو')
+        parser.add_argument('--output', type=str, default='benchmark_report.json', help='مسیر فایل گزارش JSON')
+        parser.add_argument('--only', type=str, default='', help='نام سناریوها (جدا شده با کاما)')
+
+    def handle(self, *args, **options):
+        only = {name.strip() for name in options['only'].split(',') if name.strip()}
+        scenarios = [scenario for scenario in SCENARIOS if not only or scenario[0] in only]
+        if not scenarios:
+            raise CommandError('هیچ سناریویی انتخاب نشد.')
+
+        clients = {
+            'admin': self.client_for(User.objects.filter(is_superuser=True, is_active=True).first()),
+            'employee': self.client_for(
+                Employee.objects.filter(attendances__isnull=False).values_list('user', flat=True).first()
+            ),
+        }
+
+        results = []
+        for name, url, role in scenarios:
+            client = clients[role]
+            if client is None:
+                self.stdout.write(self.style.WARNING(f'{name}: کاربر {role} یافت نشد؛ رد شد'))
+                continue
+
+            cache.clear()
+            cold = self.measure(client, url)
+            warm = [self.measure(client, url) for _ in range(max(options['repeat'], 1))]
+            timings = [run['ms'] for run in warm]
+            result = {
+                'name': name,
+                'url': url,
+                'status': cold['status'],
+                'cold_ms': cold['ms'],
+                'cold_queries': cold['queries'],
+                'warm_ms_min': min(timings),
+                'warm_ms_median': round(statistics.median(timings), 2),
+                'warm_ms_max': max(timings),
+                'warm_queries': warm[-1]['queries'],
+            }
+            results.append(result)
+            self.stdout.write(
+                f"{name}: {result['status']} | cold {result['cold_ms']}ms/{result['cold_queries']}q | "
+                f"warm median {result['warm_ms_median']}ms/{result['warm_queries']}q"
+            )
+
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'cache_backend': settings.CACHES['default']['BACKEND'],
+            'row_counts': {
+                model._meta.label: model.objects.count()
+                for model in (Income, Expense, Consultation, LoanBuyer, Attendance, ActivityLog)
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"تکمیل شد! گزارش: {options['output']}"))
+
+    def client_for(self, user):
+        if user is None:
+            return None
+        if not isinstance(user, User):
+            user = User.objects.get(pk=user)
+        host = next((host for host in settings.ALLOWED_HOSTS if host and not host.startswith('.') and host != '*'),
+                    'localhost')
+        client = Client(SERVER_NAME=host)
+        client.force_login(user)
+        return client
+
+    def measure(self, client, url):
+        """یک درخواست GET (با خواندن کامل بدنه پاسخ‌های استریم) - زمان به میلی‌ثانیه و تعداد کوئری"""
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url, secure=True)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        return {
+            'status': response.status_code,
+            'ms': round(elapsed * 1000, 2),
+            'queries': len(queries),
+        }
@@ -0,0 +1,54 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from core.models import Branch
+from core.financial_reports import jalali_month_buckets, financial_chart_payload, financial_cache_version
+from core.financial_snapshots import scope_name, write_snapshot
+
+logger = logging.getLogger('phonix')
+
+
+class Command(BaseCommand):
+    """
+    دستور برای پیش‌محاسبه داده نمودار مالی و ذخیره اسنپ‌شات‌های فشرده روی دیسک
+    برای هر دامنه (کل سازمان و هر شعبه) یک فایل نسخه‌دار ساخته می‌شود
+    
+    کاربرد:
+        python manage.py build_financial_snapshots
+        python manage.py build_financial_snapshots --keep=5
+    
+    cron (هر 10 دقیقه):
+        */10 * * * * cd /path/to/phonix && python manage.py build_financial_snapshots
+    """
+    
+    help = 'پیش‌محاسبه اسنپ‌شات‌های نمودار مالی برای کل سازمان و هر شعبه'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            help='تعداد نسخه‌های نگهداری‌شده برای هر دامنه',
+            default=3
+        )
+    
+    def handle(self, *args, **options):
+        buckets = jalali_month_buckets(12)
+        scopes = [None] + list(Branch.objects.values_list('pk', flat=True))
+        
+        written = 0
+        for branch in scopes:
+            scope = scope_name(branch)
+            try:
+                # نسخه پیش از محاسبه خوانده می‌شود تا تغییر هم‌زمان اسنپ‌شات را کهنه کند
+                version = financial_cache_version()
+                payload = financial_chart_payload(buckets, branch=branch)
+                path = write_snapshot(scope, buckets[0][1], payload, version, keep=max(options['keep'], 1))
+                written += 1
+                self.stdout.write(f'{scope}: {path.name}')
+            except Exception as e:
+                logger.error(f"خطا در ساخت اسنپ‌شات مالی {scope}: {e}", exc_info=True)
+                self.stdout.write(self.style.ERROR(f'خطا در ساخت اسنپ‌شات {scope}: {str(e)}'))
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! اسنپ‌شات‌های ساخته‌شده: {written} از {len(scopes)}')
+        )
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import ExtractHour, ExtractMinute, Greatest, Least
+from django.utils import timezone
+from core.models import Attendance
+from core.attendance_summaries import refresh_attendance_summaries, summary_cells
+from core.work_schedule import get_work_schedule
+
+POLICIES = ('schedule_end', 'incomplete')
+
+
+def _django_week_day(persian_day):
+    """تبدیل روز هفته شمسی (0=شنبه) به lookup week_day جنگو (1=یکشنبه ... 7=شنبه)"""
+    python_weekday = (persian_day - 2) % 7  # 0=دوشنبه
+    return (python_weekday + 1) % 7 + 1
+
+
+def _minutes(time_value):
+    return time_value.hour * 60 + time_value.minute
+
+
+def close_open_attendance(before, policy='schedule_end'):
+    """
+    بستن رکوردهای حضور روزهای قبل از before که ورود دارند ولی خروج ندارند
+    schedule_end: خروج = پایان کار جدول همان روز هفته و محاسبه مدت کار و اضافه‌کاری در SQL
+                  (رکوردهایی که ورودشان بعد از پایان کار است ناقص علامت می‌خورند)
+    incomplete:   فقط وضعیت «ناقص» ثبت می‌شود
+    برای هر روز هفته یک UPDATE (مستقل از تعداد کارمندان)
+    خروجی: (تعداد بسته شده، تعداد ناقص)
+    """
+    # رکوردهایی که قبلاً ناقص علامت خورده‌اند هر شب دوباره پردازش نمی‌شوند
+    open_rows = Attendance.objects.filter(
+        date__lt=before, check_in__isnull=False, check_out__isnull=True,
+    ).exclude(status='incomplete')
+    cells = {
+        cell
+        for employee_id, day in open_rows.values_list('employee_id', 'date').distinct()
+        for cell in summary_cells(employee_id, [day])
+    }
+    if not cells:
+        return 0, 0
+
+    now = timezone.now()
+    closed = 0
+    with transaction.atomic():
+        if policy == 'schedule_end':
+            schedule = get_work_schedule()
+            # دقیقه کامل‌شده از ورود تا پایان کار (مثل int(seconds / 60) در calculate_work_duration)
+            check_in_minutes = ExtractHour('check_in') * 60 + ExtractMinute('check_in') + Case(
+                When(check_in__second__gt=0, then=Value(1)), default=Value(0), output_field=IntegerField(),
+            )
+            for day_of_week, day in schedule.days.items():
+                end_minutes = _minutes(day.work_end)
+                work = Value(end_minutes) - check_in_minutes
+                required = Greatest(Value(schedule.standard_work_minutes) - F('leave_minutes'), Value(0))
+                closed += open_rows.filter(
+                    date__week_day=_django_week_day(day_of_week), check_in__lt=day.work_end,
+                ).update(
+                    check_out=day.work_end,
+                    work_duration=work,
+                    overtime_duration=Least(Greatest(work - required, Value(0)), Value(schedule.max_daily_overtime)),
+                    status='present',
+                    updated_at=now,
+                )
+        incomplete = open_rows.update(status='incomplete', updated_at=now)
+        # update سیگنال ندارد؛ خلاصه ماهانه خانه‌های تغییرکرده مستقیماً بروزرسانی می‌شود
+        refresh_attendance_summaries(cells)
+    return closed, incomplete
+
+
+class Command(BaseCommand):
+    """
+    دستور برای بستن شبانه رکوردهای حضور باز (ورود بدون خروج) روزهای گذشته
+    سیاست schedule_end خروج را برابر پایان کار جدول کاری همان روز قرار داده و مدت کار را
+    با UPDATE دسته‌ای محاسبه می‌کند؛ سیاست incomplete فقط وضعیت «ناقص» ثبت می‌کند.
+
+    کاربرد:
+        python manage.py close_incomplete_attendance
+        python manage.py close_incomplete_attendance --policy=incomplete
+        python manage.py close_incomplete_attendance --before=2024-01-15
+
+    cron (هر شب ساعت 1):
+        0 1 * * * cd /path/to/phonix && python manage.py close_incomplete_attendance
+    """
+
+    help = 'بستن دسته‌ای رکوردهای حضور بدون خروج روزهای گذشته'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', choices=POLICIES, default='schedule_end',
+                            help='schedule_end: خروج در پایان کار جدول کاری | incomplete: فقط علامت ناقص')
+        parser.add_argument('--before', type=str, default=None,
+                            help='رکوردهای قبل از این تاریخ بسته می‌شوند (فرمت: YYYY-MM-DD - پیش‌فرض امروز)')
+
+    def handle(self, *args, **options):
+        try:
+            before = (datetime.strptime(options['before'], '%Y-%m-%d').date()
+                      if options['before'] else timezone.now().date())
+        except ValueError:
+            raise CommandError('فرمت تاریخ نادرست است. از YYYY-MM-DD استفاده کنید.')
+
+        closed, incomplete = close_open_attendance(before, options['policy'])
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! بسته شده: {closed}، ناقص: {incomplete}')
+        )
@@ -0,0 +1,47 @@
+import time
+
+import jdatetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from core.models import PayrollResult
+from core.payroll import compute_payroll
+
+
+class Command(BaseCommand):
+    """
+    دستور برای محاسبه حقوق یک ماه شمسی برای همه کارمندان فعال
+    نتایج قبلی همان ماه با مقادیر جدید جایگزین می‌شوند
+
+    کاربرد:
+        python manage.py compute_payroll
+        python manage.py compute_payroll --month=1404/07
+    """
+
+    help = 'محاسبه حقوق ماهانه همه کارمندان فعال (PayrollResult)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=str, default=None,
+                            help='ماه شمسی (فرمت: YYYY/MM - پیش‌فرض: ماه جاری)')
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                year, month = (int(part) for part in options['month'].split('/'))
+                jdatetime.date(year, month, 1)
+            except ValueError:
+                raise CommandError('فرمت ماه نادرست است. از YYYY/MM استفاده کنید.')
+        else:
+            today = jdatetime.date.today()
+            year, month = today.year, today.month
+
+        self.stdout.write(f'در حال محاسبه حقوق {year}/{month:02d}...')
+        started = time.perf_counter()
+        count = compute_payroll(year, month)
+        elapsed = time.perf_counter() - started
+
+        total = PayrollResult.objects.filter(year=year, month=month).aggregate(total=Sum('net_pay'))['total'] or 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'تکمیل شد! تعداد کارمندان: {count} | جمع خالص پرداختی: {total:,.0f} | زمان: {elapsed:.2f}s'
+            )
+        )
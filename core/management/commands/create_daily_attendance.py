@@ -1,21 +1,90 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
 from django.core.management.base import BaseCommand
+from django.db import connections
 from django.utils import timezone
-from django.contrib.auth.models import User
-from core.models import Employee, Attendance, CompanySettings, DayWorkSchedule
-from datetime import datetime, time
+from core.models import Employee, Attendance
+from core.attendance_summaries import refresh_attendance_summaries, summary_cells
+from core.leaves import hourly_leave_minutes
+from core.work_schedule import is_work_day
+
+# هر کار در process pool یک بازه حداکثر ۳۱ روزه را پردازش می‌کند
+RANGE_CHUNK_DAYS = 31
+BATCH_SIZE = 2000
+
+
+def _active_employees():
+    """کارمندان فعال همراه با آخرین ورود کاربر - یک کوئری"""
+    return list(
+        Employee.objects.filter(employment_status='active').values_list('id', 'user__last_login')
+    )
+
+
+def create_attendance_for_dates(dates, employees=None, batch_size=BATCH_SIZE):
+    """
+    ایجاد دسته‌ای رکوردهای حضور و غیاب برای چند روز
+    زوج‌های (کارمند، تاریخ) موجود یک بار خوانده می‌شوند، وضعیت از last_login در حافظه
+    محاسبه و رکوردهای جدید با bulk_create(ignore_conflicts=True) درج می‌شوند.
+    ردیف‌هایی که هم‌زمان در process دیگری ساخته شوند نادیده گرفته می‌شوند؛ تعداد ایجادشده
+    از شمارش ردیف‌های بازه پس از درج به دست می‌آید، نه تعداد ردیف‌های ارسال‌شده.
+    خروجی: (تعداد ایجاد شده، تعداد موجود)
+    """
+    if employees is None:
+        employees = _active_employees()
+    range_rows = Attendance.objects.filter(
+        date__gte=min(dates), date__lte=max(dates), employee__employment_status='active'
+    )
+    existing = set(range_rows.values_list('employee_id', 'date'))
+
+    # مرخصی‌های ساعتی تاییدشده روزهایی که هنوز رکورد حضور ندارند
+    leave_minutes = hourly_leave_minutes(None, min(dates), max(dates))
+
+    records = []
+    for target_date in dates:
+        for employee_id, last_login in employees:
+            if (employee_id, target_date) in existing:
+                continue
+            status, check_in = Attendance.status_from_login(last_login, target_date)
+            records.append(Attendance(
+                employee_id=employee_id,
+                date=target_date,
+                status=status,
+                check_in=check_in,
+                leave_minutes=leave_minutes.get((employee_id, target_date), 0),
+            ))
+
+    if not records:
+        return 0, len(existing)
+    Attendance.objects.bulk_create(records, batch_size=batch_size, ignore_conflicts=True)
+    created = range_rows.count() - len(existing)
+    # bulk_create سیگنال ندارد؛ خلاصه ماهانه کارمندان این بازه مستقیماً بروزرسانی می‌شود
+    if created:
+        refresh_attendance_summaries({
+            cell for employee_id, _ in employees for cell in summary_cells(employee_id, dates)
+        })
+    return created, len(existing)
+
+
+def _init_worker():
+    """آماده‌سازی process جدید: راه‌اندازی Django (در حالت spawn) و بستن اتصال‌های به ارث رسیده"""
+    import django
+    django.setup()
+    connections.close_all()
 
 
 class Command(BaseCommand):
     """
     دستور برای ایجاد خودکار رکوردهای حضور و غیاب روزانه
-    
+
     کاربرد:
         python manage.py create_daily_attendance
         python manage.py create_daily_attendance --date=2024-01-15
+        python manage.py create_daily_attendance --from=2024-01-01 --to=2024-12-30 --workers=4
     """
-    
+
     help = 'ایجاد رکوردهای حضور و غیاب برای تمام کارمندان فعال'
-    
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--date',
@@ -23,81 +92,86 @@ class Command(BaseCommand):
             help='تاریخ برای ایجاد رکوردها (فرمت: YYYY-MM-DD)',
             default=None
         )
-    
+        parser.add_argument('--from', dest='date_from', type=str, default=None,
+                            help='ابتدای بازه برای تکمیل رکوردهای گذشته (فرمت: YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=str, default=None,
+                            help='انتهای بازه (فرمت: YYYY-MM-DD) - پیش‌فرض امروز')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='تعداد processها برای بازه‌های طولانی')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='تعداد رکورد در هر درج دسته‌ای')
+
     def handle(self, *args, **options):
-        # تعیین تاریخ
-        if options['date']:
-            try:
-                target_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
-            except ValueError:
-                self.stdout.write(self.style.ERROR('فرمت تاریخ نادرست است. از YYYY-MM-DD استفاده کنید.'))
-                return
-        else:
-            target_date = timezone.now().date()
-        
-        # دریافت تنظیمات شرکت
+        # تعیین تاریخ یا بازه
         try:
-            company_settings = CompanySettings.objects.first()
-            if not company_settings:
-                self.stdout.write(self.style.ERROR('تنظیمات شرکت یافت نشد!'))
-                return
-        except:
-            self.stdout.write(self.style.ERROR('خطا در دریافت تنظیمات شرکت!'))
+            if options['date_from']:
+                start = datetime.strptime(options['date_from'], '%Y-%m-%d').date()
+                end = (datetime.strptime(options['date_to'], '%Y-%m-%d').date()
+                       if options['date_to'] else timezone.now().date())
+            elif options['date']:
+                start = end = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            else:
+                start = end = timezone.now().date()
+        except ValueError:
+            self.stdout.write(self.style.ERROR('فرمت تاریخ نادرست است. از YYYY-MM-DD استفاده کنید.'))
             return
-        
-        # دریافت روز هفته
-        weekday = target_date.weekday()
-        # تبدیل از Django weekday (0=دوشنبه) به Persian weekday (0=شنبه)
-        persian_weekday = (weekday + 2) % 7
-        
-        # دریافت جدول کاری این روز
-        day_schedule = company_settings.get_day_schedule(persian_weekday)
-        
-        if not day_schedule:
-            self.stdout.write(
-                self.style.WARNING(f'جدول کاری برای {target_date.strftime("%Y-%m-%d")} یافت نشد!')
-            )
+
+        if start > end:
+            self.stdout.write(self.style.ERROR('تاریخ شروع بعد از تاریخ پایان است.'))
             return
-        
-        # اگر روز بسته باشد، هیچ رکوردی ایجاد نکن
-        if day_schedule.work_status == 'closed':
-            self.stdout.write(
-                self.style.WARNING(f'{target_date.strftime("%Y-%m-%d")} روز بسته‌ای است.')
-            )
+
+        # روزهای بسته جدول کاری (تنظیمات شرکت) رکورد حضور ندارند
+        all_dates = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+        dates = [day for day in all_dates if is_work_day(day)]
+        if len(dates) < len(all_dates):
+            closed = len(all_dates) - len(dates)
+            self.stdout.write(self.style.WARNING(
+                f'{start.strftime("%Y-%m-%d")} روز بسته‌ای است.' if len(all_dates) == 1
+                else f'{closed} روز بسته در بازه نادیده گرفته شد.'
+            ))
+        if not dates:
             return
-        
-        # دریافت تمام کارمندان فعال
-        active_employees = Employee.objects.filter(employment_status='active')
-        
+
+        employees = _active_employees()
+        if not employees:
+            self.stdout.write(self.style.WARNING('کارمند فعالی یافت نشد.'))
+            return
+
+        chunks = [dates[i:i + RANGE_CHUNK_DAYS] for i in range(0, len(dates), RANGE_CHUNK_DAYS)]
+        workers = min(max(options['workers'], 1), len(chunks))
+
         created_count = 0
-        updated_count = 0
-        
-        for employee in active_employees:
-            try:
-                # ایجاد یا دریافت رکورد حضور و غیاب
-                attendance, created = Attendance.objects.get_or_create(
-                    employee=employee,
-                    date=target_date,
-                    defaults={
-                        'status': 'absent',  # پیش‌فرض غایب
-                    }
-                )
-                
-                if created:
-                    # اگر رکورد جدید است، وضعیت را بر اساس ورود به‌روزرسانی کن
-                    attendance.update_status_from_login()
-                    attendance.save()
-                    created_count += 1
-                else:
-                    updated_count += 1
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'خطا در ایجاد رکورد برای {employee}: {str(e)}')
-                )
-        
+        existing_count = 0
+        if workers > 1:
+            # اتصال‌های باز پیش از fork بسته می‌شوند؛ هر process اتصال خودش را می‌سازد
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [
+                    pool.submit(create_attendance_for_dates, chunk, employees, options['batch_size'])
+                    for chunk in chunks
+                ]
+                for chunk, future in zip(chunks, futures):
+                    try:
+                        created, existing = future.result()
+                        created_count += created
+                        existing_count += existing
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(
+                            f'خطا در ایجاد رکوردهای {chunk[0]} تا {chunk[-1]}: {str(e)}'
+                        ))
+        else:
+            for chunk in chunks:
+                try:
+                    created, existing = create_attendance_for_dates(chunk, employees, options['batch_size'])
+                    created_count += created
+                    existing_count += existing
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(
+                        f'خطا در ایجاد رکوردهای {chunk[0]} تا {chunk[-1]}: {str(e)}'
+                    ))
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'تکمیل شد! ایجاد شده: {created_count}، موجود: {updated_count}'
+                f'تکمیل شد! ایجاد شده: {created_count}، موجود: {existing_count}'
             )
-        )
\ No newline at end of file
+        )
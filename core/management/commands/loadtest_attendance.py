@@ -0,0 +1,176 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from core.models import Employee, Attendance
+
+
+def _percentile(timings, percent):
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[percent - 1]
+
+
+class Command(BaseCommand):
+    """
+    دستور برای شبیه‌سازی هجوم صبحگاهی به ثبت ورود/خروج (N کارمند هم‌زمان)
+    هر کارمند در thread جداگانه (با اتصال دیتابیس خودش) درخواست می‌فرستد؛ با --double-click
+    هر کارمند دو درخواست هم‌زمان می‌فرستد (با --idempotency هر دو با یک Idempotency-Key).
+    زمان پاسخ p50/p95 گزارش و یکتایی رکورد امروز هر کارمند بررسی می‌شود.
+    رکوردهای ساخته‌شده در پایان حذف می‌شوند (مگر با --keep).
+
+    کاربرد:
+        python manage.py seed_synthetic_data --scale=0.1
+        python manage.py loadtest_attendance --employees=100
+        python manage.py loadtest_attendance --employees=100 --double-click --idempotency --checkout
+    """
+
+    help = 'تست بار هم‌زمان ثبت ورود/خروج و گزارش p50/p95 زمان پاسخ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50, help='تعداد کارمندان هم‌زمان')
+        parser.add_argument('--concurrency', type=int, default=0,
+                            help='تعداد threadها (پیش‌فرض: برابر تعداد درخواست‌ها)')
+        parser.add_argument('--double-click', action='store_true', help='دو درخواست هم‌زمان برای هر کارمند')
+        parser.add_argument('--idempotency', action='store_true', help='ارسال Idempotency-Key یکسان برای درخواست‌های تکراری')
+        parser.add_argument('--checkout', action='store_true', help='اجرای مرحله ثبت خروج پس از ورود')
+        parser.add_argument('--keep', action='store_true', help='رکوردهای حضور ساخته‌شده حذف نشوند')
+        parser.add_argument('--output', type=str, default='', help='مسیر فایل گزارش JSON')
+        parser.add_argument('--force', action='store_true', help='اجرا حتی وقتی DEBUG خاموش است')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('این دستور رکورد حضور واقعی می‌سازد؛ در محیط پروداکشن فقط با --force اجرا شود.')
+
+        # فقط کارمندانی که امروز رکورد حضور ندارند (تا پاک‌سازی فقط داده تست را حذف کند)
+        today = date.today()
+        employees = list(
+            Employee.objects.filter(
+                employment_status='active', user__is_active=True, user__profile__isnull=False
+            ).exclude(attendances__date=today).select_related('user')[:options['employees']]
+        )
+        if len(employees) < options['employees']:
+            raise CommandError(
+                f"فقط {len(employees)} کارمند فعال بدون حضور امروز یافت شد؛ "
+                f"ابتدا seed_synthetic_data را اجرا کنید."
+            )
+
+        host = next((host for host in settings.ALLOWED_HOSTS if host and not host.startswith('.') and host != '*'),
+                    'localhost')
+        sessions = []
+        for employee in employees:
+            client = Client(SERVER_NAME=host)
+            client.force_login(employee.user)
+            sessions.append((employee, client))
+
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'employees': len(employees),
+            'double_click': options['double_click'],
+            'idempotency': options['idempotency'],
+            'phases': [],
+        }
+        try:
+            phases = ['/api/check-in/'] + (['/api/check-out/'] if options['checkout'] else [])
+            for url in phases:
+                report['phases'].append(self.run_phase(url, sessions, options))
+
+            employee_ids = [employee.pk for employee in employees]
+            report['attendance_rows'] = Attendance.objects.filter(employee_id__in=employee_ids, date=today).count()
+            report['checked_in'] = Attendance.objects.filter(
+                employee_id__in=employee_ids, date=today, check_in__isnull=False
+            ).count()
+            self.stdout.write(
+                f"رکوردهای امروز: {report['attendance_rows']} | دارای ورود: {report['checked_in']} "
+                f"(انتظار: {len(employees)})"
+            )
+        finally:
+            if not options['keep']:
+                Attendance.objects.filter(employee__in=employees, date=today).delete()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        consistent = report['attendance_rows'] == report['checked_in'] == len(employees)
+        style = self.style.SUCCESS if consistent else self.style.ERROR
+        self.stdout.write(style('تکمیل شد!' if consistent else 'ناسازگاری در رکوردهای حضور!'))
+
+    def run_phase(self, url, sessions, options):
+        """ارسال هم‌زمان درخواست‌های یک مرحله و محاسبه آمار زمان پاسخ"""
+        requests = []
+        for employee, client in sessions:
+            key = uuid.uuid4().hex if options['idempotency'] else None
+            copies = 2 if options['double_click'] else 1
+            for copy in range(copies):
+                if copy:
+                    # کلیک دوم: کلاینت جدا با همان نشست
+                    twin = Client(SERVER_NAME=client.defaults['SERVER_NAME'])
+                    twin.cookies = client.cookies
+                    requests.append((employee.pk, twin, key))
+                else:
+                    requests.append((employee.pk, client, key))
+
+        concurrency = options['concurrency'] or len(requests)
+        lanes = [requests[i::concurrency] for i in range(concurrency)]
+        barrier = threading.Barrier(len(lanes))
+        results = []
+        lock = threading.Lock()
+
+        def worker(lane):
+            try:
+                barrier.wait()
+                for employee_id, client, key in lane:
+                    headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+                    started = time.perf_counter()
+                    response = client.post(url, secure=True, **headers)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    try:
+                        success = json.loads(response.content).get('success', False)
+                    except ValueError:
+                        success = False
+                    with lock:
+                        results.append((employee_id, response.status_code, success, elapsed))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(lane,)) for lane in lanes]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        timings = sorted(elapsed for _, _, _, elapsed in results)
+        successes = Counter(employee_id for employee_id, _, success, _ in results if success)
+        phase = {
+            'url': url,
+            'requests': len(results),
+            'concurrency': len(lanes),
+            'statuses': dict(Counter(str(status) for _, status, _, _ in results)),
+            'p50_ms': round(_percentile(timings, 50), 2),
+            'p95_ms': round(_percentile(timings, 95), 2),
+            'max_ms': round(timings[-1], 2),
+            'throughput_rps': round(len(results) / wall, 2),
+            # بدون idempotency هر کارمند باید دقیقاً یک پاسخ موفق بگیرد
+            'employees_with_multiple_successes': sum(1 for count in successes.values() if count > 1),
+        }
+        self.stdout.write(
+            f"{url}: {phase['requests']} req / {phase['concurrency']} threads | "
+            f"p50 {phase['p50_ms']}ms | p95 {phase['p95_ms']}ms | max {phase['max_ms']}ms | "
+            f"{phase['throughput_rps']} req/s | statuses {phase['statuses']}"
+        )
+        if not options['idempotency'] and phase['employees_with_multiple_successes']:
+            self.stdout.write(self.style.ERROR(
+                f"{phase['employees_with_multiple_successes']} کارمند بیش از یک پاسخ موفق گرفتند!"
+            ))
+        return phase
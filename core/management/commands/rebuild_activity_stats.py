@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from core.activity_stats import rebuild_activity_stats
+
+
+class Command(BaseCommand):
+    """
+    دستور برای بازسازی آمار روزانه فعالیت (ActivityDailyStat) از رکوردهای ActivityLog
+    بدون بازه، روزهای قدیمی‌ترین تا جدیدترین لاگ موجود بازسازی می‌شوند و آمار روزهای
+    بایگانی‌شده دست نمی‌خورد؛ با --from/--to فقط روزهای بازه بازسازی می‌شوند (ابتدای
+    بازه به قدیمی‌ترین لاگ موجود محدود می‌شود تا آمار روزهای بایگانی‌شده حفظ شود)
+    
+    کاربرد:
+        python manage.py rebuild_activity_stats
+        python manage.py rebuild_activity_stats --from=2024-03-20 --to=2024-04-20
+    """
+    
+    help = 'بازسازی آمار روزانه فعالیت (ActivityDailyStat)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=str, default=None,
+                            help='ابتدای بازه (فرمت: YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=str, default=None,
+                            help='انتهای بازه (فرمت: YYYY-MM-DD)')
+    
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options['date_from'], '%Y-%m-%d').date() if options['date_from'] else None
+            end = datetime.strptime(options['date_to'], '%Y-%m-%d').date() if options['date_to'] else None
+        except ValueError:
+            raise CommandError('فرمت تاریخ نادرست است. از YYYY-MM-DD استفاده کنید.')
+        
+        self.stdout.write('در حال بازسازی آمار روزانه فعالیت...')
+        count = rebuild_activity_stats(start, end)
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! تعداد ردیف‌های آمار: {count}')
+        )
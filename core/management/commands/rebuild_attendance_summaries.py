@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from core.attendance_summaries import rebuild_attendance_summaries
+
+
+class Command(BaseCommand):
+    """
+    دستور برای بازسازی خلاصه‌های ماهانه حضور و غیاب از رکوردهای Attendance
+    با --from/--to فقط ماه‌های شمسی شامل بازه بازسازی می‌شوند
+    
+    کاربرد:
+        python manage.py rebuild_attendance_summaries
+        python manage.py rebuild_attendance_summaries --from=2024-03-20 --to=2025-03-20
+    """
+    
+    help = 'بازسازی خلاصه ماهانه حضور و غیاب (AttendanceMonthlySummary)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=str, default=None,
+                            help='ابتدای بازه (فرمت: YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=str, default=None,
+                            help='انتهای بازه (فرمت: YYYY-MM-DD)')
+    
+    def handle(self, *args, **options):
+        try:
+            start = datetime.strptime(options['date_from'], '%Y-%m-%d').date() if options['date_from'] else None
+            end = datetime.strptime(options['date_to'], '%Y-%m-%d').date() if options['date_to'] else None
+        except ValueError:
+            raise CommandError('فرمت تاریخ نادرست است. از YYYY-MM-DD استفاده کنید.')
+        
+        self.stdout.write('در حال بازسازی خلاصه ماهانه حضور و غیاب...')
+        count = rebuild_attendance_summaries(start, end)
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! تعداد ردیف‌های خلاصه: {count}')
+        )
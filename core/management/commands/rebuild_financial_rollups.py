@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from core.financial_reports import rebuild_financial_rollups
+
+
+class Command(BaseCommand):
+    """
+    دستور برای بازسازی کامل جدول تجمیع ماهانه مالی از جداول منبع
+    
+    کاربرد:
+        python manage.py rebuild_financial_rollups
+    """
+    
+    help = 'بازسازی کامل تجمیع ماهانه مالی (FinancialMonthlyRollup)'
+    
+    def handle(self, *args, **options):
+        self.stdout.write('در حال بازسازی تجمیع ماهانه مالی...')
+        count = rebuild_financial_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! تعداد ردیف‌های تجمیع: {count}')
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from core.leaves import rebuild_leave_balances
+
+
+class Command(BaseCommand):
+    """
+    دستور برای بازسازی دفتر مانده مرخصی (LeaveBalance) از مرخصی‌های تاییدشده
+    با --year فقط همان سال شمسی بازسازی می‌شود
+    
+    کاربرد:
+        python manage.py rebuild_leave_balances
+        python manage.py rebuild_leave_balances --year=1404
+    """
+    
+    help = 'بازسازی دفتر مانده مرخصی کارمندان (LeaveBalance)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None, help='سال شمسی (پیش‌فرض: همه سال‌ها)')
+    
+    def handle(self, *args, **options):
+        self.stdout.write('در حال بازسازی دفتر مانده مرخصی...')
+        count = rebuild_leave_balances(options['year'])
+        self.stdout.write(
+            self.style.SUCCESS(f'تکمیل شد! تعداد ردیف‌های دفتر: {count}')
+        )
@@ -0,0 +1,340 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import jdatetime
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from core.models import (
+    Branch, UserProfile, Employee, Attendance, Income, Expense, Loan, LoanBuyer,
+    LoanBuyerStatusHistory, LoanCreditor, LoanCreditorInstallment, ActivityLog,
+)
+from core.financial_reports import rebuild_financial_rollups, invalidate_financial_cache
+from core.attendance_summaries import rebuild_attendance_summaries
+from core.activity_stats import rebuild_activity_stats
+from vekalet.models import Consultation, CaseFile
+
+
+# حجم پایه هر جدول در scale=1 (نزدیک به حجم پروداکشن مورد انتظار)
+BASE_VOLUMES = {
+    'branches': 10,
+    'employees': 200,
+    'incomes': 500_000,
+    'expenses': 500_000,
+    'consultations': 100_000,
+    'case_files': 20_000,
+    'loan_buyers': 50_000,
+    'activity_logs': 1_000_000,
+}
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def explicit_auto_now_add(*fields):
+    """
+    غیرفعال کردن موقت auto_now_add تا تاریخ‌های ساختگی گذشته در bulk_create حفظ شوند
+    """
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    """
+    دستور برای تولید داده ساختگی با حجم بالا برای سنجش کارایی گزارش‌ها
+    خروجی برای یک seed ثابت همیشه یکسان است (قطعی)
+
+    کاربرد:
+        python manage.py seed_synthetic_data
+        python manage.py seed_synthetic_data --scale=0.01 --seed=7
+        python manage.py seed_synthetic_data --incomes=100000 --activity-logs=0
+
+    هشدار: فقط روی دیتابیس توسعه/بنچمارک اجرا شود (در DEBUG=False نیاز به --force دارد)
+    """
+
+    help = 'تولید داده ساختگی قطعی با حجم بالا برای بنچمارک گزارش‌ها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='seed تولید اعداد تصادفی')
+        parser.add_argument('--scale', type=float, default=1.0, help='ضریب حجم پایه تمام جداول')
+        parser.add_argument('--days', type=int, default=730, help='تعداد روزهای گذشته برای پخش تاریخ‌ها')
+        parser.add_argument('--attendance-days', type=int, default=60,
+                            help='تعداد روزهای اخیر حضور و غیاب برای هر کارمند')
+        for name in BASE_VOLUMES:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=None, dest=name,
+                                help=f'تعداد {name} (بازنویسی scale)')
+        parser.add_argument('--force', action='store_true', help='اجرا حتی وقتی DEBUG خاموش است')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('این دستور داده ساختگی می‌سازد؛ در محیط پروداکشن فقط با --force اجرا شود.')
+
+        self.rnd = random.Random(options['seed'])
+        self.seed = options['seed']
+        self.today = date.today()
+        self.days = max(options['days'], 1)
+        volumes = {
+            name: options[name] if options[name] is not None else max(int(base * options['scale']), 1)
+            for name, base in BASE_VOLUMES.items()
+        }
+
+        branches = self.create_branches(max(volumes['branches'], 1))
+        users = self.create_employees(volumes['employees'], branches, options['attendance_days'])
+        self.create_incomes_and_expenses(volumes['incomes'], volumes['expenses'], branches)
+        self.create_consultations(volumes['consultations'], volumes['case_files'], users)
+        self.create_loans(volumes['loan_buyers'], branches, users)
+        self.create_activity_logs(volumes['activity_logs'], users)
+
+        # bulk_create سیگنال ندارد؛ جدول تجمیع و کش گزارش‌ها یک‌جا بازسازی می‌شوند
+        count = rebuild_financial_rollups()
+        invalidate_financial_cache()
+        summaries = rebuild_attendance_summaries()
+        stats = rebuild_activity_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'تکمیل شد! ردیف‌های تجمیع مالی: {count}، خلاصه‌های ماهانه حضور: {summaries}، آمار روزانه فعالیت: {stats}'
+        ))
+
+    # ------------------------------------------------------------------
+    # ابزارها
+    # ------------------------------------------------------------------
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def random_day(self):
+        return self.today - timedelta(days=self.rnd.randrange(self.days))
+
+    def random_datetime(self):
+        return datetime.combine(self.random_day(), time(self.rnd.randint(8, 18), self.rnd.randrange(60)))
+
+    def amount(self, low, high):
+        return Decimal(self.rnd.randint(low, high) * 1000)
+
+    def bulk(self, model, rows, ignore_conflicts=False):
+        """درج دسته‌ای یک مولد ردیف با اندازه دسته ثابت"""
+        batch = []
+        total = 0
+        for row in rows:
+            total += 1
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        self.log(f'{model._meta.verbose_name_plural}: {total}')
+
+    def marker(self, index):
+        """شناسه ۱۰ رقمی یکتا و قطعی برای رکوردهای ساختگی (کد ملی / شماره پرونده)"""
+        return f'9{self.seed % 10}{index:08d}'
+
+    # ------------------------------------------------------------------
+    # تولید داده
+    # ------------------------------------------------------------------
+
+    def create_branches(self, count):
+        existing = Branch.objects.filter(code__startswith=f'SYN{self.seed}-').count()
+        Branch.objects.bulk_create([
+            Branch(
+                name=f'شعبه ساختگی {index + 1}',
+                code=f'SYN{self.seed}-{index + 1}',
+                address='آدرس ساختگی',
+                phone='02100000000',
+                monthly_budget=self.amount(50_000, 500_000),
+            )
+            for index in range(existing, count)
+        ])
+        self.log(f'شعب: {count}')
+        return list(Branch.objects.filter(code__startswith=f'SYN{self.seed}-'))
+
+    def create_employees(self, count, branches, attendance_days):
+        prefix = f'synthetic{self.seed}_'
+        User.objects.bulk_create([
+            User(username=f'{prefix}{index}', first_name='کاربر', last_name=str(index), is_staff=True)
+            for index in range(count)
+        ], ignore_conflicts=True)
+        users = list(User.objects.filter(username__startswith=prefix).order_by('pk'))
+
+        # شماره پرسنلی پروفایل ۴ رقمی است؛ تداخل احتمالی با پروفایل‌های واقعی نادیده گرفته می‌شود
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user, role='employee', display_name=f'کاربر {index}',
+                national_id=self.marker(index), personnel_id=f'{index % 10000:04d}',
+                job_title='کارمند', branch=self.rnd.choice(branches),
+            )
+            for index, user in enumerate(users)
+        ], ignore_conflicts=True)
+        Employee.objects.bulk_create([
+            Employee(
+                user=user, national_id=self.marker(index), personnel_id=f'SYN{self.seed}-{index}',
+                branch=self.rnd.choice(branches), employment_status='active',
+            )
+            for index, user in enumerate(users)
+        ], ignore_conflicts=True)
+        self.log(f'کارمندان: {len(users)}')
+
+        employees = list(Employee.objects.filter(user__in=users))
+
+        def attendance_rows():
+            for offset in range(attendance_days):
+                day = self.today - timedelta(days=offset)
+                for employee in employees:
+                    if self.rnd.random() < 0.1:
+                        yield Attendance(employee=employee, date=day, status='absent')
+                        continue
+                    check_in = time(self.rnd.randint(7, 9), self.rnd.randrange(60))
+                    check_out = time(self.rnd.randint(15, 19), self.rnd.randrange(60))
+                    minutes = (check_out.hour * 60 + check_out.minute) - (check_in.hour * 60 + check_in.minute)
+                    yield Attendance(
+                        employee=employee, date=day, check_in=check_in, check_out=check_out,
+                        work_duration=minutes, overtime_duration=max(minutes - 480, 0), status='present',
+                    )
+
+        self.bulk(Attendance, attendance_rows(), ignore_conflicts=True)
+        return users
+
+    def create_incomes_and_expenses(self, incomes, expenses, branches):
+        branch_choices = branches + [None]
+
+        def rows(model, count):
+            for index in range(count):
+                yield model(
+                    title=f'{model._meta.verbose_name} ساختگی {index}',
+                    amount=self.amount(100, 50_000),
+                    registration_date=jdatetime.date.fromgregorian(date=self.random_day()),
+                    branch=self.rnd.choice(branch_choices),
+                )
+
+        self.bulk(Income, rows(Income, incomes))
+        self.bulk(Expense, rows(Expense, expenses))
+
+    def create_consultations(self, consultations, case_files, users):
+        lawyers = users[:max(len(users) // 10, 1)] or [None]
+
+        def consultation_rows():
+            for index in range(consultations):
+                fee = self.amount(500, 5_000)
+                yield Consultation(
+                    client_name=f'مراجع {index}', client_phone='09120000000',
+                    consultation_subject='موضوع ساختگی', consultation_date=self.random_datetime(),
+                    assigned_lawyer=self.rnd.choice(lawyers), consultation_fee=fee,
+                    payment_status=self.rnd.choice(['paid', 'paid', 'partial', 'unpaid', 'free']),
+                    amount_paid=fee / 2,
+                )
+
+        def case_rows():
+            for index in range(case_files):
+                yield CaseFile(
+                    case_number=f'SYN{self.seed}-{index}', title='پرونده ساختگی', client_name=f'موکل {index}',
+                    case_start_date=self.random_day(), contract_amount=self.amount(5_000, 200_000),
+                    assigned_lawyer=self.rnd.choice(lawyers),
+                )
+
+        self.bulk(Consultation, consultation_rows())
+        self.bulk(CaseFile, case_rows(), ignore_conflicts=True)
+
+    def create_loans(self, buyers, branches, users):
+        """وام، خریدار، تاریخچه وضعیت، بستانکار و اقساط (حدود ۴۰٪ خریداران تکمیل‌شده)"""
+        statuses = [status for status, _ in LoanBuyer.STATUS_CHOICES]
+        prefix = f'SYN{self.seed}'
+        if Loan.objects.filter(referrer=prefix).exists():
+            self.log(self.style.WARNING(f'وام‌های ساختگی seed={self.seed} از قبل وجود دارند؛ رد شد'))
+            return
+
+        plans = []
+        for index in range(buyers):
+            completed = self.rnd.random() < 0.4
+            plans.append({
+                'index': index,
+                'created': self.random_datetime(),
+                'branch': self.rnd.choice(branches),
+                'purchase_rate': self.amount(10_000, 100_000),
+                'status': 'completed' if completed else self.rnd.choice(statuses[:-1]),
+            })
+
+        created_at = Loan._meta.get_field('created_at'), LoanBuyer._meta.get_field('created_at')
+        with explicit_auto_now_add(*created_at):
+            self.bulk(Loan, (
+                Loan(
+                    bank_name='بانک ساختگی', amount=plan['purchase_rate'] * 2, purchase_rate=plan['purchase_rate'],
+                    branch=plan['branch'], referrer=prefix, applicant_national_id=self.marker(plan['index']),
+                    status='purchased' if plan['status'] == 'completed' else 'available',
+                    created_at=plan['created'], updated_at=plan['created'],
+                )
+                for plan in plans
+            ))
+            loans = dict(Loan.objects.filter(referrer=prefix).values_list('applicant_national_id', 'pk'))
+
+            self.bulk(LoanBuyer, (
+                LoanBuyer(
+                    first_name='خریدار', last_name=str(plan['index']), national_id=self.marker(plan['index']),
+                    loan_id=loans[self.marker(plan['index'])], bank='بانک ساختگی',
+                    sale_price=plan['purchase_rate'] + self.amount(1_000, 20_000),
+                    current_status=plan['status'], created_at=plan['created'], updated_at=plan['created'],
+                )
+                for plan in plans
+            ))
+        buyer_ids = dict(LoanBuyer.objects.filter(loan__referrer=prefix).values_list('national_id', 'pk'))
+
+        def history_rows():
+            for plan in plans:
+                steps = statuses[:statuses.index(plan['status']) + 1][-self.rnd.randint(1, 4):]
+                for step in steps:
+                    yield LoanBuyerStatusHistory(
+                        loan_buyer_id=buyer_ids[self.marker(plan['index'])], status=step,
+                        status_date=jdatetime.date.fromgregorian(date=plan['created'].date()),
+                    )
+
+        self.bulk(LoanBuyerStatusHistory, history_rows())
+
+        completed = [plan for plan in plans if plan['status'] == 'completed']
+        self.bulk(LoanCreditor, (
+            LoanCreditor(
+                first_name='بستانکار', last_name=str(plan['index']), national_id=self.marker(plan['index']),
+                loan_id=loans[self.marker(plan['index'])], total_amount=plan['purchase_rate'],
+                payment_type='installment', installment_count=3, branch=plan['branch'],
+                recorded_by=self.rnd.choice(users) if users else None,
+            )
+            for plan in completed
+        ))
+        creditors = dict(LoanCreditor.objects.filter(loan__referrer=prefix).values_list('national_id', 'pk'))
+
+        def installment_rows():
+            for plan in completed:
+                for number in range(1, 4):
+                    due = plan['created'].date() + timedelta(days=30 * number)
+                    paid = due <= self.today and self.rnd.random() < 0.8
+                    yield LoanCreditorInstallment(
+                        creditor_id=creditors[self.marker(plan['index'])], installment_number=number,
+                        paid_amount=plan['purchase_rate'] / 3,
+                        due_date=jdatetime.date.fromgregorian(date=due),
+                        payment_date=jdatetime.date.fromgregorian(date=due) if paid else None,
+                        status='paid' if paid else 'unpaid',
+                    )
+
+        self.bulk(LoanCreditorInstallment, installment_rows())
+
+    def create_activity_logs(self, count, users):
+        actions = [action for action, _ in ActivityLog.ACTION_CHOICES]
+        content_types = ['Income', 'Expense', 'Attendance', 'LoanBuyer', 'Employee', 'Branch']
+        user_choices = users or [None]
+
+        def rows():
+            for index in range(count):
+                timestamp = self.random_datetime()
+                yield ActivityLog(
+                    user=self.rnd.choice(user_choices), action=self.rnd.choice(actions),
+                    content_type=self.rnd.choice(content_types), object_id=str(self.rnd.randint(1, 100_000)),
+                    object_description=f'رکورد ساختگی {index}',
+                    timestamp=jdatetime.datetime.fromgregorian(datetime=timestamp),
+                )
+
+        self.bulk(ActivityLog, rows())
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_alter_employee_hire_date_alter_userprofile_hire_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='سال (شمسی)')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='ماه (شمسی)')),
+                ('metric', models.CharField(choices=[('base_income', 'درآمد ثبت\u200cشده'), ('consultation_income', 'درآمد مشاورات'), ('case_income', 'درآمد پرونده\u200cها'), ('registry_trade_acquisition', 'درآمد بازرگانی اخذ'), ('registry_trade_partnership', 'درآمد بازرگانی مشارکتی'), ('registry_company', 'درآمد شرکت\u200cها'), ('registry_license', 'درآمد مجوزها'), ('expense', 'هزینه\u200cها'), ('creditor_paid', 'بستانکاری پرداخت\u200cشده'), ('creditor_unpaid', 'بستانکاری معوق'), ('loan_sale_profit', 'سود فروش وام')], max_length=50, verbose_name='متریک')),
+                ('branch_key', models.PositiveIntegerField(default=0, editable=False, verbose_name='کلید شعبه')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='مبلغ')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخرین به\u200cروزرسانی')),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollups', to='core.branch', verbose_name='شعبه')),
+            ],
+            options={
+                'verbose_name': 'تجمیع ماهانه مالی',
+                'verbose_name_plural': 'تجمیع\u200cهای ماهانه مالی',
+                'ordering': ['-year', '-month', 'metric'],
+                'unique_together': {('year', 'month', 'branch_key', 'metric')},
+            },
+        ),
+    ]
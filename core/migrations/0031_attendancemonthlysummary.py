@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_financialmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='سال (شمسی)')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='ماه (شمسی)')),
+                ('total_work_minutes', models.PositiveIntegerField(default=0, verbose_name='مجموع کارکرد (دقیقه)')),
+                ('total_overtime_minutes', models.PositiveIntegerField(default=0, verbose_name='مجموع اضافه\u200cکاری (دقیقه)')),
+                ('present_days', models.PositiveSmallIntegerField(default=0, verbose_name='روزهای حضور')),
+                ('absent_days', models.PositiveSmallIntegerField(default=0, verbose_name='روزهای غیبت')),
+                ('late_days', models.PositiveSmallIntegerField(default=0, verbose_name='روزهای تاخیر')),
+                ('leave_days', models.PositiveSmallIntegerField(default=0, verbose_name='روزهای مرخصی')),
+                ('early_leave_days', models.PositiveSmallIntegerField(default=0, verbose_name='روزهای خروج زودهنگام')),
+                ('incomplete_days', models.PositiveSmallIntegerField(default=0, verbose_name='روزهای ناقص')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخرین به\u200cروزرسانی')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='core.employee', verbose_name='کارمند')),
+            ],
+            options={
+                'verbose_name': 'خلاصه ماهانه حضور و غیاب',
+                'verbose_name_plural': 'خلاصه\u200cهای ماهانه حضور و غیاب',
+                'ordering': ['-year', '-month', 'employee'],
+                'indexes': [models.Index(fields=['year', 'month'], name='core_attend_year_e3b834_idx')],
+                'unique_together': {('employee', 'year', 'month')},
+            },
+        ),
+    ]
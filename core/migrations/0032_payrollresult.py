@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_attendancemonthlysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='سال (شمسی)')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='ماه (شمسی)')),
+                ('base_salary', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='حقوق پایه')),
+                ('work_minutes', models.PositiveIntegerField(default=0, verbose_name='کارکرد (دقیقه)')),
+                ('overtime_minutes', models.PositiveIntegerField(default=0, verbose_name='اضافه\u200cکاری قابل پرداخت (دقیقه)')),
+                ('paid_leave_hours', models.FloatField(default=0, verbose_name='مرخصی با حقوق (ساعت)')),
+                ('unpaid_leave_hours', models.FloatField(default=0, verbose_name='مرخصی بدون حقوق (ساعت)')),
+                ('overtime_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='مبلغ اضافه\u200cکاری')),
+                ('leave_deduction', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='کسر مرخصی')),
+                ('net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='خالص پرداختی')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='زمان محاسبه')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payroll_results', to='core.employee', verbose_name='کارمند')),
+            ],
+            options={
+                'verbose_name': 'حقوق ماهانه',
+                'verbose_name_plural': 'حقوق\u200cهای ماهانه',
+                'ordering': ['-year', '-month', 'employee'],
+                'indexes': [models.Index(fields=['year', 'month'], name='core_payrol_year_d3efc3_idx')],
+                'unique_together': {('employee', 'year', 'month')},
+            },
+        ),
+    ]
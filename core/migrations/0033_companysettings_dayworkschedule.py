@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:46
+
+from datetime import time
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_company_settings(apps, schema_editor):
+    """تنظیمات پیش‌فرض و جدول کاری هفت روز (شنبه تا چهارشنبه باز، پنج‌شنبه و جمعه بسته)"""
+    CompanySettings = apps.get_model('core', 'CompanySettings')
+    DayWorkSchedule = apps.get_model('core', 'DayWorkSchedule')
+
+    settings, _ = CompanySettings.objects.get_or_create(pk=1)
+    for day_of_week in range(7):
+        DayWorkSchedule.objects.get_or_create(
+            company_settings=settings,
+            day_of_week=day_of_week,
+            defaults={
+                'work_status': 'closed' if day_of_week >= 5 else 'open',
+                'work_start_range_start': time(7, 0),
+                'work_start_range_end': time(8, 0),
+                'work_end': time(17, 0),
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_payrollresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanySettings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('standard_work_minutes', models.PositiveIntegerField(default=480, verbose_name='ساعات کاری روزانه (دقیقه)')),
+                ('max_daily_overtime', models.PositiveIntegerField(default=120, verbose_name='حداکثر اضافه\u200cکاری روزانه (دقیقه)')),
+                ('max_monthly_overtime', models.PositiveIntegerField(default=2400, verbose_name='حداکثر اضافه\u200cکاری ماهانه (دقیقه)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخرین به\u200cروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'تنظیمات شرکت',
+                'verbose_name_plural': 'تنظیمات شرکت',
+            },
+        ),
+        migrations.CreateModel(
+            name='DayWorkSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.IntegerField(choices=[(0, 'شنبه'), (1, 'یکشنبه'), (2, 'دوشنبه'), (3, 'سه\u200cشنبه'), (4, 'چهارشنبه'), (5, 'پنج\u200cشنبه'), (6, 'جمعه')], verbose_name='روز هفته')),
+                ('work_status', models.CharField(choices=[('open', 'باز'), ('closed', 'بسته')], default='open', max_length=10, verbose_name='وضعیت کاری')),
+                ('work_start_range_start', models.TimeField(default='07:00', verbose_name='شروع بازه حضور (مثال: 7:00)')),
+                ('work_start_range_end', models.TimeField(default='08:00', verbose_name='پایان بازه حضور (مثال: 8:00)')),
+                ('work_end', models.TimeField(default='17:00', verbose_name='ساعت پایان کاری')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخرین به\u200cروزرسانی')),
+                ('company_settings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_schedules', to='core.companysettings', verbose_name='تنظیمات شرکت')),
+            ],
+            options={
+                'verbose_name': 'جدول کاری روزانه',
+                'verbose_name_plural': 'جداول کاری روزانه',
+                'ordering': ['day_of_week'],
+                'unique_together': {('company_settings', 'day_of_week')},
+            },
+        ),
+        migrations.RunPython(populate_company_settings, migrations.RunPython.noop),
+    ]
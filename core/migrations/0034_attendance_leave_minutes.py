@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_companysettings_dayworkschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='leave_minutes',
+            field=models.PositiveIntegerField(default=0, verbose_name='مرخصی ساعتی (دقیقه)'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_attendance_leave_minutes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='سال (شمسی)')),
+                ('leave_type', models.CharField(choices=[('annual', 'مرخصی سالانه'), ('sick', 'مرخصی بیماری'), ('personal', 'مرخصی شخصی'), ('maternity', 'مرخصی زایمان'), ('paternity', 'مرخصی پدری'), ('unpaid', 'مرخصی بدون\u200cحقوق'), ('half_day', 'نیم\u200cروز')], max_length=20, verbose_name='نوع مرخصی')),
+                ('entitlement_days', models.FloatField(default=0, verbose_name='استحقاق (روز)')),
+                ('used_days', models.FloatField(default=0, verbose_name='مصرف روزانه (روز)')),
+                ('used_hours', models.FloatField(default=0, verbose_name='مصرف ساعتی (ساعت)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخرین به\u200cروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'مانده مرخصی',
+                'verbose_name_plural': 'مانده\u200cهای مرخصی',
+                'ordering': ['-year', 'employee', 'leave_type'],
+            },
+        ),
+        migrations.AddField(
+            model_name='companysettings',
+            name='annual_leave_days',
+            field=models.PositiveSmallIntegerField(default=26, verbose_name='مرخصی استحقاقی سالانه (روز)'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'start_date', 'end_date'], name='leave_employee_span_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leave',
+            index=models.Index(fields=['employee', 'date'], name='leave_employee_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='leavebalance',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='core.employee', verbose_name='کارمند'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leavebalance',
+            unique_together={('employee', 'year', 'leave_type')},
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:53
+
+from django.db import migrations
+import django_jalali.db.models
+import jdatetime
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_leavebalance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='timestamp',
+            field=django_jalali.db.models.jDateTimeField(default=jdatetime.datetime.now, editable=False, verbose_name='تاریخ و زمان ایجاد'),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:56
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+BRANCH_MODELS = ('Income', 'Expense')
+
+
+def clear_empty_details(apps, schema_editor):
+    """رشته خالی JSON معتبر نیست و تبدیل ستون به JSON را (در MySQL) متوقف می‌کند"""
+    ActivityLog = apps.get_model('core', 'ActivityLog')
+    ActivityLog.objects.filter(details='').update(details=None)
+
+
+def _amount(value):
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01')) if value is not None else None
+    except InvalidOperation:
+        return None
+
+
+def backfill_promoted_details(apps, schema_editor):
+    """
+    پر کردن ستون‌های جدید برای لاگ‌های موجود
+    amount و creditor_id از details؛ branch_id (که قبلاً فقط نام شعبه ذخیره می‌شد) از رکورد اصلی
+    """
+    ActivityLog = apps.get_model('core', 'ActivityLog')
+    logs = (
+        ActivityLog.objects.filter(details__isnull=False)
+        .only('id', 'content_type', 'object_id', 'details')
+        .order_by('id')
+    )
+    last_id = 0
+    while True:
+        batch = list(logs.filter(id__gt=last_id)[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        branch_ids = {}
+        for model_name in BRANCH_MODELS:
+            object_ids = [
+                int(log.object_id) for log in batch
+                if log.content_type == model_name and log.object_id and log.object_id.isdigit()
+            ]
+            if object_ids:
+                Model = apps.get_model('core', model_name)
+                for pk, branch_id in Model.objects.filter(pk__in=object_ids).values_list('pk', 'branch_id'):
+                    branch_ids[model_name, str(pk)] = branch_id
+
+        changed = []
+        for log in batch:
+            details = log.details if isinstance(log.details, dict) else {}
+            log.amount = _amount(details.get('amount'))
+            log.creditor_id = details.get('creditor_id')
+            log.branch_id = branch_ids.get((log.content_type, log.object_id))
+            if log.amount is not None or log.creditor_id is not None or log.branch_id is not None:
+                changed.append(log)
+        ActivityLog.objects.bulk_update(changed, ['amount', 'creditor_id', 'branch_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_activitylog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_empty_details, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='activitylog',
+            name='amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True, verbose_name='مبلغ'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='branch_id',
+            field=models.IntegerField(blank=True, null=True, verbose_name='شناسه شعبه'),
+        ),
+        migrations.AddField(
+            model_name='activitylog',
+            name='creditor_id',
+            field=models.IntegerField(blank=True, null=True, verbose_name='شناسه بستانکار'),
+        ),
+        migrations.AlterField(
+            model_name='activitylog',
+            name='details',
+            field=models.JSONField(blank=True, help_text='تغییرات انجام\u200cشده به فرمت JSON', null=True, verbose_name='جزئیات تغییرات'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['content_type', 'object_id', '-timestamp'], name='activitylog_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['branch_id', '-timestamp'], name='activitylog_branch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['creditor_id', '-timestamp'], name='activitylog_creditor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['amount'], name='activitylog_amount_idx'),
+        ),
+        migrations.RunPython(backfill_promoted_details, migrations.RunPython.noop),
+    ]
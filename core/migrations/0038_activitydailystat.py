@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+import django_jalali.db.models
+import jdatetime
+
+
+def populate_activity_stats(apps, schema_editor):
+    """آمار روزانه لاگ‌های موجود با یک کوئری GROUP BY (مانند rebuild_activity_stats)"""
+    ActivityLog = apps.get_model('core', 'ActivityLog')
+    ActivityDailyStat = apps.get_model('core', 'ActivityDailyStat')
+
+    counts = {}
+    rows = (
+        ActivityLog.objects.annotate(day=TruncDate('timestamp')).order_by()
+        .values('day', 'action', 'content_type', 'user_id').annotate(count=models.Count('id'))
+    )
+    for row in rows:
+        # NULL و '' در content_type یک گروه‌اند؛ لاگ‌های بدون کاربر با user_key=0
+        key = (row['day'], row['action'], row['content_type'] or '', row['user_id'] or 0)
+        counts[key] = counts.get(key, 0) + row['count']
+    ActivityDailyStat.objects.bulk_create(
+        [
+            ActivityDailyStat(
+                day=jdatetime.date.fromgregorian(date=day), action=action, content_type=content_type,
+                user_id=user_key or None, user_key=user_key, count=count,
+            )
+            for (day, action, content_type, user_key), count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0037_activitylog_structured_details'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', django_jalali.db.models.jDateField(verbose_name='روز')),
+                ('action', models.CharField(choices=[('create', 'ایجاد'), ('update', 'ویرایش'), ('delete', 'حذف'), ('login', 'ورود به سیستم'), ('logout', 'خروج از سیستم'), ('download', 'دانلود'), ('export', 'صادرات'), ('import', 'واردات'), ('other', 'سایر')], max_length=50, verbose_name='عملیات')),
+                ('content_type', models.CharField(blank=True, default='', max_length=100, verbose_name='نوع مدل')),
+                ('user_key', models.PositiveIntegerField(default=0, editable=False, verbose_name='کلید کاربر')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='تعداد')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخرین به\u200cروزرسانی')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='activity_daily_stats', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'آمار روزانه فعالیت',
+                'verbose_name_plural': 'آمار روزانه فعالیت\u200cها',
+                'ordering': ['-day', 'action', 'content_type'],
+                'indexes': [models.Index(fields=['user', 'day'], name='core_activi_user_id_562561_idx')],
+                'unique_together': {('day', 'action', 'content_type', 'user_key')},
+            },
+        ),
+        migrations.RunPython(populate_activity_stats, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django_jalali.db import models as jmodels
+import jdatetime
 import random
 import string
 import threading
@@ -307,6 +308,67 @@ class Employee(models.Model):
         return f"{self.user.first_name} {self.user.last_name} - {self.get_job_title_display()}"
 
 
+class CompanySettings(models.Model):
+    """تنظیمات شرکت - ساعات کاری استاندارد و سقف‌های اضافه‌کاری (تک‌ردیفی)"""
+    standard_work_minutes = models.PositiveIntegerField(default=480, verbose_name='ساعات کاری روزانه (دقیقه)')
+    max_daily_overtime = models.PositiveIntegerField(default=120, verbose_name='حداکثر اضافه‌کاری روزانه (دقیقه)')
+    max_monthly_overtime = models.PositiveIntegerField(default=2400, verbose_name='حداکثر اضافه‌کاری ماهانه (دقیقه)')
+    annual_leave_days = models.PositiveSmallIntegerField(default=26, verbose_name='مرخصی استحقاقی سالانه (روز)')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخرین به‌روزرسانی')
+
+    class Meta:
+        verbose_name = "تنظیمات شرکت"
+        verbose_name_plural = "تنظیمات شرکت"
+
+    def __str__(self):
+        return "تنظیمات شرکت"
+
+    def get_day_schedule(self, day_of_week):
+        """جدول کاری یک روز هفته (0=شنبه)"""
+        return self.day_schedules.filter(day_of_week=day_of_week).first()
+
+
+class DayWorkSchedule(models.Model):
+    """جدول کاری روزانه - وضعیت باز/بسته و بازه حضور هر روز هفته"""
+    DAY_OF_WEEK_CHOICES = (
+        (0, 'شنبه'),
+        (1, 'یکشنبه'),
+        (2, 'دوشنبه'),
+        (3, 'سه‌شنبه'),
+        (4, 'چهارشنبه'),
+        (5, 'پنج‌شنبه'),
+        (6, 'جمعه'),
+    )
+
+    WORK_STATUS_CHOICES = (
+        ('open', 'باز'),
+        ('closed', 'بسته'),
+    )
+
+    company_settings = models.ForeignKey(CompanySettings, on_delete=models.CASCADE, related_name='day_schedules',
+                                         verbose_name='تنظیمات شرکت')
+    day_of_week = models.IntegerField(choices=DAY_OF_WEEK_CHOICES, verbose_name='روز هفته')
+    work_status = models.CharField(max_length=10, choices=WORK_STATUS_CHOICES, default='open', verbose_name='وضعیت کاری')
+
+    # بازه مجاز ورود و ساعت پایان کار
+    work_start_range_start = models.TimeField(default='07:00', verbose_name='شروع بازه حضور (مثال: 7:00)')
+    work_start_range_end = models.TimeField(default='08:00', verbose_name='پایان بازه حضور (مثال: 8:00)')
+    work_end = models.TimeField(default='17:00', verbose_name='ساعت پایان کاری')
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخرین به‌روزرسانی')
+
+    class Meta:
+        verbose_name = "جدول کاری روزانه"
+        verbose_name_plural = "جداول کاری روزانه"
+        ordering = ['day_of_week']
+        unique_together = ('company_settings', 'day_of_week')
+
+    def __str__(self):
+        return f"{self.get_day_of_week_display()} ({self.get_work_status_display()})"
+
+
 class Attendance(models.Model):
     """حضور و غیاب - سیستم جامع ورود و خروج"""
     STATUS_CHOICES = (
@@ -328,6 +390,8 @@ class Attendance(models.Model):
     # مدت زمان (بر حسب دقیقه)
     work_duration = models.IntegerField(blank=True, null=True, verbose_name='مدت زمان کار (دقیقه)')
     overtime_duration = models.IntegerField(blank=True, null=True, default=0, verbose_name='مدت اضافه‌کاری (دقیقه)')
+    # مجموع مرخصی‌های ساعتی تاییدشده این روز (از ساعات کاری لازم کسر می‌شود)
+    leave_minutes = models.PositiveIntegerField(default=0, verbose_name='مرخصی ساعتی (دقیقه)')
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='absent', verbose_name='وضعیت')
     notes = models.TextField(blank=True, null=True, verbose_name='یادداشت‌ها')
@@ -361,27 +425,32 @@ class Attendance(models.Model):
     
     def update_status_from_login(self):
         """به‌روزرسانی وضعیت بر اساس آخرین ورود کاربر امروز"""
-        from django.utils import timezone
-        from django.db.models import Q
         
         # اگر وضعیت مرخصی باشد، تغییر ندهید
         if self.status == 'leave':
             return
         
         # بررسی آخرین ورود کاربر در این روز
-        last_login = self.employee.user.last_login
+        status, check_in = self.status_from_login(self.employee.user.last_login, self.date)
+        if check_in:
+            self.check_in = check_in
+        self.status = status
+    
+    @staticmethod
+    def status_from_login(last_login, day):
+        """
+        وضعیت و ساعت ورود یک روز بر اساس آخرین ورود کاربر (بدون کوئری)
+        خروجی: (status, check_in) - check_in فقط برای حاضر مقدار دارد
+        """
+        from django.utils import timezone
         
         if last_login:
             login_date = last_login.date() if hasattr(last_login, 'date') else last_login
             
-            if login_date == self.date:
+            if login_date == day:
                 login_time = last_login.time() if hasattr(last_login, 'time') else timezone.now().time()
-                self.check_in = login_time
-                self.status = 'present'
-            else:
-                self.status = 'absent'
-        else:
-            self.status = 'absent'
+                return 'present', login_time
+        return 'absent', None
     
     def calculate_work_duration(self):
         """محاسبه مدت زمان کار و اضافه‌کاری"""
@@ -401,13 +470,15 @@ class Attendance(models.Model):
             work_seconds = (check_out_dt - check_in_dt).total_seconds()
             self.work_duration = int(work_seconds / 60)
             
-            # استاندارد 8 ساعت کاری در روز
-            standard_hours = 480  # 8 * 60 minutes
-            
-            # محاسبه اضافه‌کاری
-            if self.work_duration > standard_hours:
-                overtime = self.work_duration - standard_hours
-                self.overtime_duration = min(overtime, 120)  # max 2 hours per day
+            # ساعات کاری استاندارد و سقف اضافه‌کاری روزانه از تنظیمات شرکت (کش process)
+            from .work_schedule import get_work_schedule
+            schedule = get_work_schedule()
+
+            # محاسبه اضافه‌کاری (مرخصی ساعتی از ساعات کاری لازم کسر می‌شود)
+            required_minutes = max(schedule.standard_work_minutes - (self.leave_minutes or 0), 0)
+            if self.work_duration > required_minutes:
+                overtime = self.work_duration - required_minutes
+                self.overtime_duration = min(overtime, schedule.max_daily_overtime)
             else:
                 self.overtime_duration = 0
             
@@ -447,15 +518,23 @@ class ActivityLog(models.Model):
     object_id = models.CharField(max_length=100, verbose_name="شناسه رکورد", blank=True, null=True)
     object_description = models.CharField(max_length=500, verbose_name="توضیح رکورد", blank=True, null=True)
     
+    # کلیدهایی از details که به ستون‌های ایندکس‌دار هم منتقل می‌شوند (create_activity_log)
+    PROMOTED_DETAIL_KEYS = ('branch_id', 'amount', 'creditor_id')
+    
     # جزئیات تغییرات (JSON)
-    details = models.TextField(verbose_name="جزئیات تغییرات", blank=True, null=True,
-                              help_text="تغییرات انجام‌شده به فرمت JSON")
+    details = models.JSONField(verbose_name="جزئیات تغییرات", blank=True, null=True,
+                               help_text="تغییرات انجام‌شده به فرمت JSON")
+    
+    # ستون‌های پرجستجوی جزئیات (بدون کلید خارجی تا لاگ پس از حذف رکورد اصلی باقی بماند)
+    branch_id = models.IntegerField(verbose_name="شناسه شعبه", blank=True, null=True)
+    amount = models.DecimalField(max_digits=18, decimal_places=2, verbose_name="مبلغ", blank=True, null=True)
+    creditor_id = models.IntegerField(verbose_name="شناسه بستانکار", blank=True, null=True)
     
     # معلومات فنی
     ip_address = models.GenericIPAddressField(verbose_name="آدرس IP", blank=True, null=True)
     
-    # تاریخ و زمان (شمسی)
-    timestamp = jmodels.jDateTimeField(auto_now_add=True, verbose_name="تاریخ و زمان ایجاد")
+    # تاریخ و زمان (شمسی) - زمان رویداد هنگام ساخت رکورد (نه زمان نوشتن دسته‌ای در core.activity_log)
+    timestamp = jmodels.jDateTimeField(default=jdatetime.datetime.now, editable=False, verbose_name="تاریخ و زمان ایجاد")
     
     class Meta:
         verbose_name = "لاگ فعالیت"
@@ -465,12 +544,44 @@ class ActivityLog(models.Model):
             models.Index(fields=['-timestamp']),
             models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['action', '-timestamp']),
+            # تاریخچه یک رکورد: content_type + object_id به ترتیب زمان
+            models.Index(fields=['content_type', 'object_id', '-timestamp'], name='activitylog_object_idx'),
+            models.Index(fields=['branch_id', '-timestamp'], name='activitylog_branch_idx'),
+            models.Index(fields=['creditor_id', '-timestamp'], name='activitylog_creditor_idx'),
+            models.Index(fields=['amount'], name='activitylog_amount_idx'),
         ]
     
     def __str__(self):
         return f"{self.user} - {self.get_action_display()} - {self.timestamp}"
 
 
+class ActivityDailyStat(models.Model):
+    """تعداد روزانه لاگ‌های فعالیت به ازای عملیات، نوع مدل و کاربر (پایه آمار فعالیت داشبورد)"""
+    day = jmodels.jDateField(verbose_name="روز")
+    action = models.CharField(max_length=50, choices=ActivityLog.ACTION_CHOICES, verbose_name="عملیات")
+    # رشته خالی به جای NULL تا کلید یکتا معتبر بماند
+    content_type = models.CharField(max_length=100, blank=True, default='', verbose_name="نوع مدل")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='activity_daily_stats', verbose_name="کاربر")
+    # کلید یکتای کاربر: شناسه کاربر یا 0 برای لاگ‌های بدون کاربر (سیستم، ورود ناموفق)
+    # (NULL در کلید یکتا تکرار را مجاز می‌کند؛ با حذف کاربر هم ردیف‌هایش با ردیف‌های بدون کاربر یکی نمی‌شوند)
+    user_key = models.PositiveIntegerField(default=0, editable=False, verbose_name="کلید کاربر")
+    count = models.PositiveIntegerField(default=0, verbose_name="تعداد")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخرین به‌روزرسانی')
+
+    class Meta:
+        verbose_name = "آمار روزانه فعالیت"
+        verbose_name_plural = "آمار روزانه فعالیت‌ها"
+        ordering = ['-day', 'action', 'content_type']
+        unique_together = ('day', 'action', 'content_type', 'user_key')
+        indexes = [
+            models.Index(fields=['user', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day.strftime('%Y/%m/%d')} - {self.get_action_display()} - {self.content_type} - {self.count}"
+
+
 class Leave(models.Model):
     """مدل مرخصی - درخواست مرخصی کارمندان و وکیلا"""
     LEAVE_TYPE_CHOICES = (
@@ -530,6 +641,11 @@ class Leave(models.Model):
         verbose_name = "مرخصی"
         verbose_name_plural = "مرخصی‌ها"
         ordering = ['-created_at']
+        indexes = [
+            # بررسی هم‌پوشانی بازه‌ها: start_date <= پایان و end_date >= شروع برای یک کارمند
+            models.Index(fields=['employee', 'start_date', 'end_date'], name='leave_employee_span_idx'),
+            models.Index(fields=['employee', 'date'], name='leave_employee_date_idx'),
+        ]
     
     def __str__(self):
         if self.duration_type == 'hourly':
@@ -553,13 +669,69 @@ class Leave(models.Model):
             return delta.total_seconds() / 3600  # تبدیل به ساعت
         return 0
     
-    def save(self, *args, **kwargs):
-        """محاسبه خودکار مدت مرخصی"""
+    def update_duration(self):
+        """محاسبه مدت مرخصی (روز یا ساعت)"""
         if self.duration_type == 'daily' and self.start_date and self.end_date:
             self.duration_days = self.get_duration_display()
         elif self.duration_type == 'hourly' and self.start_time and self.end_time:
             self.duration_hours = self.get_duration_display()
-        super().save(*args, **kwargs)
+    
+    def clean(self):
+        """بررسی هم‌پوشانی با مرخصی‌های دیگر و مانده مرخصی کارمند"""
+        from .leaves import validate_leave_request
+        
+        if self.employee_id:
+            self.update_duration()
+            validate_leave_request(self)
+    
+    def save(self, *args, **kwargs):
+        """محاسبه خودکار مدت مرخصی + ثبت/بازگرداندن رکوردهای حضور و مانده مرخصی در تایید یا لغو"""
+        from django.db import transaction
+        from .leaves import leave_span, sync_leave_attendance, update_leave_balances
+        
+        self.update_duration()
+        previous = leave_span(Leave.objects.filter(pk=self.pk).first()) if self.pk else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            current = leave_span(self)
+            sync_leave_attendance(previous, current)
+            update_leave_balances(previous, current)
+    
+    def delete(self, *args, **kwargs):
+        """حذف مرخصی تاییدشده رکوردهای حضور و مانده مرخصی آن را برمی‌گرداند"""
+        from django.db import transaction
+        from .leaves import leave_span, sync_leave_attendance, update_leave_balances
+        
+        previous = leave_span(self)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            sync_leave_attendance(previous, None)
+            update_leave_balances(previous, None)
+        return result
+
+
+class LeaveBalance(models.Model):
+    """دفتر مانده مرخصی - استحقاق و مصرف هر کارمند به ازای سال شمسی و نوع مرخصی"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_balances',
+                                 verbose_name='کارمند')
+    year = models.PositiveSmallIntegerField(verbose_name="سال (شمسی)")
+    leave_type = models.CharField(max_length=20, choices=Leave.LEAVE_TYPE_CHOICES, verbose_name='نوع مرخصی')
+    
+    # استحقاق (فقط برای انواع دارای سقف) و مصرف مرخصی‌های تاییدشده
+    entitlement_days = models.FloatField(default=0, verbose_name='استحقاق (روز)')
+    used_days = models.FloatField(default=0, verbose_name='مصرف روزانه (روز)')
+    used_hours = models.FloatField(default=0, verbose_name='مصرف ساعتی (ساعت)')
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخرین به‌روزرسانی')
+    
+    class Meta:
+        verbose_name = "مانده مرخصی"
+        verbose_name_plural = "مانده‌های مرخصی"
+        ordering = ['-year', 'employee', 'leave_type']
+        unique_together = ('employee', 'year', 'leave_type')
+    
+    def __str__(self):
+        return f"{self.employee} - {self.year} ({self.get_leave_type_display()})"
 
 
 class ActivityReport(models.Model):
@@ -813,6 +985,36 @@ class Loan(models.Model):
         super().save(*args, **kwargs)
 
 
+class LoanBuyerQuerySet(models.QuerySet):
+    """کوئری‌ست خریداران وام - محاسبه سود فروش در دیتابیس"""
+    
+    # خریدارانی که سود فروش آن‌ها در گزارش‌ها لحاظ می‌شود
+    PROFIT_CONDITION = (
+        models.Q(current_status='completed', loan__isnull=False)
+        & ~models.Q(loan__purchase_rate__isnull=True) & ~models.Q(loan__purchase_rate=0)
+        & ~models.Q(sale_price__isnull=True) & ~models.Q(sale_price=0)
+    )
+    
+    def with_profit(self):
+        """
+        افزودن فیلد profit (قیمت فروش - قیمت خرید وام) به هر ردیف
+        برای خریداران تکمیل‌نشده یا بدون قیمت، مقدار profit برابر None است
+        """
+        return self.annotate(profit=models.Case(
+            models.When(self.PROFIT_CONDITION, then=models.F('sale_price') - models.F('loan__purchase_rate')),
+            default=None,
+            output_field=models.DecimalField(max_digits=15, decimal_places=2),
+        ))
+    
+    def profitable(self):
+        """فقط خریدارانی که سود فروش دارند (همراه با فیلد profit)"""
+        return self.with_profit().filter(self.PROFIT_CONDITION)
+    
+    def total_profit(self):
+        """جمع سود فروش در یک کوئری aggregate"""
+        return self.profitable().aggregate(total=models.Sum('profit'))['total'] or 0
+
+
 class LoanBuyer(models.Model):
     """خریدار وام - مدل بهتری‌شده"""
     STATUS_CHOICES = (
@@ -872,6 +1074,8 @@ class LoanBuyer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاریخ ایجاد')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')
     
+    objects = LoanBuyerQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "خریدار وام"
         verbose_name_plural = "خریداران وام"
@@ -1206,6 +1410,122 @@ class LoanCreditorInstallment(models.Model):
             self.creditor.save(update_fields=['paid_amount'])
 
 
+# ============================================
+# گزارش‌های مالی (Financial Reporting Models)
+# ============================================
+
+class FinancialMonthlyRollup(models.Model):
+    """تجمیع ماهانه مالی - جمع هر سری نمودار مالی به ازای ماه شمسی و شعبه"""
+    METRIC_CHOICES = (
+        ('base_income', 'درآمد ثبت‌شده'),
+        ('consultation_income', 'درآمد مشاورات'),
+        ('case_income', 'درآمد پرونده‌ها'),
+        ('registry_trade_acquisition', 'درآمد بازرگانی اخذ'),
+        ('registry_trade_partnership', 'درآمد بازرگانی مشارکتی'),
+        ('registry_company', 'درآمد شرکت‌ها'),
+        ('registry_license', 'درآمد مجوزها'),
+        ('expense', 'هزینه‌ها'),
+        ('creditor_paid', 'بستانکاری پرداخت‌شده'),
+        ('creditor_unpaid', 'بستانکاری معوق'),
+        ('loan_sale_profit', 'سود فروش وام'),
+    )
+
+    # کلید تجمیع (ماه شمسی، شعبه، متریک)
+    year = models.PositiveSmallIntegerField(verbose_name="سال (شمسی)")
+    month = models.PositiveSmallIntegerField(verbose_name="ماه (شمسی)")
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True,
+                              related_name='financial_rollups', verbose_name="شعبه")
+    metric = models.CharField(max_length=50, choices=METRIC_CHOICES, verbose_name="متریک")
+    # کلید یکتای شعبه: شناسه شعبه یا 0 برای «بدون شعبه»
+    # (NULL در کلید یکتا تکرار را مجاز می‌کند و درج هم‌زمان دو ردیف برای یک خانه می‌سازد)
+    branch_key = models.PositiveIntegerField(default=0, editable=False, verbose_name="کلید شعبه")
+
+    amount = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="مبلغ")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخرین به‌روزرسانی')
+
+    class Meta:
+        verbose_name = "تجمیع ماهانه مالی"
+        verbose_name_plural = "تجمیع‌های ماهانه مالی"
+        ordering = ['-year', '-month', 'metric']
+        unique_together = ('year', 'month', 'branch_key', 'metric')
+
+    def __str__(self):
+        return f"{self.year}/{self.month:02d} - {self.get_metric_display()} ({self.amount})"
+
+    def save(self, *args, **kwargs):
+        self.branch_key = self.branch_id or 0
+        super().save(*args, **kwargs)
+
+
+class AttendanceMonthlySummary(models.Model):
+    """خلاصه ماهانه حضور و غیاب - به ازای کارمند و ماه شمسی (پایه گزارش‌های حقوق و دستمزد)"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='monthly_summaries',
+                                 verbose_name='کارمند')
+    year = models.PositiveSmallIntegerField(verbose_name="سال (شمسی)")
+    month = models.PositiveSmallIntegerField(verbose_name="ماه (شمسی)")
+
+    # مجموع دقایق
+    total_work_minutes = models.PositiveIntegerField(default=0, verbose_name='مجموع کارکرد (دقیقه)')
+    total_overtime_minutes = models.PositiveIntegerField(default=0, verbose_name='مجموع اضافه‌کاری (دقیقه)')
+
+    # تعداد روزها بر اساس وضعیت
+    present_days = models.PositiveSmallIntegerField(default=0, verbose_name='روزهای حضور')
+    absent_days = models.PositiveSmallIntegerField(default=0, verbose_name='روزهای غیبت')
+    late_days = models.PositiveSmallIntegerField(default=0, verbose_name='روزهای تاخیر')
+    leave_days = models.PositiveSmallIntegerField(default=0, verbose_name='روزهای مرخصی')
+    early_leave_days = models.PositiveSmallIntegerField(default=0, verbose_name='روزهای خروج زودهنگام')
+    # ورود بدون خروج
+    incomplete_days = models.PositiveSmallIntegerField(default=0, verbose_name='روزهای ناقص')
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخرین به‌روزرسانی')
+
+    class Meta:
+        verbose_name = "خلاصه ماهانه حضور و غیاب"
+        verbose_name_plural = "خلاصه‌های ماهانه حضور و غیاب"
+        ordering = ['-year', '-month', 'employee']
+        unique_together = ('employee', 'year', 'month')
+        indexes = [
+            models.Index(fields=['year', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee} - {self.year}/{self.month:02d}"
+
+
+class PayrollResult(models.Model):
+    """نتیجه محاسبه حقوق ماهانه - به ازای کارمند و ماه شمسی (core.payroll)"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payroll_results',
+                                 verbose_name='کارمند')
+    year = models.PositiveSmallIntegerField(verbose_name="سال (شمسی)")
+    month = models.PositiveSmallIntegerField(verbose_name="ماه (شمسی)")
+
+    # ورودی‌های محاسبه
+    base_salary = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="حقوق پایه")
+    work_minutes = models.PositiveIntegerField(default=0, verbose_name='کارکرد (دقیقه)')
+    overtime_minutes = models.PositiveIntegerField(default=0, verbose_name='اضافه‌کاری قابل پرداخت (دقیقه)')
+    paid_leave_hours = models.FloatField(default=0, verbose_name='مرخصی با حقوق (ساعت)')
+    unpaid_leave_hours = models.FloatField(default=0, verbose_name='مرخصی بدون حقوق (ساعت)')
+
+    # مبالغ
+    overtime_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="مبلغ اضافه‌کاری")
+    leave_deduction = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="کسر مرخصی")
+    net_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="خالص پرداختی")
+
+    computed_at = models.DateTimeField(auto_now=True, verbose_name='زمان محاسبه')
+
+    class Meta:
+        verbose_name = "حقوق ماهانه"
+        verbose_name_plural = "حقوق‌های ماهانه"
+        ordering = ['-year', '-month', 'employee']
+        unique_together = ('employee', 'year', 'month')
+        indexes = [
+            models.Index(fields=['year', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee} - {self.year}/{self.month:02d} ({self.net_pay})"
+
+
 # ============================================
 # Signal Handlers
 # ============================================
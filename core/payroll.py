@@ -0,0 +1,191 @@
+"""
+موتور محاسبه حقوق ماهانه - محاسبه برداری برای همه کارمندان فعال
+Vectorized monthly payroll engine for all active employees at once
+
+ورودی‌ها با سه کوئری دسته‌ای خوانده می‌شوند (کارمندان، رکوردهای حضور ماه،
+مرخصی‌های تاییدشده) و به آرایه‌های NumPy تبدیل می‌شوند؛ جمع به ازای کارمند با
+bincount، سقف‌های اضافه‌کاری روزانه/ماهانه و مبالغ به صورت برداری محاسبه و
+نتایج با یک upsert دسته‌ای در PayrollResult نوشته می‌شوند.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+import jdatetime
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Employee, Attendance, Leave, PayrollResult
+from .attendance_summaries import month_bounds
+from .leaves import HALF_DAY_FRACTION
+from .work_schedule import get_work_schedule, is_work_day
+
+PayrollPolicy = namedtuple('PayrollPolicy', 'standard_work_minutes max_daily_overtime max_monthly_overtime')
+
+# ساعات کار ماهانه مبنای نرخ ساعتی (قانون کار: ۴۴ ساعت در هفته)
+PAYROLL_MONTHLY_HOURS = 220
+# ضریب اضافه‌کاری (۴۰٪ بیشتر از مزد هر ساعت کار عادی)
+OVERTIME_RATE = 1.4
+# نوع مرخصی‌هایی که از حقوق کسر می‌شوند
+UNPAID_LEAVE_TYPES = ('unpaid',)
+
+PAYROLL_FIELDS = (
+    'base_salary', 'work_minutes', 'overtime_minutes', 'paid_leave_hours', 'unpaid_leave_hours',
+    'overtime_pay', 'leave_deduction', 'net_pay',
+)
+
+
+def payroll_policy():
+    """سقف‌های اضافه‌کاری و ساعات کار استاندارد مورد استفاده در محاسبه حقوق (از تنظیمات شرکت)"""
+    schedule = get_work_schedule()
+    return PayrollPolicy(schedule.standard_work_minutes, schedule.max_daily_overtime, schedule.max_monthly_overtime)
+
+
+def _load_employees():
+    """کوئری ۱: شناسه و حقوق پایه کارمندان فعال (مرتب بر اساس شناسه)"""
+    rows = list(
+        Employee.objects.filter(employment_status='active', base_salary__isnull=False)
+        .order_by('pk').values_list('pk', 'base_salary')
+    )
+    ids = np.array([pk for pk, _ in rows], dtype=np.int64)
+    salaries = np.array([float(salary) for _, salary in rows], dtype=np.float64)
+    return ids, salaries
+
+
+def _load_attendance(start, end):
+    """کوئری ۲: دقایق کار و اضافه‌کاری همه رکوردهای حضور ماه"""
+    rows = list(
+        Attendance.objects.filter(
+            date__gte=start, date__lt=end,
+            employee__employment_status='active', employee__base_salary__isnull=False,
+        ).order_by().values_list('employee_id', 'work_duration', 'overtime_duration')
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    data = np.array(rows, dtype=np.float64)
+    # مقادیر NULL به صورت nan خوانده می‌شوند
+    data = np.nan_to_num(data)
+    return data[:, 0].astype(np.int64), data[:, 1], data[:, 2]
+
+
+def _load_leaves(start, end):
+    """کوئری ۳: مرخصی‌های تاییدشده‌ای که با ماه هم‌پوشانی دارند"""
+    jstart = jdatetime.date.fromgregorian(date=start)
+    jlast = jdatetime.date.fromgregorian(date=end - timedelta(days=1))
+    return list(
+        Leave.objects.filter(
+            status='approved',
+            employee__employment_status='active', employee__base_salary__isnull=False,
+        ).filter(
+            Q(duration_type='daily', start_date__lte=jlast, end_date__gte=jstart)
+            | Q(duration_type='hourly', date__gte=jstart, date__lte=jlast)
+        ).order_by().values_list(
+            'employee_id', 'leave_type', 'duration_type', 'start_date', 'end_date', 'duration_hours',
+        )
+    )
+
+
+def _leave_hours(leaves, start, end, standard_work_minutes):
+    """
+    ساعات مرخصی هر ردیف در محدوده ماه
+    خروجی: (شناسه کارمندان، ساعات، آیا بدون حقوق است)
+    """
+    if not leaves:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=bool)
+    employee_ids = np.array([row[0] for row in leaves], dtype=np.int64)
+    leave_types = np.array([row[1] for row in leaves])
+    hourly = np.array([row[2] == 'hourly' for row in leaves])
+
+    # روزهای کاری هم‌پوشانی مرخصی روزانه با ماه (مثل span_days دفتر مرخصی، روزهای بسته شمرده نمی‌شوند)
+    # تاریخ‌ها به صورت ordinal میلادی؛ work_days[i] تعداد روزهای کاری پیش از روز i ماه است
+    first, last = start.toordinal(), end.toordinal() - 1
+    work_days = np.concatenate(([0], np.cumsum([
+        is_work_day(start + timedelta(days=offset)) for offset in range(last - first + 1)
+    ])))
+    starts = np.array([row[3].togregorian().toordinal() if row[3] else first for row in leaves], dtype=np.int64)
+    ends = np.array([row[4].togregorian().toordinal() if row[4] else first - 1 for row in leaves], dtype=np.int64)
+    lower = np.maximum(starts, first) - first
+    upper = np.minimum(ends, last) - first + 1
+    days = np.where(
+        upper > lower, work_days[np.clip(upper, 0, None)] - work_days[np.clip(lower, 0, len(work_days) - 1)], 0,
+    ).astype(np.float64)
+    days = np.where(leave_types == 'half_day', days * HALF_DAY_FRACTION, days)
+
+    hours = np.where(
+        hourly,
+        np.array([row[5] or 0 for row in leaves], dtype=np.float64),
+        days * standard_work_minutes / 60,
+    )
+    return employee_ids, hours, np.isin(leave_types, UNPAID_LEAVE_TYPES)
+
+
+def _per_employee(ids, row_employee_ids, values):
+    """جمع مقادیر ردیف‌ها به ازای کارمند (هم‌ترتیب با ids)"""
+    if not len(row_employee_ids):
+        return np.zeros(len(ids))
+    positions = np.searchsorted(ids, row_employee_ids)
+    return np.bincount(positions, weights=values, minlength=len(ids))
+
+
+def _decimal(value):
+    return Decimal(f'{value:.2f}')
+
+
+def compute_payroll(year, month, policy=None):
+    """
+    محاسبه حقوق ماه شمسی (year, month) برای همه کارمندان فعال و ذخیره در PayrollResult
+    خروجی: تعداد ردیف‌های نوشته‌شده
+    """
+    policy = policy or payroll_policy()
+    start, end = month_bounds(year, month)
+
+    ids, salaries = _load_employees()
+    if not len(ids):
+        return 0
+    attendance_employees, work, overtime = _load_attendance(start, end)
+    leave_employees, leave_hours, unpaid = _leave_hours(
+        _load_leaves(start, end), start, end, policy.standard_work_minutes,
+    )
+
+    # سقف روزانه روی هر رکورد و سقف ماهانه روی جمع هر کارمند
+    work_minutes = _per_employee(ids, attendance_employees, work)
+    overtime_minutes = np.minimum(
+        _per_employee(ids, attendance_employees, np.minimum(overtime, policy.max_daily_overtime)),
+        policy.max_monthly_overtime,
+    )
+    paid_leave_hours = _per_employee(ids, leave_employees[~unpaid], leave_hours[~unpaid])
+    unpaid_leave_hours = _per_employee(ids, leave_employees[unpaid], leave_hours[unpaid])
+
+    hourly_rate = salaries / PAYROLL_MONTHLY_HOURS
+    overtime_pay = np.round(overtime_minutes / 60 * hourly_rate * OVERTIME_RATE, 2)
+    leave_deduction = np.round(np.minimum(unpaid_leave_hours * hourly_rate, salaries), 2)
+    net_pay = np.round(salaries + overtime_pay - leave_deduction, 2)
+
+    results = [
+        PayrollResult(
+            employee_id=int(ids[i]), year=year, month=month,
+            base_salary=_decimal(salaries[i]),
+            work_minutes=int(work_minutes[i]),
+            overtime_minutes=int(overtime_minutes[i]),
+            paid_leave_hours=round(float(paid_leave_hours[i]), 2),
+            unpaid_leave_hours=round(float(unpaid_leave_hours[i]), 2),
+            overtime_pay=_decimal(overtime_pay[i]),
+            leave_deduction=_decimal(leave_deduction[i]),
+            net_pay=_decimal(net_pay[i]),
+        )
+        for i in range(len(ids))
+    ]
+    # MySQL هدف برخورد (unique_fields) را نمی‌پذیرد
+    unique_fields = (
+        ['employee', 'year', 'month'] if connection.features.supports_update_conflicts_with_target else None
+    )
+    with transaction.atomic():
+        PayrollResult.objects.bulk_create(
+            results,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=list(PAYROLL_FIELDS) + ['computed_at'],
+        )
+    return len(results)
@@ -4,14 +4,20 @@ Automatic logging system for all system activities
 """
 import json
 import logging
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_login_failed, user_logged_in, user_logged_out
 from django.utils.text import slugify
 
 # Import models directly to avoid linter errors
-from .models import ActivityLog, UserProfile, Employee, Attendance, Income, Expense, Loan, LoanBuyer, LoanCreditorInstallment, Branch
+from .models import ActivityLog, UserProfile, Employee, Attendance, Income, Expense, Loan, LoanBuyer, LoanCreditor, LoanCreditorInstallment, Branch, FinancialMonthlyRollup, CompanySettings, DayWorkSchedule
+from . import financial_reports
+from .employees import invalidate_employee_cache
+from . import attendance_summaries
+from .work_schedule import invalidate_work_schedule
+from .activity_log import enqueue_activity_log
 
 # Get logger for this module
 logger = logging.getLogger('phonix')
@@ -41,10 +47,15 @@ def create_activity_log(user, action, model_name, object_id, description, detail
             'content_type': model_name,
             'object_id': str(object_id) if object_id else None,
             'object_description': description,
-            'details': json.dumps(details, ensure_ascii=False, default=str) if details else None,
+            # مقادیر غیر JSON (Decimal، تاریخ شمسی و ...) مثل قبل به رشته تبدیل می‌شوند
+            'details': json.loads(json.dumps(details, ensure_ascii=False, default=str)) if details else None,
             'ip_address': get_client_ip(request) if request else None,
         }
-        ActivityLog.objects.create(**log_data)
+        if details:
+            # کلیدهای پرجستجو در ستون‌های ایندکس‌دار هم ذخیره می‌شوند
+            log_data.update({key: details.get(key) for key in ActivityLog.PROMOTED_DETAIL_KEYS})
+        # INSERT دسته‌ای پس از commit / پایان درخواست (core.activity_log)
+        enqueue_activity_log(ActivityLog(**log_data))
     except Exception as e:
         logger.error(f"خطا در ایجاد لاگ فعالیت: {e}", exc_info=True)
 
@@ -193,13 +204,13 @@ def log_failed_login(sender, credentials, request, **kwargs):
     """ثبت تلاش‌های ناموفق ورود"""
     username = credentials.get('username', 'نامشخص')
     try:
-        ActivityLog.objects.create(
+        enqueue_activity_log(ActivityLog(
             action='login',
             content_type='User',
             object_description=f'تلاش ناموفق برای ورود با نام‌کاربری: {username}',
             ip_address=get_client_ip(request),
-            details=json.dumps({'status': 'failed', 'username': username})
-        )
+            details={'status': 'failed', 'username': username}
+        ))
     except:
         pass
 
@@ -246,6 +257,28 @@ def log_employee_delete(sender, instance, **kwargs):
         logger.error(f"خطا در لاگ‌گیری حذف Employee: {e}", exc_info=True)
 
 
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_employee(sender, instance, **kwargs):
+    """باطل کردن کش کارمند کاربر (request.employee) پس از تغییر کارمند یا پروفایل"""
+    invalidate_employee_cache(instance.user_id)
+
+
+# ============================================
+# CompanySettings / DayWorkSchedule (تنظیمات ساعات کاری)
+# ============================================
+
+@receiver(post_save, sender=CompanySettings)
+@receiver(post_delete, sender=CompanySettings)
+@receiver(post_save, sender=DayWorkSchedule)
+@receiver(post_delete, sender=DayWorkSchedule)
+def invalidate_cached_work_schedule(sender, instance, **kwargs):
+    """باطل کردن کش تنظیمات ساعات کاری پس از تغییر تنظیمات یا جدول کاری"""
+    invalidate_work_schedule()
+
+
 # ============================================
 # Attendance (حضور و غیاب)
 # ============================================
@@ -273,6 +306,33 @@ def log_attendance_change(sender, instance, created, **kwargs):
         logger.error(f"خطا در لاگ‌گیری Attendance: {e}", exc_info=True)
 
 
+@receiver([pre_save, pre_delete], sender=Attendance)
+def remember_attendance_summary_cells(sender, instance, **kwargs):
+    """ذخیره خانه خلاصه ماهانه وضعیت قبلی رکورد حضور"""
+    try:
+        attendance_summaries.remember_summary_cells(instance)
+    except Exception as e:
+        logger.error(f"خطا در خواندن خلاصه ماهانه حضور: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_summary_on_save(sender, instance, **kwargs):
+    """بروزرسانی خلاصه ماهانه حضور پس از ذخیره"""
+    try:
+        attendance_summaries.refresh_summaries_for(instance)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی خلاصه ماهانه حضور: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=Attendance)
+def update_attendance_summary_on_delete(sender, instance, **kwargs):
+    """بروزرسانی خلاصه ماهانه حضور پس از حذف"""
+    try:
+        attendance_summaries.refresh_summaries_for(instance, deleted=True)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی خلاصه ماهانه حضور پس از حذف: {e}", exc_info=True)
+
+
 # ============================================
 # Income (درآمد)
 # ============================================
@@ -294,7 +354,8 @@ def log_income_change(sender, instance, created, **kwargs):
                 'amount': float(instance.amount),
                 'category': instance.category,
                 'payment_status': instance.payment_status,
-                'branch': str(instance.branch) if instance.branch else None
+                'branch': str(instance.branch) if instance.branch else None,
+                'branch_id': instance.branch_id
             }
         )
     except Exception as e:
@@ -337,7 +398,8 @@ def log_expense_change(sender, instance, created, **kwargs):
                 'amount': float(instance.amount),
                 'category': instance.category,
                 'payment_status': instance.payment_status,
-                'branch': str(instance.branch) if instance.branch else None
+                'branch': str(instance.branch) if instance.branch else None,
+                'branch_id': instance.branch_id
             }
         )
     except Exception as e:
@@ -485,4 +547,92 @@ def update_creditor_on_installment_delete(sender, instance, **kwargs):
             description=f'قسط {instance.installment_number} - {instance.creditor.first_name} {instance.creditor.last_name} حذف شد'
         )
     except Exception as e:
-        print(f"خطا در بروزرسانی بستانکار پس از حذف قسط: {e}")
\ No newline at end of file
+        print(f"خطا در بروزرسانی بستانکار پس از حذف قسط: {e}")
+
+
+# ============================================
+# تجمیع ماهانه مالی (Financial Monthly Rollup)
+# ============================================
+
+@receiver([pre_save, pre_delete], sender=Income)
+@receiver([pre_save, pre_delete], sender=Expense)
+@receiver([pre_save, pre_delete], sender=LoanBuyer)
+@receiver([pre_save, pre_delete], sender=LoanCreditorInstallment)
+def remember_financial_rollup_cells(sender, instance, **kwargs):
+    """ذخیره خانه‌های تجمیع ماهانه وضعیت قبلی رکورد مالی"""
+    try:
+        financial_reports.remember_rollup_cells(instance)
+    except Exception as e:
+        logger.error(f"خطا در خواندن تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Income)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=LoanBuyer)
+@receiver(post_save, sender=LoanCreditorInstallment)
+def update_financial_rollups_on_save(sender, instance, **kwargs):
+    """بروزرسانی درجای تجمیع ماهانه پس از ذخیره رکورد مالی"""
+    try:
+        financial_reports.refresh_rollups_for(instance)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=LoanBuyer)
+@receiver(post_delete, sender=LoanCreditorInstallment)
+def update_financial_rollups_on_delete(sender, instance, **kwargs):
+    """بروزرسانی درجای تجمیع ماهانه پس از حذف رکورد مالی"""
+    try:
+        financial_reports.refresh_rollups_for(instance, deleted=True)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(pre_save, sender=Loan)
+@receiver(pre_save, sender=LoanCreditor)
+def remember_financial_rollup_dependants(sender, instance, update_fields=None, **kwargs):
+    """تغییر قیمت خرید یا شعبه وام/بستانکار، متریک رکوردهای وابسته را تغییر می‌دهد"""
+    try:
+        financial_reports.remember_dependant_rollup_cells(instance, update_fields)
+    except Exception as e:
+        logger.error(f"خطا در خواندن تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_save, sender=LoanCreditor)
+def update_financial_rollup_dependants(sender, instance, **kwargs):
+    """بروزرسانی تجمیع رکوردهای وابسته (خریداران وام / قسط‌ها)"""
+    try:
+        financial_reports.refresh_dependant_rollups(instance)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Branch)
+def invalidate_financial_cache_on_branch_save(sender, instance, **kwargs):
+    """نام و بودجه شعبه در گزارش تفکیک شعب نمایش داده می‌شود"""
+    financial_reports.invalidate_financial_cache()
+
+
+@receiver(pre_delete, sender=Branch)
+def remember_branch_financial_rollups(sender, instance, **kwargs):
+    """با حذف شعبه، رکوردهای مالی آن بدون شعبه می‌شوند"""
+    if not settings.FINANCIAL_ROLLUPS_ENABLED:
+        return
+    instance._financial_rollup_cells = {
+        (metric, year, month, None)
+        for metric, year, month in FinancialMonthlyRollup.objects.filter(
+            branch=instance
+        ).values_list('metric', 'year', 'month')
+    }
+
+
+@receiver(post_delete, sender=Branch)
+def update_financial_rollups_on_branch_delete(sender, instance, **kwargs):
+    """بروزرسانی تجمیع‌های بدون شعبه پس از حذف شعبه"""
+    try:
+        financial_reports.refresh_rollup_cells(getattr(instance, '_financial_rollup_cells', set()))
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی پس از حذف شعبه: {e}", exc_info=True)
@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+from datetime import date, datetime, time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import jdatetime
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+
+from core.activity_archive import archive_activity_logs, read_archived_activity_logs
+from core.models import ActivityLog
+
+from .utils import make_user
+
+CUTOFF = datetime(2024, 5, 3)
+
+
+class ActivityArchiveTests(TestCase):
+
+    def setUp(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+        settings_override = override_settings(ACTIVITY_LOG_ARCHIVE_DIR=archive_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = Path(archive_dir)
+
+        self.user = make_user()
+        self.old = [
+            self.log(date(2024, 5, 1), 9, 'create'),
+            self.log(date(2024, 5, 1), 10, 'update', user=None),
+            self.log(date(2024, 5, 2), 9, 'delete', details={'amount': '1000'}),
+        ]
+        self.recent = self.log(date(2024, 5, 3), 9, 'create')
+
+    def log(self, day, hour, action, user=..., **fields):
+        timestamp = jdatetime.datetime.fromgregorian(datetime=datetime.combine(day, time(hour)))
+        return ActivityLog.objects.create(
+            user=self.user if user is ... else user, action=action, content_type='Income', timestamp=timestamp,
+            **fields,
+        )
+
+    def archived_ids(self, **filters):
+        return [record['id'] for record in read_archived_activity_logs(**filters)]
+
+    def test_old_rows_move_to_daily_files(self):
+        self.assertEqual(archive_activity_logs(CUTOFF, dry_run=True), (3, 0))
+        self.assertEqual(ActivityLog.objects.count(), 4)
+
+        self.assertEqual(archive_activity_logs(CUTOFF, batch_size=1), (3, 3))
+        self.assertEqual(list(ActivityLog.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertEqual(sorted(path.name.split('.')[0] for path in self.root.rglob('*.jsonl.gz')),
+                         ['2024-05-01', '2024-05-01', '2024-05-02'])
+
+        records = list(read_archived_activity_logs())
+        self.assertEqual([record['id'] for record in records], [entry.pk for entry in self.old])
+        self.assertEqual(
+            (records[0]['username'], records[0]['timestamp'], records[2]['details']),
+            (self.user.username, '2024-05-01T09:00:00', {'amount': '1000'}),
+        )
+        self.assertEqual(self.archived_ids(start=date(2024, 5, 2)), [self.old[2].pk])
+        self.assertEqual(self.archived_ids(end=date(2024, 5, 1), user_id=self.user.pk), [self.old[0].pk])
+        self.assertEqual(self.archived_ids(action='update'), [self.old[1].pk])
+
+        self.assertEqual(archive_activity_logs(CUTOFF), (0, 0))
+
+    def test_rerun_after_failed_delete_does_not_duplicate(self):
+        with mock.patch.object(QuerySet, 'delete', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            archive_activity_logs(CUTOFF)
+        self.assertEqual(ActivityLog.objects.count(), 4)
+
+        self.assertEqual(archive_activity_logs(CUTOFF), (3, 2))
+        self.assertEqual(len(list(self.root.rglob('*.jsonl.gz'))), 2)
+        self.assertEqual(self.archived_ids(), [entry.pk for entry in self.old])
+
+    def test_command_uses_before_date(self):
+        stdout = StringIO()
+        call_command('archive_activity_logs', before='2024-05-02', stdout=stdout)
+        self.assertIn('2 رکورد', stdout.getvalue())
+        self.assertEqual(ActivityLog.objects.count(), 2)
@@ -0,0 +1,53 @@
+from datetime import date
+from decimal import Decimal
+
+import jdatetime
+from django.test import TestCase, override_settings
+
+from core.activity_helpers import get_object_history
+from core.models import ActivityLog, Income
+from core.signals import create_activity_log
+
+from .utils import jdate, make_branch, make_user
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=False)
+class StructuredActivityDetailsTests(TestCase):
+
+    def test_details_are_json_and_keys_are_promoted(self):
+        user = make_user()
+        create_activity_log(user, 'payment', 'LoanCreditorInstallment', 7, 'پرداخت قسط', details={
+            'amount': Decimal('1250000.50'),
+            'creditor_id': 3,
+            'due_date': jdatetime.date(1403, 2, 1),
+            'note': 'قسط دوم',
+        })
+
+        log = ActivityLog.objects.get(content_type='LoanCreditorInstallment')
+        self.assertEqual(log.details, {
+            'amount': '1250000.50', 'creditor_id': 3, 'due_date': '1403-02-01', 'note': 'قسط دوم',
+        })
+        self.assertEqual((log.amount, log.creditor_id, log.branch_id), (Decimal('1250000.50'), 3, None))
+        self.assertEqual(ActivityLog.objects.filter(creditor_id=3, amount__gte=1_000_000).count(), 1)
+
+    def test_logs_without_details_leave_columns_empty(self):
+        create_activity_log(None, 'login', 'User', None, 'ورود')
+        log = ActivityLog.objects.get(action='login')
+        self.assertEqual((log.details, log.branch_id, log.amount, log.creditor_id), (None, None, None, None))
+
+    def test_income_history_filters_on_indexed_columns(self):
+        branch = make_branch()
+        income = Income.objects.create(
+            title='درآمد تست', amount=Decimal('500000'), registration_date=jdate(date.today()), branch=branch,
+        )
+        income.amount = Decimal('750000')
+        income.save()
+
+        logs = ActivityLog.objects.filter(content_type='Income', branch_id=branch.pk)
+        self.assertEqual(sorted(logs.values_list('action', 'amount')),
+                         [('create', Decimal('500000')), ('update', Decimal('750000'))])
+        self.assertEqual(logs.get(action='create').details['branch'], str(branch))
+
+        history = get_object_history('Income', income.pk)
+        self.assertEqual({change['action'] for change in history}, {'ایجاد', 'ویرایش'})
+        self.assertEqual({change['details']['amount'] for change in history}, {500000.0, 750000.0})
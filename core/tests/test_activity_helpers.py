@@ -0,0 +1,84 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+import jdatetime
+from django.test import TestCase, override_settings
+
+from core.activity_helpers import (
+    generate_daily_activity_report, get_employee_daily_activity, get_system_activity_stats, get_user_activity_summary,
+)
+from core.activity_log import enqueue_activity_log
+from core.models import ActivityDailyStat, ActivityLog
+
+from .utils import make_employee, make_user
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=False)
+class ActivityReportTests(TestCase):
+    day = date(2024, 5, 1)
+
+    def setUp(self):
+        self.employee = make_employee()
+        self.user = self.employee.user
+        self.other = make_user()
+        # لاگ‌های ساخت کاربر و کارمند در شمارش‌ها دخالت نکنند
+        ActivityLog.objects.all().delete()
+        ActivityDailyStat.objects.all().delete()
+
+    def log(self, moment, action, user, model='Income'):
+        entry = ActivityLog(
+            user=user, action=action, content_type=model, object_description='رکورد',
+            timestamp=jdatetime.datetime.fromgregorian(datetime=moment),
+        )
+        enqueue_activity_log(entry)
+        return entry
+
+    def populate_day(self):
+        """لاگ‌های روز و دو لاگ درست بیرون از مرزهای آن"""
+        start = datetime.combine(self.day, time.min)
+        self.log(start - timedelta(microseconds=1), 'create', self.user)
+        self.log(start + timedelta(days=1), 'create', self.user)
+        inside = [
+            self.log(start, 'create', self.user),
+            self.log(start + timedelta(hours=9), 'update', self.user),
+            self.log(start + timedelta(hours=10), 'update', self.other, model='Expense'),
+            self.log(start + timedelta(hours=11), 'delete', None, model=None),
+            self.log(start + timedelta(days=1, microseconds=-1), 'update', self.user),
+        ]
+        return inside
+
+    def test_daily_report_matches_naive_counts(self):
+        inside = self.populate_day()
+        with self.assertNumQueries(4):
+            report = generate_daily_activity_report(self.day)
+
+        labels = dict(ActivityLog.ACTION_CHOICES)
+        names = {self.user.pk: self.user.get_full_name(), self.other.pk: self.other.get_full_name(), None: 'سیستم'}
+        self.assertEqual(report['total_activities'], len(inside))
+        self.assertEqual(report['by_action'], dict(Counter(labels[entry.action] for entry in inside)))
+        self.assertEqual(report['by_user'], dict(Counter(names[entry.user_id] for entry in inside)))
+        self.assertEqual(report['by_model'], dict(Counter(entry.content_type for entry in inside)))
+        self.assertEqual([row['time'] for row in report['activities']],
+                         ['23:59:59', '11:00:00', '10:00:00', '09:00:00', '00:00:00'])
+
+    def test_employee_day_uses_half_open_range(self):
+        self.populate_day()
+        activity = get_employee_daily_activity(self.employee, jdatetime.date.fromgregorian(date=self.day))
+        self.assertEqual(activity['total_actions'], 3)
+        self.assertEqual([row['action_key'] for row in activity['activities']], ['update', 'update', 'create'])
+
+    def test_period_stats_count_whole_start_day(self):
+        now = datetime.now()
+        self.log(now, 'create', self.user)
+        self.log(now - timedelta(days=3), 'update', self.user)
+        self.log(now - timedelta(days=3), 'update', self.other, model='Expense')
+        self.log(now - timedelta(days=7) - timedelta(minutes=5), 'update', self.user)
+        self.log(now - timedelta(days=8), 'delete', self.user)
+
+        summary = get_user_activity_summary(self.user, days=7)
+        self.assertEqual((summary['total_actions'], summary['by_action']), (3, {'create': 1, 'update': 2}))
+
+        stats = get_system_activity_stats(days=7)
+        self.assertEqual(stats['total_actions'], 4)
+        self.assertEqual(stats['by_model'], {'Income': 3, 'Expense': 1})
+        self.assertEqual(stats['by_user'], {self.user.username: 3, self.other.username: 1})
@@ -0,0 +1,56 @@
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import activity_log
+from core.activity_log import flush_activity_logs, flush_activity_logs_if_due, pending_activity_logs
+from core.models import ActivityLog
+from core.signals import create_activity_log
+from phonix.middleware import ActivityLogMiddleware
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=True, ACTIVITY_LOG_BUFFER_SIZE=3, ACTIVITY_LOG_FLUSH_INTERVAL=60)
+class BufferedActivityLogTests(TestCase):
+
+    def setUp(self):
+        flush_activity_logs()
+        # رکورد باقی‌مانده در صف به تست بعدی یا خروج process نرسد
+        self.addCleanup(activity_log._buffer.clear)
+
+    def log(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for number in range(count):
+                create_activity_log(None, 'create', 'Test', number, f'رکورد {number}')
+
+    def expire_interval(self):
+        activity_log._last_flush = time.monotonic() - 61
+
+    def test_buffer_size_triggers_flush(self):
+        self.log(2)
+        self.assertEqual((pending_activity_logs(), ActivityLog.objects.count()), (2, 0))
+        self.log(1)
+        self.assertEqual((pending_activity_logs(), ActivityLog.objects.count()), (0, 3))
+
+    def test_rolled_back_entries_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            create_activity_log(None, 'create', 'Test', 1, 'rollback')
+        # on_commit اجرا نشده (معادل rollback)؛ چیزی در صف نیست
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(pending_activity_logs(), 0)
+
+    def test_request_end_flushes_when_interval_passed(self):
+        middleware = ActivityLogMiddleware(lambda request: HttpResponse())
+        self.log(1)
+        middleware(RequestFactory().get('/'))
+        self.assertEqual(pending_activity_logs(), 1)
+
+        # درخواست بعدی بدون لاگ جدید، پس از گذشت بازه تخلیه صف را می‌نویسد
+        self.expire_interval()
+        middleware(RequestFactory().get('/'))
+        self.assertEqual((pending_activity_logs(), ActivityLog.objects.count()), (0, 1))
+
+    def test_flush_if_due_is_noop_on_empty_queue(self):
+        self.expire_interval()
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_activity_logs_if_due(), 0)
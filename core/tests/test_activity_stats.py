@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+import jdatetime
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+
+from core.activity_archive import archive_activity_logs
+from core import activity_log
+from core.activity_log import enqueue_activity_log, flush_activity_logs
+from core.activity_stats import jalali_day, rebuild_activity_stats
+from core.models import ActivityDailyStat, ActivityLog
+
+from .utils import make_user
+
+
+def stats():
+    """آمار به صورت {(روز، عملیات، نوع مدل، کاربر): تعداد} (ردیف‌های تکراری بدون کاربر جمع می‌شوند)"""
+    rows = ActivityDailyStat.objects.values('day', 'action', 'content_type', 'user_id').annotate(total=Sum('count'))
+    return {(row['day'], row['action'], row['content_type'], row['user_id']): row['total'] for row in rows}
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=True, ACTIVITY_LOG_BUFFER_SIZE=1000, ACTIVITY_LOG_FLUSH_INTERVAL=3600)
+class ActivityDailyStatTests(TestCase):
+    first_day, second_day = date(2024, 5, 1), date(2024, 5, 2)
+
+    def setUp(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+        settings_override = override_settings(ACTIVITY_LOG_ARCHIVE_DIR=archive_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.users = [make_user(), make_user(), None]
+        flush_activity_logs()
+        # رکورد باقی‌مانده در صف به تست بعدی یا خروج process نرسد
+        self.addCleanup(activity_log._buffer.clear)
+
+    def log(self, day, hour, action, user, model='Income'):
+        timestamp = jdatetime.datetime.fromgregorian(datetime=datetime.combine(day, time(hour)))
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_activity_log(ActivityLog(user=user, action=action, content_type=model, timestamp=timestamp))
+
+    def populate(self):
+        for day in (self.first_day, self.second_day):
+            for hour, action in ((9, 'create'), (10, 'update'), (23, 'update')):
+                for user in self.users:
+                    self.log(day, hour, action, user)
+            self.log(day, 12, 'delete', None, model='Expense')
+        flush_activity_logs()
+
+    def test_incremental_stats_match_rebuild(self):
+        self.populate()
+        # دو دسته جدا تا مسیر UPDATE روی ردیف‌های موجود هم پوشش داده شود
+        self.log(self.second_day, 15, 'update', self.users[0])
+        self.log(self.second_day, 16, 'update', None)
+        flush_activity_logs()
+
+        incremental = stats()
+        self.assertEqual(sum(incremental.values()), ActivityLog.objects.count())
+        self.assertEqual(incremental[(jalali_day(self.second_day), 'update', 'Income', self.users[0].pk)], 3)
+
+        rebuild_activity_stats()
+        self.assertEqual(stats(), incremental)
+
+    def test_explicit_range_keeps_archived_days(self):
+        self.populate()
+        before = stats()
+        archive_activity_logs(datetime.combine(self.second_day, time.min))
+        self.assertFalse(ActivityLog.objects.filter(timestamp__lt=jdatetime.date.fromgregorian(date=self.second_day)).exists())
+
+        rebuild_activity_stats(self.first_day - timedelta(days=1), self.second_day)
+        self.assertEqual(stats(), before)
+        rebuild_activity_stats()
+        self.assertEqual(stats(), before)
+
+    def test_anonymous_and_deleted_user_rows_are_not_duplicated(self):
+        for _ in range(2):
+            # دو تخلیه جدا برای یک کلید بدون کاربر: ردیف دوم UPDATE می‌شود، نه INSERT
+            self.log(self.first_day, 9, 'login', None, model=None)
+            flush_activity_logs()
+        self.log(self.first_day, 9, 'login', self.users[0], model=None)
+        flush_activity_logs()
+        self.assertEqual(
+            sorted(ActivityDailyStat.objects.filter(action='login').values_list('user_key', 'count')),
+            [(0, 2), (self.users[0].pk, 1)],
+        )
+
+        deleted_id = self.users[0].pk
+        self.users[0].delete()
+        self.log(self.first_day, 10, 'login', None, model=None)
+        flush_activity_logs()
+        self.assertEqual(
+            sorted(ActivityDailyStat.objects.filter(action='login').values_list('user_key', 'user_id', 'count')),
+            [(0, None, 3), (deleted_id, None, 1)],
+        )
+        self.assertEqual(
+            ActivityDailyStat.objects.filter(action='login').aggregate(total=Sum('count'))['total'],
+            ActivityLog.objects.filter(action='login').count(),
+        )
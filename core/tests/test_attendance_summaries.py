@@ -0,0 +1,81 @@
+from datetime import date, time
+
+from django.test import TestCase
+
+from core.attendance_summaries import rebuild_attendance_summaries, refresh_attendance_summaries, summary_cells
+from core.models import Attendance, AttendanceMonthlySummary
+
+from .utils import make_employee
+
+# 1403/01/31 و 1403/02/01
+LAST_OF_FARVARDIN = date(2024, 4, 19)
+FIRST_OF_ORDIBEHESHT = date(2024, 4, 20)
+
+
+def summaries():
+    return {
+        (row.pop('employee_id'), row.pop('year'), row.pop('month')): row
+        for row in AttendanceMonthlySummary.objects.values('employee_id', 'year', 'month', 'total_work_minutes',
+                                                           'total_overtime_minutes', 'present_days', 'absent_days',
+                                                           'late_days', 'leave_days', 'incomplete_days')
+    }
+
+
+class AttendanceMonthlySummaryTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee()
+        self.other = make_employee()
+
+    def assertMatchesRebuild(self):
+        incremental = summaries()
+        rebuild_attendance_summaries()
+        self.assertEqual(incremental, summaries())
+        return incremental
+
+    def test_saves_moves_and_deletes_match_rebuild(self):
+        worked = Attendance.objects.create(
+            employee=self.employee, date=LAST_OF_FARVARDIN, check_in=time(8), check_out=time(17),
+        )
+        Attendance.objects.create(employee=self.employee, date=FIRST_OF_ORDIBEHESHT, status='absent')
+        Attendance.objects.create(employee=self.other, date=FIRST_OF_ORDIBEHESHT, check_in=time(8))
+        cells = self.assertMatchesRebuild()
+        self.assertEqual(cells[(self.employee.pk, 1403, 1)]['total_work_minutes'], worked.work_duration)
+        self.assertEqual(cells[(self.other.pk, 1403, 2)]['incomplete_days'], 1)
+
+        # انتقال رکورد به ماه بعد: خانه ماه قبل باید حذف شود
+        worked.date = date(2024, 4, 21)
+        worked.save()
+        cells = self.assertMatchesRebuild()
+        self.assertNotIn((self.employee.pk, 1403, 1), cells)
+        self.assertEqual(cells[(self.employee.pk, 1403, 2)]['absent_days'], 1)
+
+        Attendance.objects.filter(employee=self.other).get().delete()
+        self.assertNotIn((self.other.pk, 1403, 2), self.assertMatchesRebuild())
+
+    def test_bulk_writes_are_refreshed_by_cell(self):
+        days = [LAST_OF_FARVARDIN, FIRST_OF_ORDIBEHESHT]
+        Attendance.objects.bulk_create([
+            Attendance(employee=self.employee, date=day, status='leave') for day in days
+        ])
+        self.assertEqual(summaries(), {})
+
+        with self.assertNumQueries(2 * 4):
+            # هر ماه: GROUP BY و upsert در یک transaction (savepoint)
+            refresh_attendance_summaries(summary_cells(self.employee.pk, days))
+        cells = self.assertMatchesRebuild()
+        self.assertEqual(
+            {key: row['leave_days'] for key, row in cells.items()},
+            {(self.employee.pk, 1403, 1): 1, (self.employee.pk, 1403, 2): 1},
+        )
+
+    def test_rebuild_range_only_touches_its_months(self):
+        Attendance.objects.create(employee=self.employee, date=LAST_OF_FARVARDIN, status='absent')
+        Attendance.objects.create(employee=self.employee, date=FIRST_OF_ORDIBEHESHT, status='absent')
+        AttendanceMonthlySummary.objects.filter(month=1).update(absent_days=5)
+        AttendanceMonthlySummary.objects.filter(month=2).update(absent_days=5)
+
+        self.assertEqual(rebuild_attendance_summaries(start=FIRST_OF_ORDIBEHESHT), 1)
+        self.assertEqual(
+            dict(AttendanceMonthlySummary.objects.values_list('month', 'absent_days')), {1: 5, 2: 1},
+        )
@@ -0,0 +1,74 @@
+from datetime import date, datetime, time, timedelta
+
+from django.test import TestCase
+
+from core.attendance_sync import sync_attendance
+from core.models import Attendance
+
+from .utils import make_employee
+
+
+def stamp(day, hour, minute=0):
+    return datetime.combine(day, time(hour, minute)).isoformat()
+
+
+class SyncAttendanceTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee()
+        self.day = date.today() - timedelta(days=1)
+
+    def sync(self, *events, employee=None, **options):
+        payload = {'device_id': 'kiosk-1', 'events': [dict(event, id=str(index)) for index, event in enumerate(events)]}
+        return sync_attendance(payload, employee or self.employee, **options)
+
+    def test_batch_is_applied_and_replay_is_duplicate(self):
+        events = (
+            {'type': 'check_out', 'timestamp': stamp(self.day, 16)},
+            {'type': 'check_in', 'timestamp': stamp(self.day, 8)},
+        )
+        result = self.sync(*events)
+        self.assertEqual((result['applied'], result['duplicates'], result['rejected'], result['records']), (2, 0, 0, 1))
+        attendance = Attendance.objects.get(employee=self.employee, date=self.day)
+        self.assertEqual((attendance.check_in, attendance.check_out), (time(8), time(16)))
+        self.assertTrue(attendance.work_duration)
+
+        replay = self.sync(*events)
+        self.assertEqual((replay['applied'], replay['duplicates'], replay['records']), (0, 2, 0))
+        self.assertEqual(Attendance.objects.filter(employee=self.employee).count(), 1)
+
+    def test_conflicting_and_invalid_events_are_rejected(self):
+        other = make_employee()
+        Attendance.objects.create(employee=self.employee, date=self.day - timedelta(days=1), status='leave')
+        result = self.sync(
+            {'type': 'check_in', 'timestamp': stamp(self.day, 8)},
+            {'type': 'check_in', 'timestamp': stamp(self.day, 9)},
+            {'type': 'check_out', 'timestamp': stamp(self.day, 7)},
+            {'type': 'check_out', 'timestamp': stamp(self.day + timedelta(days=2), 17)},
+            {'type': 'check_in', 'timestamp': stamp(self.day - timedelta(days=1), 8)},
+            {'type': 'check_in', 'timestamp': stamp(self.day, 8), 'employee_id': other.pk},
+            {'type': 'break', 'timestamp': stamp(self.day, 12)},
+            {'type': 'check_in', 'timestamp': stamp(self.day - timedelta(days=60), 8)},
+            {'type': 'check_out', 'timestamp': stamp(self.day, 8)},
+        )
+        self.assertEqual(
+            [(row['status'], row.get('reason')) for row in result['results']],
+            [
+                # رویدادها به ترتیب زمان اعمال می‌شوند: خروج 7:00 پیش از ورود 8:00 است
+                ('applied', None), ('rejected', 'already_checked_in'), ('rejected', 'not_checked_in'),
+                ('rejected', 'future_timestamp'), ('rejected', 'on_leave'), ('rejected', 'forbidden'),
+                ('rejected', 'invalid_type'), ('rejected', 'expired'), ('rejected', 'before_check_in'),
+            ],
+        )
+        self.assertEqual(result['records'], 1)
+        self.assertFalse(Attendance.objects.filter(employee=other).exists())
+
+    def test_kiosk_may_sync_other_employees(self):
+        other = make_employee()
+        result = self.sync(
+            {'type': 'check_in', 'timestamp': stamp(self.day, 8), 'employee_id': other.pk},
+            {'type': 'check_in', 'timestamp': stamp(self.day, 8), 'employee_id': other.pk + 1000},
+            allow_other_employees=True,
+        )
+        self.assertEqual([row.get('reason') for row in result['results']], [None, 'unknown_employee'])
+        self.assertEqual(Attendance.objects.get(employee=other, date=self.day).check_in, time(8))
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.financial_reports import compute_financial_series, jalali_month_buckets
+from core.models import ActivityDailyStat, ActivityLog, Branch, Employee, Expense, Income
+from vekalet.models import Consultation
+
+VOLUMES = {
+    'branches': 2, 'employees': 3, 'incomes': 40, 'expenses': 30, 'consultations': 10,
+    'case_files': 3, 'loan_buyers': 6, 'activity_logs': 50,
+}
+
+
+class SeedAndBenchmarkTests(TestCase):
+
+    def seed(self, **options):
+        call_command('seed_synthetic_data', force=True, days=90, attendance_days=3, stdout=StringIO(),
+                     **dict(VOLUMES, **options))
+
+    def test_seed_volumes_and_derived_tables(self):
+        self.seed()
+        self.assertEqual(
+            (Branch.objects.count(), Employee.objects.count(), Income.objects.count(), Expense.objects.count(),
+             Consultation.objects.count(), ActivityLog.objects.count()),
+            (2, 3, 40, 30, 10, 50),
+        )
+        buckets = jalali_month_buckets(4)
+        with override_settings(FINANCIAL_ROLLUPS_ENABLED=True):
+            self.assertEqual(compute_financial_series(buckets, from_rollups=True), compute_financial_series(buckets))
+        self.assertEqual(sum(ActivityDailyStat.objects.values_list('count', flat=True)), 50)
+
+    def test_seed_is_deterministic(self):
+        options = dict(seed=7, branches=2, employees=0, consultations=0, case_files=0, loan_buyers=0,
+                       activity_logs=0)
+        self.seed(**options)
+        first = sorted(Income.objects.values_list('amount', 'registration_date', 'branch__code'))
+        Income.objects.all().delete()
+        Expense.objects.all().delete()
+        Branch.objects.all().delete()
+
+        self.seed(**options)
+        self.assertEqual(sorted(Income.objects.values_list('amount', 'registration_date', 'branch__code')), first)
+
+    def test_benchmark_writes_json_report(self):
+        self.seed()
+        User.objects.create_superuser('bench_admin', 'bench@example.com', 'x')
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        output = os.path.join(output_dir, 'report.json')
+
+        call_command('benchmark_reports', only='financial_chart_api,attendance_status', repeat=1,
+                     output=output, stdout=StringIO())
+        with open(output, encoding='utf-8') as report:
+            report = json.load(report)
+        self.assertEqual(report['row_counts']['core.Income'], 40)
+        self.assertEqual({row['name']: row['status'] for row in report['results']},
+                         {'financial_chart_api': 200, 'attendance_status': 200})
@@ -0,0 +1,88 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.idempotency import PENDING, idempotency_cache_key
+from core.models import Attendance, Leave
+
+from .test_financial_cache import SharedCacheTestCase
+from .utils import jdate, make_employee
+
+
+class CheckInOutTests(SharedCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee()
+        self.client.force_login(self.employee.user)
+
+    def post(self, name, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(reverse(f'core:{name}'), **headers)
+
+    def today(self):
+        return Attendance.objects.get(employee=self.employee, date=date.today())
+
+    def test_second_check_in_and_check_out_are_rejected(self):
+        self.assertEqual(self.post('check_out').status_code, 400)
+        self.assertEqual(self.post('check_in').status_code, 200)
+        self.assertEqual(self.post('check_in').status_code, 400)
+        self.assertEqual(self.post('check_out').status_code, 200)
+        self.assertEqual(self.post('check_out').status_code, 400)
+
+        response = self.post('check_in')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('قبلاً خروج کرده', response.json()['message'])
+        attendance = self.today()
+        self.assertIsNotNone(attendance.check_out)
+        self.assertIsNotNone(attendance.work_duration)
+        self.assertEqual(Attendance.objects.filter(employee=self.employee).count(), 1)
+
+    def test_pre_created_row_is_completed(self):
+        Attendance.objects.create(employee=self.employee, date=date.today(), status='absent', leave_minutes=30)
+        self.assertEqual(self.post('check_in').status_code, 200)
+        attendance = self.today()
+        self.assertIsNotNone(attendance.check_in)
+        self.assertEqual((attendance.status, attendance.leave_minutes), ('present', 30))
+
+    def test_check_in_is_one_insert_with_leave_minutes(self):
+        Leave.objects.create(
+            employee=self.employee, leave_type='personal', duration_type='hourly', status='approved',
+            date=jdate(date.today()), duration_hours=1.5,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.post('check_in').status_code, 200)
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if '"core_attendance"' in query['sql'] or '"core_leave"' in query['sql']
+        ]
+        # جز INSERT فقط خواندن خلاصه ماهانه (post_save) رکورد حضور را می‌خواند
+        self.assertEqual([sql.split(' ', 1)[0] for sql in statements], ['INSERT', 'SELECT'])
+        self.assertIn('"core_leave"', statements[0])
+        attendance = self.today()
+        self.assertEqual((attendance.status, attendance.leave_minutes), ('present', 90))
+
+    def test_leave_row_is_not_checked_in(self):
+        Attendance.objects.create(employee=self.employee, date=date.today(), status='leave')
+        response = self.post('check_in')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('مرخصی ثبت شده', response.json()['message'])
+        self.assertIsNone(self.today().check_in)
+
+    def test_idempotency_key_replays_the_first_response(self):
+        first = self.post('check_in', key='click-1')
+        replay = self.post('check_in', key='click-1')
+        self.assertEqual((first.status_code, replay.status_code), (200, 200))
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.post('check_in', key='click-2').status_code, 400)
+        self.assertEqual(Attendance.objects.filter(employee=self.employee).count(), 1)
+
+    def test_key_in_flight_gets_conflict(self):
+        path = reverse('core:check_out')
+        cache.set(idempotency_cache_key(self.employee.user_id, path, 'click-1'), PENDING)
+        self.assertEqual(self.post('check_out', key='click-1').status_code, 409)
+        self.assertEqual(self.post('check_out', key='x' * 201).status_code, 400)
@@ -0,0 +1,54 @@
+from datetime import date, time
+
+from django.test import TestCase
+
+from core.management.commands.close_incomplete_attendance import close_open_attendance
+from core.models import Attendance
+from core.work_schedule import get_work_schedule
+
+from .utils import make_employee
+
+
+class CloseOpenAttendanceTests(TestCase):
+    day = date(2024, 4, 21)
+
+    def setUp(self):
+        # روز هفته شمسی: 0=شنبه
+        self.work_end = get_work_schedule().days[(self.day.weekday() + 2) % 7].work_end
+
+    def open_row(self, check_in, **fields):
+        return Attendance.objects.create(employee=make_employee(), date=self.day, check_in=check_in, **fields)
+
+    def test_schedule_end_matches_calculate_work_duration(self):
+        attendance = self.open_row(time(7, 15, 30), leave_minutes=60)
+        late = self.open_row(time(self.work_end.hour, self.work_end.minute, 1))
+
+        self.assertEqual(close_open_attendance(date(2024, 4, 22)), (1, 1))
+        attendance.refresh_from_db()
+        expected = Attendance(date=self.day, check_in=time(7, 15, 30), check_out=self.work_end, leave_minutes=60)
+        expected.calculate_work_duration()
+        self.assertEqual(
+            (attendance.check_out, attendance.work_duration, attendance.overtime_duration, attendance.status),
+            (self.work_end, expected.work_duration, expected.overtime_duration, 'present'),
+        )
+        late.refresh_from_db()
+        self.assertEqual((late.check_out, late.status), (None, 'incomplete'))
+
+    def test_incomplete_rows_are_not_processed_again(self):
+        marked = self.open_row(time(9), status='incomplete')
+        marked_at = Attendance.objects.get(pk=marked.pk).updated_at
+        still_open = self.open_row(time(9))
+        self.assertEqual(close_open_attendance(date(2024, 4, 22), policy='incomplete'), (0, 1))
+        self.assertEqual(Attendance.objects.get(pk=still_open.pk).status, 'incomplete')
+
+        self.assertEqual(close_open_attendance(date(2024, 4, 22)), (0, 0))
+        self.assertEqual(close_open_attendance(date(2024, 4, 22), policy='incomplete'), (0, 0))
+        marked.refresh_from_db()
+        # ردیف از قبل «ناقص» در هیچ‌کدام از سه اجرا دوباره نوشته نشده است
+        self.assertEqual((marked.status, marked.check_out, marked.updated_at), ('incomplete', None, marked_at))
+
+    def test_today_is_left_open(self):
+        attendance = self.open_row(time(8))
+        self.assertEqual(close_open_attendance(self.day), (0, 0))
+        attendance.refresh_from_db()
+        self.assertIsNone(attendance.check_out)
@@ -0,0 +1,74 @@
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.management.commands.create_daily_attendance import create_attendance_for_dates
+from core.models import Attendance, Employee
+
+from .utils import make_employee
+
+
+class CreateAttendanceForDatesTests(TestCase):
+    # شنبه تا دوشنبه (روزهای کاری جدول پیش‌فرض)
+    dates = [date(2024, 4, 20), date(2024, 4, 21), date(2024, 4, 22)]
+
+    def setUp(self):
+        self.present = make_employee()
+        self.absent = make_employee()
+        make_employee(employment_status='inactive')
+        User.objects.filter(pk=self.present.user_id).update(last_login=datetime.combine(self.dates[1], time(8, 5)))
+
+    def test_existing_pairs_are_kept_and_rerun_creates_nothing(self):
+        kept = Attendance.objects.create(employee=self.absent, date=self.dates[0], status='leave')
+
+        self.assertEqual(create_attendance_for_dates(self.dates), (5, 1))
+        self.assertEqual(Attendance.objects.count(), 6)
+        kept.refresh_from_db()
+        self.assertEqual(kept.status, 'leave')
+        self.assertEqual(
+            list(Attendance.objects.filter(employee=self.present).order_by('date').values_list('status', 'check_in')),
+            [('absent', None), ('present', time(8, 5)), ('absent', None)],
+        )
+
+        self.assertEqual(create_attendance_for_dates(self.dates), (0, 6))
+        self.assertEqual(Attendance.objects.count(), 6)
+
+    def test_ignored_conflicts_are_not_counted_as_created(self):
+        # فهرست کارمندان پیش از غیرفعال شدن خوانده شده؛ رکورد موجود او در خواندن اولیه دیده نمی‌شود
+        employees = [(self.absent.pk, None)]
+        Attendance.objects.create(employee=self.absent, date=self.dates[0], status='leave')
+        Employee.objects.filter(pk=self.absent.pk).update(employment_status='inactive')
+
+        self.assertEqual(create_attendance_for_dates(self.dates[:1], employees), (0, 0))
+        self.assertEqual(Attendance.objects.get(employee=self.absent).status, 'leave')
+
+    def test_range_is_read_once_and_inserted_in_batches(self):
+        dates = [self.dates[0] + timedelta(days=offset) for offset in range(30)]
+        with CaptureQueriesContext(connection) as queries:
+            create_attendance_for_dates(dates, batch_size=25)
+        statements = [query['sql'] for query in queries.captured_queries]
+        reads = [sql for sql in statements if sql.startswith('SELECT "core_attendance"."employee_id", "core_attendance"."date"')]
+        inserts = [sql for sql in statements if sql.startswith('INSERT') and 'INTO "core_attendance" ' in sql]
+        self.assertEqual(Attendance.objects.count(), 60)
+        # 60 ردیف در دسته‌های 25تایی
+        self.assertEqual((len(reads), len(inserts)), (1, 3))
+
+
+class CreateDailyAttendanceCommandTests(TestCase):
+
+    def test_closed_days_are_skipped(self):
+        employee = make_employee()
+        stdout = StringIO()
+        # پنج‌شنبه و جمعه بسته، شنبه باز
+        call_command('create_daily_attendance', date_from='2024-04-25', date_to='2024-04-27', stdout=stdout)
+
+        self.assertEqual(list(Attendance.objects.values_list('employee_id', 'date')), [(employee.pk, date(2024, 4, 27))])
+        self.assertIn('ایجاد شده: 1', stdout.getvalue())
+
+        call_command('create_daily_attendance', date_from='2024-04-25', date_to='2024-04-27', workers=1, stdout=stdout)
+        self.assertEqual(Attendance.objects.count(), 1)
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.employees import employee_cache_key, resolve_employee
+from core.models import Employee
+
+from .test_financial_cache import LOCMEM_CACHES, SharedCacheTestCase
+from .utils import make_employee, make_user
+
+
+class SharedEmployeeCacheTests(SharedCacheTestCase):
+
+    def test_cached_employee_is_dropped_on_save(self):
+        employee = make_employee()
+        self.assertEqual(resolve_employee(employee.user).pk, employee.pk)
+        self.assertIsNotNone(cache.get(employee_cache_key(employee.user_id)))
+
+        with self.assertNumQueries(0):
+            resolve_employee(employee.user)
+
+        Employee.objects.get(pk=employee.pk).save()
+        self.assertIsNone(cache.get(employee_cache_key(employee.user_id)))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LocalEmployeeCacheTests(TestCase):
+
+    def test_process_local_cache_is_not_used(self):
+        employee = make_employee()
+        resolve_employee(employee.user)
+        self.assertIsNone(cache.get(employee_cache_key(employee.user_id)))
+
+        # تغییر در process دیگر (بدون سیگنال) بلافاصله دیده می‌شود
+        Employee.objects.filter(pk=employee.pk).update(employment_status='inactive')
+        self.assertEqual(resolve_employee(employee.user).employment_status, 'inactive')
+
+    def test_views_use_request_employee(self):
+        user = make_user()
+        self.client.force_login(user)
+        response = self.client.get('/api/attendance-status/')
+        self.assertEqual(response.status_code, 200)
+        # کارمند یک بار از روی پروفایل ساخته شد
+        self.assertEqual(Employee.objects.filter(user=user).count(), 1)
+        self.assertEqual(self.client.get('/api/attendance-status/').status_code, 200)
+        self.assertEqual(Employee.objects.filter(user=user).count(), 1)
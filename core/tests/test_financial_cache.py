@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase, override_settings
+
+from core.financial_reports import (
+    FINANCIAL_CACHE_VERSION_KEY, financial_cache_enabled, financial_cache_version,
+)
+from core.models import Income
+
+from .utils import jdate, make_user
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+
+
+class SharedCacheTestCase(TestCase):
+    """هر تست کش فایلی مستقل در یک پوشه موقت دارد (مثل پیش‌فرض production)"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': self.cache_dir,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_income(self, amount=100):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Income.objects.create(title='درآمد تست', amount=Decimal(amount), registration_date=jdate(date.today()))
+
+
+class FinancialCacheVersionTests(SharedCacheTestCase):
+
+    def test_write_bumps_version_for_every_process(self):
+        before = financial_cache_version()
+        # backend جداگانه روی همان پوشه = worker دیگر
+        other_worker = FileBasedCache(self.cache_dir, {})
+        self.assertEqual(other_worker.get(FINANCIAL_CACHE_VERSION_KEY), before)
+
+        self.create_income()
+        self.assertNotEqual(financial_cache_version(), before)
+        self.assertEqual(other_worker.get(FINANCIAL_CACHE_VERSION_KEY), financial_cache_version())
+
+    def test_cached_chart_is_recomputed_after_write(self):
+        user = make_user(is_staff=True)
+        self.client.force_login(user)
+        self.create_income(100)
+        first = self.client.get('/api/financial-analytics/', {'series': 'income'}).json()
+        self.create_income(50)
+        second = self.client.get('/api/financial-analytics/', {'series': 'income'}).json()
+        self.assertEqual(second['totals']['income'] - first['totals']['income'], 50)
+
+
+class LocMemFinancialCacheTests(TestCase):
+
+    @override_settings(CACHES=LOCMEM_CACHES, DEBUG=False)
+    def test_process_local_cache_disables_financial_cache(self):
+        self.assertFalse(financial_cache_enabled())
+        self.client.force_login(make_user(is_staff=True))
+        response = self.client.get('/api/financial-analytics/', {'series': 'income'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(FINANCIAL_CACHE_VERSION_KEY))
+
+    @override_settings(CACHES=LOCMEM_CACHES, DEBUG=True)
+    def test_process_local_cache_allowed_in_debug(self):
+        self.assertTrue(financial_cache_enabled())
+
+
+class FinancialChartETagTests(SharedCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(make_user(is_staff=True))
+
+    def test_unchanged_chart_is_not_modified_until_write(self):
+        etag = self.client.get('/api/financial-chart/')['ETag']
+        self.assertEqual(self.client.get('/api/financial-chart/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.create_income()
+        response = self.client.get('/api/financial-chart/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHES=LOCMEM_CACHES, DEBUG=False)
+    def test_no_version_etag_on_process_local_cache(self):
+        self.assertFalse(self.client.get('/api/financial-chart/').has_header('ETag'))
@@ -0,0 +1,95 @@
+import csv
+import io
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from core.financial_exports import export_rows
+from core.models import Income
+from vekalet.models import Consultation
+
+from .utils import jdate, make_branch, make_user
+
+
+class ExportRowsTests(TestCase):
+
+    def consultation(self, when, subject):
+        return Consultation.objects.create(
+            client_name='مراجع تست', client_phone='09120000000', consultation_subject=subject,
+            consultation_date=when, consultation_fee=Decimal('1000'), payment_status='paid',
+        )
+
+    def test_datetime_range_covers_whole_end_day(self):
+        self.consultation(datetime(2024, 3, 9, 23, 59), 'قبل از بازه')
+        self.consultation(datetime(2024, 3, 10, 0, 0), 'شروع بازه')
+        self.consultation(datetime(2024, 3, 12, 23, 59, 59), 'پایان بازه')
+        self.consultation(datetime(2024, 3, 13, 0, 0), 'بعد از بازه')
+
+        rows = list(export_rows('consultations', date(2024, 3, 10), date(2024, 3, 12)))
+        self.assertEqual([row[3] for row in rows], ['شروع بازه', 'پایان بازه'])
+        self.assertEqual(rows[0][-1], Decimal('1000'))
+
+    def test_date_range_is_inclusive_and_filters_branch(self):
+        branch, other = make_branch(), make_branch()
+        for day, target, title in (
+            (date(2024, 3, 9), branch, 'قبل'),
+            (date(2024, 3, 10), branch, 'شروع'),
+            (date(2024, 3, 12), branch, 'پایان'),
+            (date(2024, 3, 12), other, 'شعبه دیگر'),
+            (date(2024, 3, 13), branch, 'بعد'),
+        ):
+            Income.objects.create(title=title, amount=Decimal('500'), registration_date=jdate(day), branch=target)
+
+        rows = list(export_rows('income', date(2024, 3, 10), date(2024, 3, 12), branch=branch.pk))
+        self.assertEqual([row[2] for row in rows], ['شروع', 'پایان'])
+
+
+class FinancialExportViewTests(TestCase):
+    url = reverse('core:financial_export')
+
+    def setUp(self):
+        self.client.force_login(make_user(is_staff=True))
+        for day, title in ((date(2024, 3, 10), 'درآمد اول'), (date(2024, 3, 11), 'درآمد دوم')):
+            Income.objects.create(title=title, amount=Decimal('500'), registration_date=jdate(day))
+
+    def export(self, **params):
+        return self.client.get(self.url, dict({'start': '2024-03-10', 'end': '2024-03-11'}, **params))
+
+    def test_non_admin_is_forbidden(self):
+        user = make_user()
+        User.objects.filter(pk=user.pk).update(is_staff=False)
+        self.client.force_login(user)
+        self.assertEqual(self.export().status_code, 403)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'format': 'pdf'}, {'kind': 'salaries'}, {'start': '2024-03-12'}, {'end': '1403/13/40'}):
+            self.assertEqual(self.export(**params).status_code, 400, params)
+
+    def test_csv_is_streamed(self):
+        response = self.export(kind='income', format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="income_20240310_20240311.csv"')
+
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(sorted(row[2] for row in rows[1:]), ['درآمد اول', 'درآمد دوم'])
+
+    def test_xlsx_is_a_workbook_zip(self):
+        response = self.export(kind='income', format='xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="income_20240310_20240311.xlsx"')
+
+        workbook = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(workbook.testzip())
+        self.assertIn('xl/worksheets/sheet1.xml', workbook.namelist())
+        self.assertIn('درآمد دوم', workbook.read('xl/worksheets/sheet1.xml').decode('utf-8'))
@@ -0,0 +1,157 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from core.financial_reports import (
+    FINANCIAL_SOURCES, MAX_REPORT_BUCKETS, budget_series, compute_financial_series,
+    compute_financial_series_by_branch, jalali_month_buckets, period_buckets,
+)
+from core.models import Expense, Income
+from vekalet.models import Consultation
+
+from .utils import jdate, make_branch, make_user
+
+
+class FinancialDataMixin:
+    """داده مالی در مرز ماه‌های شمسی ۱۴۰۳/۰۱ تا ۱۴۰۳/۰۳ (بازه‌ها: ۲۰ مارس، ۲۰ آوریل، ۲۱ مه تا ۲۱ ژوئن ۲۰۲۴)"""
+
+    def create_financial_data(self):
+        self.branch = make_branch()
+        for day, amount, branch in (
+            (date(2024, 3, 19), 999, self.branch),
+            (date(2024, 3, 20), 100, self.branch),
+            (date(2024, 4, 19), 50, None),
+            (date(2024, 4, 20), 70, self.branch),
+            (date(2024, 6, 20), 30, self.branch),
+            (date(2024, 6, 21), 999, self.branch),
+        ):
+            Income.objects.create(title='درآمد', amount=Decimal(amount), registration_date=jdate(day), branch=branch)
+        Expense.objects.create(title='هزینه', amount=Decimal(40), registration_date=jdate(date(2024, 5, 21)),
+                               branch=self.branch)
+        for moment, status, fee, paid in (
+            (datetime(2024, 4, 19, 23, 59), 'paid', 1000, 0),
+            (datetime(2024, 4, 20, 0, 0), 'partial', 900, 300),
+            (datetime(2024, 4, 21, 10, 0), 'unpaid', 500, 0),
+        ):
+            Consultation.objects.create(
+                client_name='مراجع', client_phone='09120000000', consultation_subject='مشاوره',
+                consultation_date=moment, payment_status=status, consultation_fee=Decimal(fee), amount_paid=Decimal(paid),
+            )
+
+
+class ComputeFinancialSeriesTests(FinancialDataMixin, TestCase):
+
+    def setUp(self):
+        self.create_financial_data()
+        self.buckets = jalali_month_buckets(3, today=date(2024, 6, 15))
+
+    def test_one_grouped_query_per_source(self):
+        with self.assertNumQueries(len(FINANCIAL_SOURCES)):
+            series = compute_financial_series(self.buckets)
+        self.assertEqual(series['consultation_income'], [1000, 300, 0])
+        self.assertEqual(series['income'], [1150, 370, 30])
+        self.assertEqual(series['expense'], [0, 0, 40])
+        self.assertEqual(series['net_profit'], [1150, 370, -10])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(compute_financial_series(self.buckets, series=['expense']), {'expense': [0, 0, 40]})
+
+    def test_branch_scope_skips_branchless_sources(self):
+        series = compute_financial_series(self.buckets, series=['income', 'consultation_income'], branch=self.branch.pk)
+        self.assertEqual(series, {'income': [100, 70, 30], 'consultation_income': [0, 0, 0]})
+
+
+class BranchBreakdownTests(FinancialDataMixin, TestCase):
+
+    def setUp(self):
+        self.create_financial_data()
+        self.buckets = jalali_month_buckets(3, today=date(2024, 6, 15))
+
+    def test_branches_share_one_query_per_source(self):
+        for _ in range(3):
+            make_branch()
+        with self.assertNumQueries(len(FINANCIAL_SOURCES)):
+            by_branch = compute_financial_series_by_branch(self.buckets)
+        self.assertEqual(set(by_branch), {self.branch.pk, None})
+        self.assertEqual(by_branch[self.branch.pk]['income'], [100, 70, 30])
+        self.assertEqual(by_branch[self.branch.pk]['expense'], [0, 0, 40])
+        self.assertEqual(by_branch[None]['income'], [1050, 300, 0])
+
+        # جمع شعب برابر گزارش کل سازمان
+        total = compute_financial_series(self.buckets)
+        for name, points in total.items():
+            self.assertEqual([sum(values) for values in zip(*(series[name] for series in by_branch.values()))], points)
+
+    def test_budget_is_prorated_by_covered_days(self):
+        # فروردین ۳۱ روز: بازه ۱ تا ۱۰ فروردین و ماه کامل اردیبهشت
+        buckets = [('a', date(2024, 3, 20), date(2024, 3, 30)), ('b', date(2024, 4, 20), date(2024, 5, 21))]
+        self.assertEqual(budget_series(buckets, Decimal('3100')), [1000, 3100])
+        self.assertEqual(budget_series(buckets, None), [0, 0])
+
+
+class PeriodBucketsTests(TestCase):
+
+    def test_edges_are_clipped_to_the_requested_range(self):
+        buckets = period_buckets(date(2024, 4, 10), date(2024, 7, 1), 'quarter')
+        self.assertEqual([label for label, _, _ in buckets], ['بهار 1403', 'تابستان 1403'])
+        self.assertEqual(buckets[0][1:], (date(2024, 4, 10), date(2024, 6, 21)))
+        self.assertEqual(buckets[1][1:], (date(2024, 6, 21), date(2024, 7, 2)))
+
+    def test_weeks_start_on_saturday(self):
+        buckets = period_buckets(date(2024, 4, 17), date(2024, 4, 30), 'week')
+        self.assertTrue(all(start.weekday() == 5 for _, start, _ in buckets[1:]))
+        self.assertEqual(buckets[-1][2], date(2024, 5, 1))
+
+    def test_too_many_buckets_are_rejected(self):
+        with self.assertRaises(ValueError):
+            period_buckets(date(2020, 1, 1), date(2020, 1, 1) + timedelta(days=MAX_REPORT_BUCKETS), 'day')
+
+
+class FinancialAnalyticsApiTests(FinancialDataMixin, TestCase):
+    url = '/api/financial-analytics/'
+
+    def setUp(self):
+        self.create_financial_data()
+        self.client.force_login(make_user(is_staff=True))
+
+    def test_jalali_range_and_daily_granularity(self):
+        data = self.client.get(self.url, {
+            'start': '1403/01/01', 'end': '1403/01/31', 'series': 'income,consultation_income',
+        }).json()
+        self.assertEqual(data['labels'], ['فروردین 1403'])
+        self.assertEqual(data['totals'], {'income': 1150, 'consultation_income': 1000})
+
+        data = self.client.get(self.url, {
+            'start': '2024-04-19', 'end': '2024-04-20', 'granularity': 'day', 'series': 'income',
+        }).json()
+        self.assertEqual(data['series'], {'income': [1050, 370]})
+
+    def test_branch_filter_and_breakdown(self):
+        data = self.client.get(self.url, {
+            'start': '1403/01/01', 'end': '1403/03/31', 'branch': self.branch.pk, 'series': 'income,expense',
+        }).json()
+        self.assertEqual(data['series'], {'income': [100, 70, 30], 'expense': [0, 0, 40]})
+
+        data = self.client.get(self.url, {
+            'start': '1403/01/01', 'end': '1403/03/31', 'breakdown': 'branch', 'series': 'income',
+        }).json()
+        # ردیف آخر (id=None) رکوردهای بدون شعبه است
+        self.assertEqual([row['id'] for row in data['branches']], [self.branch.pk, None])
+        self.assertEqual(data['branches'][0]['series']['income'], [100, 70, 30])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'series': 'income,unknown'},
+            {'granularity': 'hour'},
+            {'start': '1403/02/01', 'end': '1403/01/01'},
+            {'breakdown': 'branch', 'branch': self.branch.pk},
+        ):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+        user = make_user()
+        # سیگنال پروفایل کاربران با نقش کارمند را staff می‌کند
+        User.objects.filter(pk=user.pk).update(is_staff=False)
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.financial_reports import (
+    _store_rollup, compute_financial_series, jalali_month_buckets, rebuild_financial_rollups,
+)
+from core.models import Expense, FinancialMonthlyRollup, Income
+
+from .utils import jdate, make_branch
+
+
+@override_settings(FINANCIAL_ROLLUPS_ENABLED=True)
+class FinancialRollupTests(TestCase):
+    """تجمیع ماهانه باید همیشه با محاسبه زنده از جداول منبع برابر باشد"""
+
+    def setUp(self):
+        self.branch = make_branch()
+        self.today = date.today()
+        self.buckets = jalali_month_buckets(3, self.today)
+
+    def income(self, amount, day=None, branch=None):
+        return Income.objects.create(
+            title='درآمد تست', amount=Decimal(amount), branch=branch,
+            registration_date=jdate(day or self.today),
+        )
+
+    def assertRollupMatchesLive(self, branch=None):
+        live = compute_financial_series(self.buckets, branch=branch)
+        rolled = compute_financial_series(self.buckets, from_rollups=True, branch=branch)
+        self.assertEqual(rolled, live)
+
+    def test_signals_keep_rollup_equal_to_live_totals(self):
+        first = self.income(1000, branch=self.branch)
+        self.income(250)
+        Expense.objects.create(title='هزینه تست', amount=Decimal(400), registration_date=jdate(self.today))
+        self.assertRollupMatchesLive()
+        self.assertRollupMatchesLive(branch=self.branch.pk)
+
+        # تغییر مبلغ، جابه‌جایی بین ماه‌ها و شعبه، و حذف
+        first.amount = Decimal(700)
+        first.registration_date = jdate(self.buckets[0][1] + timedelta(days=2))
+        first.branch = None
+        first.save()
+        self.assertRollupMatchesLive()
+        self.assertRollupMatchesLive(branch=self.branch.pk)
+        first.delete()
+        self.assertRollupMatchesLive()
+        self.assertEqual(compute_financial_series(self.buckets, series=['income'])['income'][-1], 250)
+
+    def test_rebuild_matches_incremental_rollup(self):
+        self.income(1000, branch=self.branch)
+        self.income(300)
+        incremental = set(FinancialMonthlyRollup.objects.values_list('metric', 'year', 'month', 'branch_key', 'amount'))
+        rebuild_financial_rollups()
+        rebuilt = set(FinancialMonthlyRollup.objects.values_list('metric', 'year', 'month', 'branch_key', 'amount'))
+        self.assertEqual(rebuilt, incremental)
+
+    def test_branchless_cell_is_stored_once(self):
+        _store_rollup('case_income', 1405, 1, None, Decimal(10))
+        _store_rollup('case_income', 1405, 1, None, Decimal(20))
+        cells = FinancialMonthlyRollup.objects.filter(metric='case_income', year=1405, month=1)
+        self.assertEqual(list(cells.values_list('branch_key', 'amount')), [(0, Decimal(20))])
+
+        # درج هم‌زمان دوم برای همان خانه بدون شعبه توسط کلید یکتا رد می‌شود
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FinancialMonthlyRollup.objects.create(metric='case_income', year=1405, month=1, amount=Decimal(20))
+
+
+@override_settings(FINANCIAL_ROLLUPS_ENABLED=False)
+class DisabledFinancialRollupTests(TestCase):
+
+    def test_signals_skip_rollup_when_disabled(self):
+        with CaptureQueriesContext(connection) as queries:
+            income = Income.objects.create(title='درآمد تست', amount=Decimal(100), registration_date=jdate(date.today()))
+            income.amount = Decimal(200)
+            income.save()
+            income.delete()
+        rollup_queries = [
+            query['sql'] for query in queries.captured_queries
+            # لاگ فعالیت در تست‌ها هم‌زمان نوشته می‌شود (بدون صف)
+            if 'financialmonthlyrollup' in query['sql']
+            or (query['sql'].startswith('SELECT') and '"core_activity' not in query['sql'])
+        ]
+        self.assertEqual(rollup_queries, [])
+        self.assertFalse(FinancialMonthlyRollup.objects.exists())
@@ -0,0 +1,49 @@
+import json
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+from core.financial_reports import financial_cache_version, jalali_month_buckets
+from core.financial_snapshots import latest_snapshot, scope_name, write_snapshot
+
+from .test_financial_cache import SharedCacheTestCase
+from .utils import make_user
+
+
+class FinancialSnapshotTests(SharedCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir, ignore_errors=True)
+        settings_override = override_settings(FINANCIAL_SNAPSHOT_DIR=snapshot_dir, FINANCIAL_SNAPSHOTS_ENABLED=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.window_start = jalali_month_buckets(12)[0][1]
+
+    def write(self, payload, version=None):
+        version = financial_cache_version() if version is None else version
+        return write_snapshot(scope_name(), self.window_start, payload, version)
+
+    def test_snapshot_of_other_version_is_stale(self):
+        path = self.write({'labels': []})
+        self.assertEqual(latest_snapshot(scope_name(), self.window_start, financial_cache_version()), path)
+        self.assertIsNone(latest_snapshot(scope_name(), self.window_start, financial_cache_version() + 1))
+
+    def test_snapshot_without_version_is_stale(self):
+        path = self.write({'labels': []})
+        path.rename(path.with_name(path.name.rsplit('-', 1)[0] + '.json.gz'))
+        self.assertIsNone(latest_snapshot(scope_name(), self.window_start, financial_cache_version()))
+
+    def test_financial_write_drops_snapshots(self):
+        self.client.force_login(make_user(is_staff=True))
+        path = self.write({'snapshot': True})
+        self.assertEqual(json.loads(b''.join(self.client.get('/api/financial-chart/').streaming_content)),
+                         {'snapshot': True})
+
+        self.create_income()
+        self.assertFalse(path.exists())
+        response = self.client.get('/api/financial-chart/')
+        self.assertFalse(response.streaming)
+        self.assertNotIn('snapshot', response.json())
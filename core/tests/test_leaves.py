@@ -0,0 +1,125 @@
+from datetime import date, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from core.attendance_sync import sync_attendance
+from core.management.commands.create_daily_attendance import create_attendance_for_dates
+from core.leaves import leave_entitlement, leave_span, rebuild_leave_balances, span_days, validate_leave_request
+from core.models import Attendance, Leave, LeaveBalance
+from core.work_schedule import get_work_schedule
+
+from .utils import jdate, make_employee
+
+
+class HourlyLeaveAttendanceTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee()
+
+    def approve_hourly(self, day, hours):
+        leave = Leave.objects.create(
+            employee=self.employee, leave_type='personal', duration_type='hourly',
+            date=jdate(day), duration_hours=hours,
+        )
+        leave.status = 'approved'
+        leave.save()
+        return leave
+
+    def test_future_hourly_leave_creates_no_attendance(self):
+        self.approve_hourly(date.today() + timedelta(days=3), 2)
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+
+    def test_existing_row_is_updated_and_recalculated(self):
+        day = date.today() - timedelta(days=1)
+        schedule = get_work_schedule()
+        attendance = Attendance(employee=self.employee, date=day, check_in=time(8), check_out=time(15))
+        attendance.calculate_work_duration()
+        attendance.save()
+        self.assertEqual(attendance.overtime_duration, 0)
+
+        leave = self.approve_hourly(day, 2)
+        attendance.refresh_from_db()
+        self.assertEqual((attendance.leave_minutes, attendance.status), (120, 'present'))
+        self.assertEqual(attendance.overtime_duration, min(420 - (schedule.standard_work_minutes - 120), schedule.max_daily_overtime))
+
+        leave.status = 'cancelled'
+        leave.save()
+        attendance.refresh_from_db()
+        self.assertEqual((attendance.leave_minutes, attendance.overtime_duration), (0, 0))
+
+    def test_rows_created_later_pick_up_leave_minutes(self):
+        today = date.today()
+        self.approve_hourly(today, 1.5)
+        create_attendance_for_dates([today])
+        self.assertEqual(Attendance.objects.get(employee=self.employee, date=today).leave_minutes, 90)
+
+        yesterday = today - timedelta(days=1)
+        self.approve_hourly(yesterday, 1)
+        sync_attendance({'events': [{'id': '1', 'type': 'check_in', 'timestamp': f'{yesterday}T08:00:00'}]}, self.employee)
+        self.assertEqual(Attendance.objects.get(employee=self.employee, date=yesterday).leave_minutes, 60)
+
+
+class DailyLeaveLedgerTests(TestCase):
+    start, end = date(2024, 4, 20), date(2024, 4, 26)
+
+    def setUp(self):
+        self.employee = make_employee()
+
+    def annual_leave(self, start=None, end=None, status='pending'):
+        return Leave.objects.create(
+            employee=self.employee, leave_type='annual', duration_type='daily', status=status,
+            start_date=jdate(start or self.start), end_date=jdate(end or self.end),
+        )
+
+    def balance(self):
+        return LeaveBalance.objects.get(employee=self.employee, year=jdate(self.start).year, leave_type='annual')
+
+    def test_approve_and_revoke_keep_attendance_and_balance_in_sync(self):
+        checked_in = Attendance.objects.create(employee=self.employee, date=self.start, check_in=time(8), status='present')
+        leave = self.annual_leave()
+        work_days = span_days(leave_span(leave))
+        self.assertIn(self.start, work_days)
+
+        leave.status = 'approved'
+        leave.save()
+        self.assertEqual(
+            set(Attendance.objects.filter(employee=self.employee, status='leave').values_list('date', flat=True)),
+            set(work_days),
+        )
+        self.assertEqual(self.balance().used_days, len(work_days))
+
+        leave.status = 'cancelled'
+        leave.save()
+        self.assertFalse(Attendance.objects.filter(employee=self.employee, status='leave').exists())
+        checked_in.refresh_from_db()
+        self.assertEqual(checked_in.status, 'present')
+        self.assertEqual(self.balance().used_days, 0)
+
+    def test_incremental_ledger_matches_rebuild(self):
+        first = self.annual_leave(status='approved')
+        second = self.annual_leave(self.end + timedelta(days=5), self.end + timedelta(days=7), status='approved')
+        first.end_date = jdate(self.start + timedelta(days=2))
+        first.save()
+        second.delete()
+        incremental = self.balance().used_days
+
+        rebuild_leave_balances()
+        self.assertEqual(self.balance().used_days, incremental)
+        self.assertEqual(incremental, len(span_days(leave_span(first))))
+
+    def test_overlap_and_exhausted_balance_are_rejected(self):
+        self.annual_leave(status='approved')
+        with self.assertRaisesMessage(ValidationError, 'با مرخصی دیگری'):
+            validate_leave_request(Leave(
+                employee=self.employee, leave_type='annual', duration_type='daily',
+                start_date=jdate(self.end), end_date=jdate(self.end + timedelta(days=1)),
+            ))
+
+        entitlement = leave_entitlement('annual')
+        LeaveBalance.objects.filter(pk=self.balance().pk).update(used_days=entitlement)
+        with self.assertRaisesMessage(ValidationError, 'مانده مرخصی'):
+            validate_leave_request(Leave(
+                employee=self.employee, leave_type='annual', duration_type='daily',
+                start_date=jdate(self.end + timedelta(days=10)), end_date=jdate(self.end + timedelta(days=12)),
+            ))
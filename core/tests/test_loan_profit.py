@@ -0,0 +1,50 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from core.financial_reports import compute_financial_series, jalali_month_buckets
+from core.models import Loan, LoanBuyer
+
+from .utils import make_branch
+
+
+class LoanBuyerProfitTests(TestCase):
+
+    def setUp(self):
+        self.branch = make_branch()
+        self.priced = Loan.objects.create(bank_name='ملی', amount=Decimal('500000000'),
+                                          purchase_rate=Decimal('120000000'), branch=self.branch)
+        self.unpriced = Loan.objects.create(bank_name='ملت', amount=Decimal('300000000'))
+        for index, (name, loan, sale_price, status) in enumerate((
+            ('profit', self.priced, '150000000', 'completed'),
+            ('loss', self.priced, '100000000', 'completed'),
+            ('pending', self.priced, '190000000', 'under_review'),
+            ('unpriced', self.unpriced, '90000000', 'completed'),
+            ('unsold', self.priced, '0', 'completed'),
+        ), start=1):
+            LoanBuyer.objects.create(
+                first_name='خریدار', last_name=name, national_id=f'{index:010d}', bank='ملی',
+                loan=loan, sale_price=Decimal(sale_price), current_status=status,
+            )
+
+    def test_profit_is_annotated_only_for_completed_priced_sales(self):
+        profits = dict(LoanBuyer.objects.with_profit().values_list('last_name', 'profit'))
+        self.assertEqual(profits, {
+            'profit': Decimal('30000000'), 'loss': Decimal('-20000000'),
+            'pending': None, 'unpriced': None, 'unsold': None,
+        })
+        self.assertEqual(set(LoanBuyer.objects.profitable().values_list('last_name', flat=True)), {'profit', 'loss'})
+        self.assertEqual(LoanBuyer.objects.total_profit(), Decimal('10000000'))
+
+    def test_profit_series_follows_buyer_creation_month_and_loan_branch(self):
+        buckets = jalali_month_buckets(1, today=date.today())
+        self.assertEqual(compute_financial_series(buckets, series=['loan_sale_profit']), {'loan_sale_profit': [10000000]})
+        self.assertEqual(
+            compute_financial_series(buckets, series=['loan_sale_profit'], branch=self.branch.pk),
+            {'loan_sale_profit': [10000000]},
+        )
+        self.assertEqual(
+            compute_financial_series(buckets, series=['loan_sale_profit'], branch=make_branch().pk),
+            {'loan_sale_profit': [0]},
+        )
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+import jdatetime
+from django.test import TestCase
+
+from core.attendance_summaries import month_bounds
+from core.leaves import HALF_DAY_FRACTION
+from core.models import Attendance, Leave, LeaveBalance, PayrollResult
+from core.payroll import OVERTIME_RATE, PAYROLL_MONTHLY_HOURS, UNPAID_LEAVE_TYPES, compute_payroll, payroll_policy
+from core.work_schedule import is_work_day
+
+from .utils import make_employee
+
+CENT = Decimal('0.01')
+
+
+def reference_payroll(employee, year, month, policy):
+    """محاسبه مرجع به روش قدیمی: کارمند به کارمند، با Decimal و حلقه روی رکوردها و روزهای کاری"""
+    start, end = month_bounds(year, month)
+    work = overtime = 0
+    for row in Attendance.objects.filter(employee=employee, date__gte=start, date__lt=end):
+        work += row.work_duration or 0
+        overtime += min(row.overtime_duration or 0, policy.max_daily_overtime)
+    overtime = min(overtime, policy.max_monthly_overtime)
+
+    paid = unpaid = Decimal(0)
+    for leave in Leave.objects.filter(employee=employee, status='approved'):
+        if leave.duration_type == 'hourly':
+            hours = Decimal(str(leave.duration_hours)) if start <= leave.date.togregorian() < end else 0
+        else:
+            day, days = leave.start_date.togregorian(), 0
+            while day <= leave.end_date.togregorian():
+                days += start <= day < end and is_work_day(day)
+                day += timedelta(days=1)
+            if leave.leave_type == 'half_day':
+                days *= Decimal(str(HALF_DAY_FRACTION))
+            hours = Decimal(days) * policy.standard_work_minutes / 60
+        if leave.leave_type in UNPAID_LEAVE_TYPES:
+            unpaid += hours
+        else:
+            paid += hours
+
+    salary = employee.base_salary
+    hourly_rate = salary / PAYROLL_MONTHLY_HOURS
+    overtime_pay = (Decimal(overtime) / 60 * hourly_rate * Decimal(str(OVERTIME_RATE))).quantize(CENT, ROUND_HALF_UP)
+    deduction = min(unpaid * hourly_rate, salary).quantize(CENT, ROUND_HALF_UP)
+    return {
+        'work_minutes': work, 'overtime_minutes': overtime,
+        'paid_leave_hours': float(paid), 'unpaid_leave_hours': float(unpaid),
+        'overtime_pay': overtime_pay, 'leave_deduction': deduction, 'net_pay': salary + overtime_pay - deduction,
+    }
+
+
+class ComputePayrollTests(TestCase):
+    year, month = 1403, 1
+
+    def attendance(self, employee, days, work, overtime):
+        start, _ = month_bounds(self.year, self.month)
+        Attendance.objects.bulk_create([
+            Attendance(employee=employee, date=start + timedelta(days=day), status='present',
+                       work_duration=work, overtime_duration=overtime)
+            for day in days
+        ])
+
+    def leave(self, employee, leave_type, start=None, end=None, day=None, hours=None):
+        return Leave.objects.create(
+            employee=employee, leave_type=leave_type, status='approved',
+            duration_type='hourly' if hours else 'daily',
+            start_date=start and jdatetime.date(*start), end_date=end and jdatetime.date(*end),
+            date=day and jdatetime.date(*day), duration_hours=hours,
+        )
+
+    def test_vectorized_result_matches_per_employee_reference(self):
+        with_leaves = make_employee(base_salary=Decimal('31500000'))
+        capped = make_employee(base_salary=Decimal('18750000'))
+        make_employee(employment_status='terminated')
+
+        self.attendance(with_leaves, range(3, 20), 480, 45)
+        self.attendance(with_leaves, [20, 21], 600, 200)
+        self.attendance(capped, range(0, 25), 560, 200)
+        self.leave(with_leaves, 'unpaid', start=(1402, 12, 28), end=(1403, 1, 2))
+        self.leave(with_leaves, 'half_day', start=(1403, 1, 25), end=(1403, 1, 25))
+        self.leave(with_leaves, 'personal', day=(1403, 1, 28), hours=3.5)
+        self.leave(with_leaves, 'annual', start=(1403, 2, 5), end=(1403, 2, 6))
+
+        policy = payroll_policy()
+        self.assertEqual(compute_payroll(self.year, self.month, policy), 2)
+        for employee in (with_leaves, capped):
+            result = PayrollResult.objects.get(employee=employee, year=self.year, month=self.month)
+            expected = reference_payroll(employee, self.year, self.month, policy)
+            for field in ('work_minutes', 'overtime_minutes', 'paid_leave_hours', 'unpaid_leave_hours'):
+                self.assertAlmostEqual(getattr(result, field), expected[field], places=2, msg=field)
+            for field in ('overtime_pay', 'leave_deduction', 'net_pay'):
+                self.assertAlmostEqual(getattr(result, field), expected[field], delta=CENT, msg=field)
+
+        # یک روز مرخصی بدون حقوق در این ماه (اسفند بیرون از ماه و ۲ فروردین پنج‌شنبه و بسته است)
+        self.assertEqual(PayrollResult.objects.get(employee=with_leaves).unpaid_leave_hours, policy.standard_work_minutes / 60)
+        capped_result = PayrollResult.objects.get(employee=capped)
+        self.assertEqual(capped_result.overtime_minutes, policy.max_monthly_overtime)
+
+    def test_leave_over_weekend_matches_leave_ledger(self):
+        employee = make_employee()
+        # چهارشنبه ۸ تا شنبه ۱۱ فروردین: پنج‌شنبه و جمعه بسته‌اند
+        self.leave(employee, 'unpaid', start=(1403, 1, 8), end=(1403, 1, 11))
+        policy = payroll_policy()
+        compute_payroll(self.year, self.month, policy)
+
+        self.assertEqual(LeaveBalance.objects.get(employee=employee, leave_type='unpaid').used_days, 2)
+        self.assertEqual(PayrollResult.objects.get(employee=employee).unpaid_leave_hours,
+                         2 * policy.standard_work_minutes / 60)
+        self.assertEqual(reference_payroll(employee, self.year, self.month, policy)['unpaid_leave_hours'],
+                         2 * policy.standard_work_minutes / 60)
+
+    def test_recompute_updates_rows_in_place(self):
+        employee = make_employee()
+        self.attendance(employee, [0], 480, 60)
+        compute_payroll(self.year, self.month)
+        self.attendance(employee, [1], 480, 60)
+        compute_payroll(self.year, self.month)
+        result = PayrollResult.objects.get(employee=employee)
+        self.assertEqual((result.work_minutes, result.overtime_minutes), (960, 120))
@@ -0,0 +1,53 @@
+from datetime import date, time
+
+from django.test import TestCase, override_settings
+
+from core.models import Attendance, CompanySettings, DayWorkSchedule
+from core.work_schedule import (
+    DEFAULT_WORK_SCHEDULE, get_day_schedule, get_work_schedule, invalidate_work_schedule, is_work_day,
+)
+
+SATURDAY = date(2024, 4, 20)
+THURSDAY = date(2024, 4, 25)
+
+
+class WorkScheduleCacheTests(TestCase):
+
+    def setUp(self):
+        # کش process بین تست‌ها (و پس از rollback تراکنش تست) معتبر نمی‌ماند
+        invalidate_work_schedule()
+        self.addCleanup(invalidate_work_schedule)
+
+    def test_schedule_is_loaded_once(self):
+        with self.assertNumQueries(2):
+            get_work_schedule()
+        with self.assertNumQueries(0):
+            self.assertTrue(is_work_day(SATURDAY))
+            self.assertFalse(is_work_day(THURSDAY))
+            attendance = Attendance(date=SATURDAY, check_in=time(8), check_out=time(18))
+            attendance.calculate_work_duration()
+
+    def test_saving_settings_or_day_schedule_invalidates(self):
+        get_work_schedule()
+        saturday = DayWorkSchedule.objects.get(day_of_week=0)
+        saturday.work_status = 'closed'
+        saturday.save()
+        self.assertFalse(is_work_day(SATURDAY))
+
+        company_settings = CompanySettings.objects.get()
+        company_settings.standard_work_minutes = 420
+        company_settings.save()
+        self.assertEqual(get_work_schedule().standard_work_minutes, 420)
+
+        DayWorkSchedule.objects.filter(day_of_week=3).update(work_end=time(15))
+        # update() سیگنال ندارد؛ تا انقضای کش مقدار قبلی خوانده می‌شود
+        self.assertEqual(get_day_schedule(date(2024, 4, 23)).work_end, time(17))
+        with override_settings(WORK_SCHEDULE_CACHE_TIMEOUT=0):
+            self.assertEqual(get_day_schedule(date(2024, 4, 23)).work_end, time(15))
+
+    def test_defaults_without_company_settings(self):
+        CompanySettings.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_work_schedule(), DEFAULT_WORK_SCHEDULE)
+        self.assertTrue(is_work_day(SATURDAY))
+        self.assertFalse(is_work_day(THURSDAY))
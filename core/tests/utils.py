@@ -0,0 +1,52 @@
+"""
+ابزارهای مشترک تست‌ها - ساخت حداقل داده لازم
+Shared fixtures for core tests
+"""
+import itertools
+from decimal import Decimal
+
+import jdatetime
+from django.contrib.auth.models import User
+
+from core.models import Branch, Employee
+
+_sequence = itertools.count(1)
+
+
+def jdate(day):
+    """تاریخ شمسی از تاریخ میلادی"""
+    return jdatetime.date.fromgregorian(date=day)
+
+
+def make_branch(**fields):
+    number = next(_sequence)
+    defaults = {
+        'name': f'شعبه تست {number}',
+        'code': f'TEST-{number}',
+        'address': 'آدرس تست',
+        'phone': '02100000000',
+    }
+    defaults.update(fields)
+    return Branch.objects.create(**defaults)
+
+
+def make_user(**fields):
+    number = next(_sequence)
+    defaults = {'username': f'test_user_{number}', 'first_name': 'کاربر', 'last_name': str(number)}
+    defaults.update(fields)
+    return User.objects.create(**defaults)
+
+
+def make_employee(branch=None, base_salary=Decimal('22000000'), **fields):
+    number = next(_sequence)
+    defaults = {
+        'user': make_user(),
+        'national_id': f'{number:010d}',
+        'personnel_id': f'TEST-{number}',
+        'branch': branch,
+        'job_title': Employee.JOB_TITLE_CHOICES[0][0],
+        'employment_status': 'active',
+        'base_salary': base_salary,
+    }
+    defaults.update(fields)
+    return Employee.objects.create(**defaults)
@@ -14,6 +14,8 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('financial-chart/', views.financial_chart, name='financial_chart'),
     path('api/financial-chart/', views.financial_chart_api, name='financial_chart_api'),
+    path('api/financial-analytics/', views.financial_analytics_api, name='financial_analytics_api'),
+    path('api/financial-export/', views.financial_export, name='financial_export'),
     
     # Pages - Attendance & Leave (سابق روت‌ها برای سازگاری)
     path('attendance/', views.attendance_page, name='attendance_page'),
@@ -28,6 +30,7 @@ urlpatterns = [
     # API - Attendance
     path('api/check-in/', views.check_in, name='check_in'),
     path('api/check-out/', views.check_out, name='check_out'),
+    path('api/attendance-sync/', views.attendance_sync, name='attendance_sync'),
     path('api/attendance-status/', views.get_attendance_status, name='attendance_status'),
     path('api/attendance-history/', views.get_attendance_history, name='attendance_history'),
     
@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods, condition
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Q, Count
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Q, Count, Max
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
 from datetime import datetime, timedelta, date
@@ -10,11 +13,24 @@ from decimal import Decimal
 import json
 from .models import (
     Income, Expense, LoanCreditor, LoanCreditorInstallment,
-    Attendance, Employee, Leave, Loan, LoanBuyer, LoanBuyerStatusHistory
+    Attendance, AttendanceMonthlySummary, Leave, Loan, LoanBuyer, LoanBuyerStatusHistory, FinancialMonthlyRollup,
+    Branch
 )
 from vekalet.models import Consultation, CaseFile
 from registry.models import TradeAcquisition, TradePartnership, Company, License
 from .forms import LeaveRequestForm
+from .financial_reports import (
+    jalali_month_buckets, compute_financial_series, financial_cache_enabled, financial_cache_key, financial_cache_version,
+    period_buckets, parse_report_date, is_month_aligned, financial_chart_payload, FINANCIAL_SERIES,
+    compute_financial_series_by_branch, budget_series, jalali_month_start,
+)
+from .financial_snapshots import latest_snapshot, scope_name, snapshot_response
+from .financial_exports import EXPORT_LEDGERS, export_headers, export_rows, stream_csv, stream_xlsx
+from .idempotency import idempotent
+from .attendance_sync import MAX_SYNC_EVENTS, sync_attendance
+from .leaves import hourly_leave_minutes_expression
+from .attendance_summaries import refresh_attendance_summaries, summary_cells, summary_month
+from .signals import create_activity_log
 
 def index(request):
     """صفحه اول - ریدایرکت به لاگین یا داشبورد"""
@@ -54,338 +70,226 @@ def financial_chart(request):
     return render(request, 'financial_chart.html', context)
 
 
+def _financial_chart_scope(request):
+    """
+    شعبه درخواستی، بازه 12 ماهه و اسنپ‌شات تازه (در صورت وجود) برای نمودار مالی
+    یک بار برای هر درخواست محاسبه و بین ETag، Last-Modified و خود view مشترک است
+    """
+    if not hasattr(request, '_financial_chart_scope'):
+        branch = request.GET.get('branch')
+        branch = int(branch) if branch and branch.isdigit() else None
+        buckets = jalali_month_buckets(12)
+        snapshot = None
+        if settings.FINANCIAL_SNAPSHOTS_ENABLED:
+            snapshot = latest_snapshot(scope_name(branch), buckets[0][1], financial_cache_version())
+        request._financial_chart_scope = (branch, buckets, snapshot)
+    return request._financial_chart_scope
+
+
+def _financial_chart_etag(request):
+    """ETag نمودار مالی از نسخه داده‌های مالی یا نام اسنپ‌شات (بدون جمع‌آوری مجدد داده)"""
+    if not request.user.is_staff and not request.user.is_superuser:
+        return None
+    branch, buckets, snapshot = _financial_chart_scope(request)
+    if snapshot is not None:
+        return f'fs-{scope_name(branch)}-{snapshot.name}'
+    # نسخه کش محلی هر process است؛ ETag بر پایه آن بین workerها معتبر نیست
+    if not financial_cache_enabled():
+        return None
+    return (f'fc-{financial_cache_version()}-{scope_name(branch)}-{buckets[0][1].isoformat()}-'
+            f'{int(settings.FINANCIAL_ROLLUPS_ENABLED)}')
+
+
+def _financial_chart_last_modified(request):
+    """Last-Modified نمودار مالی از زمان ساخت اسنپ‌شات یا آخرین بروزرسانی جدول تجمیع"""
+    if not request.user.is_staff and not request.user.is_superuser:
+        return None
+    _, buckets, snapshot = _financial_chart_scope(request)
+    if snapshot is not None:
+        return datetime.fromtimestamp(snapshot.stat().st_mtime)
+    if not settings.FINANCIAL_ROLLUPS_ENABLED:
+        return None
+    last_updated = FinancialMonthlyRollup.objects.aggregate(last=Max('updated_at'))['last']
+    # با شروع ماه جدید بازه نمودار تغییر می‌کند
+    month_start = datetime.combine(buckets[0][1], datetime.min.time())
+    return max(filter(None, [last_updated, month_start]))
+
+
 @login_required(login_url='core:login')
+@condition(etag_func=_financial_chart_etag, last_modified_func=_financial_chart_last_modified)
 def financial_chart_api(request):
     """API endpoint برای دریافت داده‌های نمودار مالی - 12 ماه"""
     # فقط ادمین و کارمندان می‌توانند این API را استفاده کنند
     if not request.user.is_staff and not request.user.is_superuser:
         return JsonResponse({'error': 'Forbidden'}, status=403)
     
-    # دریافت 12 ماه اخیر
-    today = date.today()
-    months_data = []
-    labels = []
+    # دریافت 12 ماه اخیر (ماه‌های شمسی) - تمام سری‌ها با یک کوئری برای هر جدول منبع
+    # پارامتر اختیاری branch داده یک شعبه را برمی‌گرداند
+    branch, buckets, snapshot = _financial_chart_scope(request)
+    
+    # اسنپ‌شات از پیش محاسبه‌شده (build_financial_snapshots) مستقیماً از دیسک استریم می‌شود
+    if snapshot is not None:
+        try:
+            return snapshot_response(request, snapshot)
+        except FileNotFoundError:
+            pass
     
-    # آرایه‌های داده برای هر ماه
-    income_data = []
-    consultation_income_data = []
-    case_income_data = []
-    registry_trade_acquisition_income_data = []  # درآمد بازرگانی اخذ
-    registry_trade_partnership_income_data = []  # درآمد بازرگانی مشارکتی
-    registry_company_income_data = []  # درآمد ثبت شرکت
-    registry_license_income_data = []  # درآمد مجوزها
-    expense_data = []
-    creditor_paid_data = []
-    creditor_unpaid_data = []
-    net_profit_data = []
-    loan_sale_profit_data = []  # سود فروش وام
+    # کش پاسخ بر اساس دامنه (کل / شعبه) و بازه زمانی؛ با هر تغییر در داده‌های مالی باطل می‌شود
+    if not financial_cache_enabled():
+        return JsonResponse(financial_chart_payload(buckets, branch=branch))
+    cache_key = financial_cache_key('chart', scope_name(branch), buckets)
+    data = cache.get(cache_key)
+    if data is None:
+        data = financial_chart_payload(buckets, branch=branch)
+        cache.set(cache_key, data, settings.FINANCIAL_CHART_CACHE_TIMEOUT)
+    
+    return JsonResponse(data)
+
+
+@login_required(login_url='core:login')
+@require_http_methods(["GET"])
+def financial_analytics_api(request):
+    """API تحلیل مالی با بازه زمانی، دقت زمانی، شعبه و سری‌های دلخواه"""
+    if not request.user.is_staff and not request.user.is_superuser:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
     
-    # شامل 12 ماه
-    for i in range(11, -1, -1):
-        # محاسبه ماه و سال
-        current_date = today.replace(day=1) - timedelta(days=i*30)
-        year = current_date.year
-        month = current_date.month
-        
-        # محدوده زمانی ماه
-        month_start = datetime(year, month, 1)
-        if month == 12:
-            month_end = datetime(year + 1, 1, 1)
+    # پارامترها: start/end (شمسی یا میلادی)، granularity، branch، series (جدا شده با کاما)
+    try:
+        end = parse_report_date(request.GET['end']) if request.GET.get('end') else date.today()
+        if request.GET.get('start'):
+            start = parse_report_date(request.GET['start'])
         else:
-            month_end = datetime(year, month + 1, 1)
-        
-        # نام ماه برای label
-        month_name = ['فروردین', 'اردیبهشت', 'خرداد', 'تیر', 'مرداد', 'شهریور',
-                      'مهر', 'آبان', 'آذر', 'دی', 'بهمن', 'اسفند'][month - 1]
-        labels.append(f'{month_name} {year}')
-        
-        # جمع درآمدها از Income مدل
-        base_income = Income.objects.filter(
-            registration_date__gte=month_start.date(),
-            registration_date__lt=month_end.date()
-        ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-        
-        # اضافه کردن درآمد از هزینه مشاوره
-        # 1. مشاورات پرداخت‌شده یا رایگان کامل
-        consultation_income = Consultation.objects.filter(
-            consultation_date__gte=month_start,
-            consultation_date__lt=month_end,
-            payment_status__in=['paid', 'free']  # فقط پرداخت‌شده یا رایگان
-        ).aggregate(Sum('consultation_fee'))['consultation_fee__sum'] or Decimal('0')
-        
-        # 2. مبلغ پرداخت‌شده برای مشاورات جزئی
-        partial_consultation_paid = Consultation.objects.filter(
-            consultation_date__gte=month_start,
-            consultation_date__lt=month_end,
-            payment_status='partial'
-        ).aggregate(Sum('amount_paid'))['amount_paid__sum'] or Decimal('0')
-        
-        consultation_income += partial_consultation_paid
-        
-        # اضافه کردن درآمد از مبلغ قرارداد پرونده‌ها
-        case_income = CaseFile.objects.filter(
-            case_start_date__gte=month_start.date(),
-            case_start_date__lt=month_end.date()
-        ).aggregate(Sum('contract_amount'))['contract_amount__sum'] or Decimal('0')
-        
-        # درآمدهای ثبتی (Registry)
-        # 1. درآمد بازرگانی اخذ
-        registry_trade_acquisition_income = TradeAcquisition.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).aggregate(Sum('amount_received'))['amount_received__sum'] or Decimal('0')
-        
-        # 2. درآمد بازرگانی مشارکتی
-        registry_trade_partnership_income = TradePartnership.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).aggregate(Sum('amount_received'))['amount_received__sum'] or Decimal('0')
-        
-        # 3. درآمد شرکت‌ها
-        registry_company_income = Company.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).aggregate(Sum('amount_received'))['amount_received__sum'] or Decimal('0')
-        
-        # 4. درآمد مجوزها
-        registry_license_income = License.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).aggregate(Sum('amount_received'))['amount_received__sum'] or Decimal('0')
-        
-        # جمع کل درآمدهای ثبتی
-        total_registry_income = (registry_trade_acquisition_income + 
-                                registry_trade_partnership_income + 
-                                registry_company_income + 
-                                registry_license_income)
-        
-        # جمع کل درآمدها
-        total_income = base_income + consultation_income + case_income + total_registry_income
-        income_data.append(int(total_income))
-        consultation_income_data.append(int(consultation_income))
-        case_income_data.append(int(case_income))
-        registry_trade_acquisition_income_data.append(int(registry_trade_acquisition_income))
-        registry_trade_partnership_income_data.append(int(registry_trade_partnership_income))
-        registry_company_income_data.append(int(registry_company_income))
-        registry_license_income_data.append(int(registry_license_income))
-        
-        # جمع هزینه‌ها
-        total_expense = Expense.objects.filter(
-            registration_date__gte=month_start.date(),
-            registration_date__lt=month_end.date()
-        ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0')
-        expense_data.append(int(total_expense))
-        
-        # بستانکاری پرداخت‌شده (پرداخت‌شده در این ماه)
-        creditor_paid = LoanCreditorInstallment.objects.filter(
-            payment_date__gte=month_start.date(),
-            payment_date__lt=month_end.date(),
-            payment_date__isnull=False
-        ).aggregate(Sum('paid_amount'))['paid_amount__sum'] or Decimal('0')
-        creditor_paid_data.append(int(creditor_paid))
-        
-        # بستانکاری پرداخت‌نشده (ایجاد شده در این ماه، هنوز پرداخت‌نشده)
-        creditor_unpaid = LoanCreditorInstallment.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end,
-            payment_date__isnull=True
-        ).aggregate(Sum('paid_amount'))['paid_amount__sum'] or Decimal('0')
-        creditor_unpaid_data.append(int(creditor_unpaid))
-        
-        # سود فروش وام: قیمت فروش - قیمت خرید
-        # فقط برای خریداران تکمیل‌شده (completed)
-        loan_sale_profit = Decimal('0')
-        completed_buyers = LoanBuyer.objects.filter(
-            current_status='completed',
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        )
-        for buyer in completed_buyers:
-            if buyer.loan and buyer.loan.purchase_rate and buyer.sale_price:
-                profit = buyer.sale_price - buyer.loan.purchase_rate
-                loan_sale_profit += profit
-        loan_sale_profit_data.append(int(loan_sale_profit))
-        
-        # سود خالص (شامل سود فروش وام)
-        profit = int(total_income) + int(loan_sale_profit) - int(total_expense) - int(creditor_paid)
-        net_profit_data.append(profit)
+            start = jalali_month_buckets(12, today=end)[0][1]
+        granularity = request.GET.get('granularity', 'month')
+        buckets = period_buckets(start, end, granularity)
+        
+        branch = int(request.GET['branch']) if request.GET.get('branch') else None
+        
+        series = [name.strip() for name in request.GET.get('series', '').split(',') if name.strip()]
+        unknown = [name for name in series if name not in FINANCIAL_SERIES]
+        if unknown:
+            raise ValueError(f"سری نامعتبر: {', '.join(unknown)}")
+        series = series or list(FINANCIAL_SERIES)
+        
+        # breakdown=branch: تمام سری‌ها به تفکیک شعبه همراه با مقایسه هزینه با بودجه ماهانه
+        breakdown = request.GET.get('breakdown', '')
+        if breakdown not in ('', 'branch'):
+            raise ValueError(f'نوع تفکیک نامعتبر: {breakdown}')
+        if breakdown and branch is not None:
+            raise ValueError('تفکیک شعبه همراه با فیلتر شعبه قابل استفاده نیست')
+        if breakdown and 'expense' not in series:
+            series.append('expense')
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
-    # جمع کل 12 ماه
-    total_income_12m = sum(income_data)
-    total_consultation_income_12m = sum(consultation_income_data)
-    total_case_income_12m = sum(case_income_data)
-    total_registry_trade_acquisition_12m = sum(registry_trade_acquisition_income_data)
-    total_registry_trade_partnership_12m = sum(registry_trade_partnership_income_data)
-    total_registry_company_12m = sum(registry_company_income_data)
-    total_registry_license_12m = sum(registry_license_income_data)
-    total_expense_12m = sum(expense_data)
-    total_creditor_paid_12m = sum(creditor_paid_data)
-    total_creditor_unpaid_12m = sum(creditor_unpaid_data)
-    total_loan_sale_profit_12m = sum(loan_sale_profit_data)
-    total_net_profit_12m = sum(net_profit_data)
+    # جدول تجمیع فقط برای بازه‌های کامل ماه شمسی قابل استفاده است
+    from_rollups = settings.FINANCIAL_ROLLUPS_ENABLED and is_month_aligned(buckets)
     
-    return JsonResponse({
-        'summary': {
-            'total_income': total_income_12m,
-            'total_consultation_income': total_consultation_income_12m,
-            'total_case_income': total_case_income_12m,
-            'total_registry_trade_acquisition': total_registry_trade_acquisition_12m,
-            'total_registry_trade_partnership': total_registry_trade_partnership_12m,
-            'total_registry_company': total_registry_company_12m,
-            'total_registry_license': total_registry_license_12m,
-            'total_expense': total_expense_12m,
-            'total_creditor_paid': total_creditor_paid_12m,
-            'total_creditor_unpaid': total_creditor_unpaid_12m,
-            'total_loan_sale_profit': total_loan_sale_profit_12m,
-            'net_profit': total_net_profit_12m,
-            'period': '12 ماه اخیر'
-        },
-        'labels': labels,
-        'datasets': [
-            {
-                'label': 'درآمدها (کل)',
-                'data': income_data,
-                'borderColor': 'rgba(46, 204, 113, 1)',
-                'backgroundColor': 'rgba(46, 204, 113, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': True,
-                'pointRadius': 4,
-                'pointHoverRadius': 6
-            },
-            {
-                'label': 'درآمد مشاورات',
-                'data': consultation_income_data,
-                'borderColor': 'rgba(52, 211, 153, 1)',
-                'backgroundColor': 'rgba(52, 211, 153, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': False,
-                'pointRadius': 3,
-                'pointHoverRadius': 5,
-                'borderDash': [5, 5]
-            },
-            {
-                'label': 'درآمد پرونده‌ها',
-                'data': case_income_data,
-                'borderColor': 'rgba(34, 197, 94, 1)',
-                'backgroundColor': 'rgba(34, 197, 94, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': False,
-                'pointRadius': 3,
-                'pointHoverRadius': 5,
-                'borderDash': [5, 5]
-            },
-            {
-                'label': 'درآمد بازرگانی اخذ',
-                'data': registry_trade_acquisition_income_data,
-                'borderColor': 'rgba(230, 126, 34, 1)',
-                'backgroundColor': 'rgba(230, 126, 34, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': False,
-                'pointRadius': 3,
-                'pointHoverRadius': 5,
-                'borderDash': [5, 5]
-            },
-            {
-                'label': 'درآمد بازرگانی مشارکتی',
-                'data': registry_trade_partnership_income_data,
-                'borderColor': 'rgba(189, 195, 199, 1)',
-                'backgroundColor': 'rgba(189, 195, 199, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': False,
-                'pointRadius': 3,
-                'pointHoverRadius': 5,
-                'borderDash': [5, 5]
-            },
-            {
-                'label': 'درآمد شرکت‌ها',
-                'data': registry_company_income_data,
-                'borderColor': 'rgba(192, 57, 43, 1)',
-                'backgroundColor': 'rgba(192, 57, 43, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': False,
-                'pointRadius': 3,
-                'pointHoverRadius': 5,
-                'borderDash': [5, 5]
-            },
-            {
-                'label': 'درآمد مجوزها',
-                'data': registry_license_income_data,
-                'borderColor': 'rgba(127, 140, 141, 1)',
-                'backgroundColor': 'rgba(127, 140, 141, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': False,
-                'pointRadius': 3,
-                'pointHoverRadius': 5,
-                'borderDash': [5, 5]
-            },
-            {
-                'label': 'هزینه‌ها',
-                'data': expense_data,
-                'borderColor': 'rgba(231, 76, 60, 1)',
-                'backgroundColor': 'rgba(231, 76, 60, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': True,
-                'pointRadius': 4,
-                'pointHoverRadius': 6
-            },
-            {
-                'label': 'بستانکاری پرداخت‌شده',
-                'data': creditor_paid_data,
-                'borderColor': 'rgba(52, 152, 219, 1)',
-                'backgroundColor': 'rgba(52, 152, 219, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': True,
-                'pointRadius': 4,
-                'pointHoverRadius': 6
-            },
-            {
-                'label': 'بستانکاری معوق',
-                'data': creditor_unpaid_data,
-                'borderColor': 'rgba(241, 196, 15, 1)',
-                'backgroundColor': 'rgba(241, 196, 15, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': True,
-                'pointRadius': 4,
-                'pointHoverRadius': 6
-            },
-            {
-                'label': 'سود فروش وام',
-                'data': loan_sale_profit_data,
-                'borderColor': 'rgba(155, 89, 182, 1)',
-                'backgroundColor': 'rgba(155, 89, 182, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': True,
-                'pointRadius': 4,
-                'pointHoverRadius': 6
-            },
-            {
-                'label': 'سود خالص',
-                'data': net_profit_data,
-                'borderColor': 'rgba(26, 188, 156, 1)',
-                'backgroundColor': 'rgba(26, 188, 156, 0.1)',
-                'borderWidth': 2,
-                'tension': 0.3,
-                'fill': True,
-                'pointRadius': 4,
-                'pointHoverRadius': 6
-            },
-        ]
-    })
+    use_cache = financial_cache_enabled()
+    cache_key = financial_cache_key(
+        f"analytics:{granularity}:{breakdown}:{','.join(series)}",
+        scope_name(branch),
+        buckets,
+    ) if use_cache else None
+    data = cache.get(cache_key) if use_cache else None
+    if data is None:
+        data = {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'granularity': granularity,
+            'branch': branch,
+            'labels': [label for label, _, _ in buckets],
+        }
+        if breakdown:
+            data['branches'] = _financial_branch_breakdown(buckets, series, from_rollups)
+        else:
+            values = compute_financial_series(buckets, from_rollups=from_rollups, series=series, branch=branch)
+            data['series'] = values
+            data['totals'] = {name: sum(points) for name, points in values.items()}
+        if use_cache:
+            cache.set(cache_key, data, settings.FINANCIAL_CHART_CACHE_TIMEOUT)
+    
+    return JsonResponse(data)
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+@login_required(login_url='core:login')
+@require_http_methods(["GET"])
+def financial_export(request):
+    """خروجی استریم CSV/XLSX ردیف‌های دفاتر مالی در یک بازه زمانی"""
+    if not request.user.is_staff and not request.user.is_superuser:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    
+    # پارامترها: kind (income/expense/installments/consultations/registry)، start/end، format، branch
+    try:
+        kind = request.GET.get('kind', 'income')
+        if kind not in EXPORT_LEDGERS:
+            raise ValueError(f'نوع دفتر نامعتبر: {kind}')
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'فرمت نامعتبر: {export_format}')
+        end = parse_report_date(request.GET['end']) if request.GET.get('end') else date.today()
+        if request.GET.get('start'):
+            start = parse_report_date(request.GET['start'])
+        else:
+            start = jalali_month_buckets(1, today=end)[0][1]
+        if start > end:
+            raise ValueError('تاریخ شروع بعد از تاریخ پایان است')
+        branch = int(request.GET['branch']) if request.GET.get('branch') else None
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    rows = export_rows(kind, start, end, branch=branch)
+    writer = stream_csv if export_format == 'csv' else stream_xlsx
+    response = StreamingHttpResponse(writer(export_headers(kind), rows), content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}_{start:%Y%m%d}_{end:%Y%m%d}.{export_format}"'
+    )
+    return response
+
+
+def _financial_branch_breakdown(buckets, series, from_rollups):
+    """سری‌های مالی هر شعبه (یک کوئری گروه‌بندی‌شده برای هر جدول منبع) و مقایسه هزینه با بودجه"""
+    by_branch = compute_financial_series_by_branch(buckets, from_rollups=from_rollups, series=series)
+    empty = {name: [0] * len(buckets) for name in series}
+    
+    result = []
+    for branch in Branch.objects.order_by('name').values('id', 'name', 'monthly_budget'):
+        values = by_branch.get(branch['id'], empty)
+        budget = budget_series(buckets, branch['monthly_budget'])
+        result.append({
+            'id': branch['id'],
+            'name': branch['name'],
+            'monthly_budget': int(branch['monthly_budget'] or 0),
+            'series': values,
+            'totals': {name: sum(points) for name, points in values.items()},
+            'budget': budget,
+            'budget_remaining': [amount - spent for amount, spent in zip(budget, values['expense'])],
+        })
+    
+    # رکوردهای بدون شعبه (از جمله درآمدهای مشاوره، پرونده و ثبت)
+    if None in by_branch:
+        values = by_branch[None]
+        result.append({
+            'id': None,
+            'name': 'بدون شعبه',
+            'monthly_budget': None,
+            'series': values,
+            'totals': {name: sum(points) for name, points in values.items()},
+            'budget': None,
+            'budget_remaining': None,
+        })
+    return result
 
 
 @login_required(login_url='core:login')
 @require_http_methods(["POST"])
+@idempotent
 def check_in(request):
     """ثبت ورود کارمند یا وکیل"""
     try:
@@ -398,63 +302,51 @@ def check_in(request):
         
         # پیدا کردن یا ایجاد کارمند
         try:
-            employee, created = Employee.objects.get_or_create(user=request.user)
-            # اگر نو ایجاد شد، اطلاعات را از UserProfile پر کنیم
-            if created and hasattr(request.user, 'profile'):
-                profile = request.user.profile
-                employee.national_id = profile.national_id
-                employee.phone = profile.phone
-                employee.birth_date = profile.birth_date
-                employee.gender = profile.gender
-                employee.address = profile.address
-                employee.branch = profile.branch
-                employee.personnel_id = profile.personnel_id
-                employee.job_title = 'lawyer' if profile.role == 'lawyer' else 'other'
-                employee.contract_type = profile.contract_type
-                employee.employment_status = profile.employment_status
-                employee.hire_date = profile.hire_date
-                employee.base_salary = profile.base_salary
-                employee.benefits = profile.benefits
-                employee.payment_method = profile.payment_method
-                employee.bank_account_number = profile.bank_account_number
-                employee.insurance_info = profile.insurance_info
-                employee.education = profile.education
-                employee.profile_picture = profile.profile_picture
-                employee.save()
+            employee = request.employee
+            employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
         except Exception as e:
             return JsonResponse({
                 'success': False,
                 'message': f'خطا در بارگذاری اطلاعات: {str(e)}'
             }, status=400)
         
-        # چک کردن اینکه آیا امروز قبلاً ورود کرده است
+        # ثبت ورود با یک INSERT (دقایق مرخصی ساعتی با زیرکوئری در همان دستور)؛ برخورد با
+        # unique (employee, date) یعنی رکورد امروز از قبل وجود دارد (کلیک هم‌زمان دوباره یا
+        # رکورد ساخته‌شده توسط create_daily_attendance)
         today = date.today()
-        existing = Attendance.objects.filter(
-            employee=employee,
-            date=today
-        ).first()
-        
-        if existing:
-            if existing.check_out:
-                # امروز ورود و خروج انجام داده است
-                return JsonResponse({
-                    'success': False,
-                    'message': 'شما امروز قبلاً خروج کرده‌اید. فردا می‌توانید دوباره ورود کنید.'
-                }, status=400)
-            else:
-                # ورود کرده‌ است ولی خروج نکرده است
+        now = datetime.now()
+        try:
+            with transaction.atomic():
+                Attendance.objects.create(
+                    employee=employee,
+                    date=today,
+                    check_in=now.time(),
+                    status='present',
+                    leave_minutes=hourly_leave_minutes_expression(employee.pk, today),
+                )
+        except IntegrityError:
+            # رکورد از پیش ساخته‌شده بدون ورود با یک UPDATE شرطی تکمیل می‌شود
+            # (دقایق مرخصی ساعتی این رکورد را سازنده آن یا تایید مرخصی نوشته است)
+            updated = Attendance.objects.filter(
+                employee=employee,
+                date=today,
+                check_in__isnull=True
+            ).exclude(status='leave').update(check_in=now.time(), status='present', updated_at=now)
+            if not updated:
+                existing = Attendance.objects.filter(employee=employee, date=today).first()
+                if existing and existing.check_out:
+                    # امروز ورود و خروج انجام داده است
+                    message = 'شما امروز قبلاً خروج کرده‌اید. فردا می‌توانید دوباره ورود کنید.'
+                elif existing and existing.status == 'leave' and not existing.check_in:
+                    message = 'برای امروز مرخصی ثبت شده است.'
+                else:
+                    # ورود کرده‌ است ولی خروج نکرده است
+                    message = 'شما امروز قبلاً ورود کرده‌اید. ابتدا باید خروج کنید.'
                 return JsonResponse({
                     'success': False,
-                    'message': 'شما امروز قبلاً ورود کرده‌اید. ابتدا باید خروج کنید.'
+                    'message': message
                 }, status=400)
-        
-        # ایجاد رکورد ورود جدید
-        now = datetime.now()
-        attendance = Attendance.objects.create(
-            employee=employee,
-            date=today,
-            check_in=now.time()
-        )
+            refresh_attendance_summaries(summary_cells(employee.pk, [today]))
         
         return JsonResponse({
             'success': True,
@@ -471,6 +363,7 @@ def check_in(request):
 
 @login_required(login_url='core:login')
 @require_http_methods(["POST"])
+@idempotent
 def check_out(request):
     """ثبت خروج کارمند یا وکیل"""
     try:
@@ -483,29 +376,8 @@ def check_out(request):
         
         # پیدا کردن یا ایجاد کارمند
         try:
-            employee, created = Employee.objects.get_or_create(user=request.user)
-            # اگر نو ایجاد شد، اطلاعات را از UserProfile پر کنیم
-            if created and hasattr(request.user, 'profile'):
-                profile = request.user.profile
-                employee.national_id = profile.national_id
-                employee.phone = profile.phone
-                employee.birth_date = profile.birth_date
-                employee.gender = profile.gender
-                employee.address = profile.address
-                employee.branch = profile.branch
-                employee.personnel_id = profile.personnel_id
-                employee.job_title = 'lawyer' if profile.role == 'lawyer' else 'other'
-                employee.contract_type = profile.contract_type
-                employee.employment_status = profile.employment_status
-                employee.hire_date = profile.hire_date
-                employee.base_salary = profile.base_salary
-                employee.benefits = profile.benefits
-                employee.payment_method = profile.payment_method
-                employee.bank_account_number = profile.bank_account_number
-                employee.insurance_info = profile.insurance_info
-                employee.education = profile.education
-                employee.profile_picture = profile.profile_picture
-                employee.save()
+            employee = request.employee
+            employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -519,23 +391,28 @@ def check_out(request):
             date=today
         ).first()
         
-        if not attendance:
+        if not attendance or not attendance.check_in:
             return JsonResponse({
                 'success': False,
                 'message': 'شما امروز ورود نکرده‌اید.'
             }, status=400)
         
-        if attendance.check_out:
+        # ثبت خروج با UPDATE شرطی: از بین درخواست‌های هم‌زمان فقط یکی خروج را ثبت می‌کند
+        now = datetime.now()
+        claimed = Attendance.objects.filter(
+            pk=attendance.pk,
+            check_out__isnull=True
+        ).update(check_out=now.time(), updated_at=now)
+        
+        if not claimed:
             return JsonResponse({
                 'success': False,
                 'message': 'شما امروز قبلاً خروج کرده‌اید.'
             }, status=400)
         
-        # ثبت خروج
-        now = datetime.now()
         attendance.check_out = now.time()
         attendance.calculate_work_duration()
-        attendance.save()
+        attendance.save(update_fields=['work_duration', 'overtime_duration', 'status', 'updated_at'])
         
         return JsonResponse({
             'success': True,
@@ -552,36 +429,129 @@ def check_out(request):
         }, status=500)
 
 
+@login_required(login_url='core:login')
+@require_http_methods(["POST"])
+@idempotent
+def attendance_sync(request):
+    """همگام‌سازی دسته‌ای رویدادهای آفلاین ورود/خروج (کیوسک و موبایل)"""
+    try:
+        try:
+            payload = json.loads(request.body)
+            if not isinstance(payload, dict) or not isinstance(payload.get('events'), list):
+                raise ValueError
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'message': 'بدنه درخواست باید JSON شامل فهرست events باشد'
+            }, status=400)
+        
+        if len(payload['events']) > MAX_SYNC_EVENTS:
+            return JsonResponse({
+                'success': False,
+                'message': f'حداکثر {MAX_SYNC_EVENTS} رویداد در هر درخواست'
+            }, status=400)
+        
+        # کارمند کاربر جاری فقط برای رویدادهای بدون employee_id لازم است (کیوسک‌ها همیشه مشخص می‌کنند)
+        employee = None
+        if any(not isinstance(raw, dict) or not raw.get('employee_id') for raw in payload['events']):
+            try:
+                employee = request.employee
+                employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
+            except Exception as e:
+                return JsonResponse({
+                    'success': False,
+                    'message': f'خطا در بارگذاری اطلاعات: {str(e)}'
+                }, status=400)
+        
+        # ثبت برای سایر کارمندان فقط با مجوز ویرایش حضور و غیاب (حساب کیوسک)
+        result = sync_attendance(
+            payload,
+            employee,
+            allow_other_employees=request.user.has_perm('core.change_attendance'),
+        )
+        
+        if result['records']:
+            create_activity_log(
+                user=request.user,
+                action='import',
+                model_name='Attendance',
+                object_id=None,
+                description=f"همگام‌سازی {result['applied']} رویداد حضور و غیاب",
+                details={
+                    'device_id': str(payload.get('device_id') or '')[:100],
+                    'applied': result['applied'],
+                    'duplicates': result['duplicates'],
+                    'rejected': result['rejected'],
+                },
+                request=request,
+            )
+        
+        return JsonResponse({'success': True, **result})
+    
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'خطا: {str(e)}'
+        }, status=500)
+
+def _attendance_state(request, days):
+    """
+    تعداد و آخرین زمان تغییر رکوردهای حضور کاربر در days روز اخیر
+    (یک کوئری aggregate برای هر درخواست؛ برای ETag و Last-Modified مشترک است)
+    """
+    key = f'_attendance_state_{days}'
+    if not hasattr(request, key):
+        today = date.today()
+        state = Attendance.objects.filter(
+            employee__user=request.user,
+            date__gte=today - timedelta(days=days),
+            date__lte=today,
+        ).aggregate(count=Count('id'), last_updated=Max('updated_at'))
+        # پاسخ به تاریخ امروز هم وابسته است؛ با شروع روز جدید نسخه قبلی معتبر نیست
+        start_of_today = datetime.combine(today, datetime.min.time())
+        state['last_modified'] = max(filter(None, [state['last_updated'], start_of_today]))
+        state['etag'] = f"att-{days}-{today.isoformat()}-{state['count']}-{state['last_modified'].timestamp()}"
+        setattr(request, key, state)
+    return getattr(request, key)
+
+
+def _attendance_status_etag(request):
+    return _attendance_state(request, 0)['etag']
+
+
+def _attendance_status_last_modified(request):
+    return _attendance_state(request, 0)['last_modified']
+
+
+def _attendance_history_days():
+    """بازه اعتبارسنجی تاریخچه: ۷ روز اخیر و کل ماه شمسی جاری (آمار ماهانه)"""
+    today = date.today()
+    return max(7, (today - jalali_month_start(today).togregorian()).days)
+
+
+def _attendance_history_etag(request):
+    return _attendance_state(request, _attendance_history_days())['etag']
+
+
+def _attendance_history_last_modified(request):
+    return _attendance_state(request, _attendance_history_days())['last_modified']
+
+
+def _format_minutes(minutes):
+    """نمایش دقیقه به صورت ساعت:دقیقه"""
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
 @login_required(login_url='core:login')
 @require_http_methods(["GET"])
+@condition(etag_func=_attendance_status_etag, last_modified_func=_attendance_status_last_modified)
 def get_attendance_status(request):
     """دریافت وضعیت حضور و غیاب امروز"""
     try:
         # پیدا کردن یا ایجاد کارمند
         try:
-            employee, created = Employee.objects.get_or_create(user=request.user)
-            # اگر نو ایجاد شد، اطلاعات را از UserProfile پر کنیم
-            if created and hasattr(request.user, 'profile'):
-                profile = request.user.profile
-                employee.national_id = profile.national_id
-                employee.phone = profile.phone
-                employee.birth_date = profile.birth_date
-                employee.gender = profile.gender
-                employee.address = profile.address
-                employee.branch = profile.branch
-                employee.personnel_id = profile.personnel_id
-                employee.job_title = 'lawyer' if profile.role == 'lawyer' else 'other'
-                employee.contract_type = profile.contract_type
-                employee.employment_status = profile.employment_status
-                employee.hire_date = profile.hire_date
-                employee.base_salary = profile.base_salary
-                employee.benefits = profile.benefits
-                employee.payment_method = profile.payment_method
-                employee.bank_account_number = profile.bank_account_number
-                employee.insurance_info = profile.insurance_info
-                employee.education = profile.education
-                employee.profile_picture = profile.profile_picture
-                employee.save()
+            employee = request.employee
+            employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -628,34 +598,14 @@ def get_attendance_status(request):
 
 @login_required(login_url='core:login')
 @require_http_methods(["GET"])
+@condition(etag_func=_attendance_history_etag, last_modified_func=_attendance_history_last_modified)
 def get_attendance_history(request):
     """دریافت تاریخچه حضور ۷ روز اخیر"""
     try:
         # پیدا کردن یا ایجاد کارمند
         try:
-            employee, created = Employee.objects.get_or_create(user=request.user)
-            # اگر نو ایجاد شد، اطلاعات را از UserProfile پر کنیم
-            if created and hasattr(request.user, 'profile'):
-                profile = request.user.profile
-                employee.national_id = profile.national_id
-                employee.phone = profile.phone
-                employee.birth_date = profile.birth_date
-                employee.gender = profile.gender
-                employee.address = profile.address
-                employee.branch = profile.branch
-                employee.personnel_id = profile.personnel_id
-                employee.job_title = 'lawyer' if profile.role == 'lawyer' else 'other'
-                employee.contract_type = profile.contract_type
-                employee.employment_status = profile.employment_status
-                employee.hire_date = profile.hire_date
-                employee.base_salary = profile.base_salary
-                employee.benefits = profile.benefits
-                employee.payment_method = profile.payment_method
-                employee.bank_account_number = profile.bank_account_number
-                employee.insurance_info = profile.insurance_info
-                employee.education = profile.education
-                employee.profile_picture = profile.profile_picture
-                employee.save()
+            employee = request.employee
+            employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -666,21 +616,31 @@ def get_attendance_history(request):
         today = date.today()
         start_date = today - timedelta(days=7)
         
-        records = Attendance.objects.filter(
+        records = list(Attendance.objects.filter(
             employee=employee,
             date__gte=start_date,
             date__lte=today
-        ).order_by('-date')
-        
-        # محاسبه آمار
-        total_days = records.exclude(check_in__isnull=True).count()
-        total_work_minutes = records.aggregate(Sum('work_duration'))['work_duration__sum'] or 0
-        total_overtime_minutes = records.aggregate(Sum('overtime_duration'))['overtime_duration__sum'] or 0
-        
-        total_hours = total_work_minutes // 60
-        total_mins = total_work_minutes % 60
-        overtime_hours = total_overtime_minutes // 60
-        overtime_mins = total_overtime_minutes % 60
+        ).order_by('-date'))
+        
+        # محاسبه آمار ۷ روز از همین ردیف‌ها (بدون کوئری aggregate جداگانه)
+        total_days = sum(1 for record in records if record.check_in)
+        total_work_minutes = sum(record.work_duration or 0 for record in records)
+        total_overtime_minutes = sum(record.overtime_duration or 0 for record in records)
+        
+        # آمار ماه شمسی جاری از خلاصه ماهانه (یک ردیف)
+        year, month = summary_month(today)
+        summary = AttendanceMonthlySummary.objects.filter(employee=employee, year=year, month=month).first()
+        month_stats = {
+            'year': year,
+            'month': month,
+            'present_days': summary.present_days if summary else 0,
+            'absent_days': summary.absent_days if summary else 0,
+            'late_days': summary.late_days if summary else 0,
+            'leave_days': summary.leave_days if summary else 0,
+            'incomplete_days': summary.incomplete_days if summary else 0,
+            'total_hours': _format_minutes(summary.total_work_minutes if summary else 0),
+            'total_overtime': _format_minutes(summary.total_overtime_minutes if summary else 0),
+        }
         
         # فرمت کردن داده‌ها
         data = []
@@ -705,9 +665,10 @@ def get_attendance_history(request):
             'records': data,
             'stats': {
                 'total_days': total_days,
-                'total_hours': f'{total_hours:02d}:{total_mins:02d}',
-                'total_overtime': f'{overtime_hours:02d}:{overtime_mins:02d}'
-            }
+                'total_hours': _format_minutes(total_work_minutes),
+                'total_overtime': _format_minutes(total_overtime_minutes)
+            },
+            'month_stats': month_stats
         })
     
     except Exception as e:
@@ -753,29 +714,8 @@ def attendance_page(request):
         
         # پیدا کردن یا ایجاد کارمند برای وکیل و کارمند
         try:
-            employee, created = Employee.objects.get_or_create(user=request.user)
-            # اگر نو ایجاد شد، اطلاعات را از UserProfile پر کنیم
-            if created and hasattr(request.user, 'profile'):
-                profile = request.user.profile
-                employee.national_id = profile.national_id
-                employee.phone = profile.phone
-                employee.birth_date = profile.birth_date
-                employee.gender = profile.gender
-                employee.address = profile.address
-                employee.branch = profile.branch
-                employee.personnel_id = profile.personnel_id
-                employee.job_title = 'lawyer' if profile.role == 'lawyer' else 'other'
-                employee.contract_type = profile.contract_type
-                employee.employment_status = profile.employment_status
-                employee.hire_date = profile.hire_date
-                employee.base_salary = profile.base_salary
-                employee.benefits = profile.benefits
-                employee.payment_method = profile.payment_method
-                employee.bank_account_number = profile.bank_account_number
-                employee.insurance_info = profile.insurance_info
-                employee.education = profile.education
-                employee.profile_picture = profile.profile_picture
-                employee.save()
+            employee = request.employee
+            employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
         except Exception as e:
             messages.error(request, f'خطا در بارگذاری اطلاعات: {str(e)}')
             return redirect('admin:index')
@@ -809,12 +749,17 @@ def attendance_page(request):
                 can_check_in = False
                 can_check_out = False
         
+        # خلاصه ماه شمسی جاری
+        year, month = summary_month(today)
+        month_summary = AttendanceMonthlySummary.objects.filter(employee=employee, year=year, month=month).first()
+        
         context = {
             'title': 'حضور و غیاب',
             'employee': employee,
             'today': today,
             'attendance': attendance,
             'attendance_history': attendance_history,
+            'month_summary': month_summary,
             'can_check_in': can_check_in,
             'can_check_out': can_check_out,
         }
@@ -841,29 +786,8 @@ def leave_request_page(request):
         
         # پیدا کردن یا ایجاد کارمند برای وکیل و کارمند
         try:
-            employee, created = Employee.objects.get_or_create(user=request.user)
-            # اگر نو ایجاد شد، اطلاعات را از UserProfile پر کنیم
-            if created and hasattr(request.user, 'profile'):
-                profile = request.user.profile
-                employee.national_id = profile.national_id
-                employee.phone = profile.phone
-                employee.birth_date = profile.birth_date
-                employee.gender = profile.gender
-                employee.address = profile.address
-                employee.branch = profile.branch
-                employee.personnel_id = profile.personnel_id
-                employee.job_title = 'lawyer' if profile.role == 'lawyer' else 'other'
-                employee.contract_type = profile.contract_type
-                employee.employment_status = profile.employment_status
-                employee.hire_date = profile.hire_date
-                employee.base_salary = profile.base_salary
-                employee.benefits = profile.benefits
-                employee.payment_method = profile.payment_method
-                employee.bank_account_number = profile.bank_account_number
-                employee.insurance_info = profile.insurance_info
-                employee.education = profile.education
-                employee.profile_picture = profile.profile_picture
-                employee.save()
+            employee = request.employee
+            employee.pk  # اولین دسترسی: خواندن/ساخت کارمند lazy (خطا همین‌جا گرفته می‌شود)
         except Exception as e:
             messages.error(request, f'خطا در بارگذاری اطلاعات: {str(e)}')
             return redirect('admin:index')
@@ -872,7 +796,8 @@ def leave_request_page(request):
         leaves = Leave.objects.filter(employee=employee).order_by('-created_at')
         
         if request.method == 'POST':
-            form = LeaveRequestForm(request.POST)
+            # کارمند پیش از اعتبارسنجی روی instance تنظیم می‌شود (بررسی هم‌پوشانی و مانده در Leave.clean)
+            form = LeaveRequestForm(request.POST, instance=Leave(employee=employee))
             if form.is_valid():
                 leave = form.save(commit=False)
                 leave.employee = employee
@@ -0,0 +1,93 @@
+"""
+تنظیمات ساعات کاری و جدول هفتگی با کش در سطح process
+Process-level cached lookup of CompanySettings and the weekly DayWorkSchedule
+
+هر ذخیره رکورد حضور (calculate_work_duration)، ایجاد رکوردهای روزانه و محاسبه
+حقوق به تنظیمات نیاز دارند؛ تنظیمات و هفت روز جدول کاری یک بار خوانده و به صورت
+یک snapshot تغییرناپذیر در حافظه process نگه داشته می‌شوند. ذخیره/حذف تنظیمات یا
+جدول کاری کش همان process را باطل می‌کند (signals.py)؛ سایر processها پس از
+WORK_SCHEDULE_CACHE_TIMEOUT ثانیه دوباره می‌خوانند.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import time as dt_time
+
+from django.conf import settings
+
+from .models import CompanySettings
+
+DaySchedule = namedtuple('DaySchedule', 'work_status work_start_range_start work_start_range_end work_end')
+WorkSchedule = namedtuple(
+    'WorkSchedule', 'standard_work_minutes max_daily_overtime max_monthly_overtime annual_leave_days days'
+)
+
+# جدول پیش‌فرض (migration 0026): شنبه تا چهارشنبه باز، پنج‌شنبه و جمعه بسته
+DEFAULT_DAY_SCHEDULE = DaySchedule('open', dt_time(7, 0), dt_time(8, 0), dt_time(17, 0))
+DEFAULT_WORK_SCHEDULE = WorkSchedule(
+    standard_work_minutes=480,
+    max_daily_overtime=120,
+    max_monthly_overtime=2400,
+    annual_leave_days=26,
+    days={
+        day_of_week: DEFAULT_DAY_SCHEDULE._replace(work_status='closed' if day_of_week >= 5 else 'open')
+        for day_of_week in range(7)
+    },
+)
+
+_lock = threading.Lock()
+_cached = None
+_loaded_at = 0.0
+
+
+def persian_weekday(day):
+    """روز هفته شمسی (0=شنبه) از روی تاریخ میلادی (weekday پایتون: 0=دوشنبه)"""
+    return (day.weekday() + 2) % 7
+
+
+def _load_work_schedule():
+    """خواندن تنظیمات و جدول کاری (دو کوئری) - در نبود تنظیمات، مقادیر پیش‌فرض"""
+    company_settings = CompanySettings.objects.prefetch_related('day_schedules').order_by('pk').first()
+    if company_settings is None:
+        return DEFAULT_WORK_SCHEDULE
+    days = dict(DEFAULT_WORK_SCHEDULE.days)
+    for day in company_settings.day_schedules.all():
+        days[day.day_of_week] = DaySchedule(
+            day.work_status, day.work_start_range_start, day.work_start_range_end, day.work_end,
+        )
+    return WorkSchedule(
+        standard_work_minutes=company_settings.standard_work_minutes,
+        max_daily_overtime=company_settings.max_daily_overtime,
+        max_monthly_overtime=company_settings.max_monthly_overtime,
+        annual_leave_days=company_settings.annual_leave_days,
+        days=days,
+    )
+
+
+def get_work_schedule():
+    """snapshot تنظیمات ساعات کاری (بدون کوئری تا زمان باطل شدن یا انقضای کش)"""
+    global _cached, _loaded_at
+    schedule = _cached
+    if schedule is not None and time.monotonic() - _loaded_at < settings.WORK_SCHEDULE_CACHE_TIMEOUT:
+        return schedule
+    with _lock:
+        if _cached is None or time.monotonic() - _loaded_at >= settings.WORK_SCHEDULE_CACHE_TIMEOUT:
+            _cached = _load_work_schedule()
+            _loaded_at = time.monotonic()
+        return _cached
+
+
+def invalidate_work_schedule():
+    """باطل کردن کش process (پس از ذخیره یا حذف تنظیمات و جدول کاری)"""
+    global _cached
+    _cached = None
+
+
+def get_day_schedule(day):
+    """جدول کاری یک تاریخ میلادی"""
+    return get_work_schedule().days[persian_weekday(day)]
+
+
+def is_work_day(day):
+    """آیا تاریخ روز کاری (باز) است"""
+    return get_day_schedule(day).work_status == 'open'
@@ -0,0 +1,14 @@
+"""
+تنظیمات gunicorn (از پوشه جاری به صورت خودکار خوانده می‌شود)
+Gunicorn configuration hooks
+"""
+
+
+def worker_exit(server, worker):
+    """تخلیه صف لاگ فعالیت هنگام خروج worker (max_requests، HUP، توقف سرویس)"""
+    try:
+        from core.activity_log import flush_activity_logs
+    except Exception:
+        # برنامه در این worker بارگذاری نشده است؛ صفی هم وجود ندارد
+        return
+    flush_activity_logs()
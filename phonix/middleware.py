@@ -6,6 +6,7 @@ from django.shortcuts import redirect
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth import logout
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
 from datetime import datetime
 
 
@@ -85,4 +86,36 @@ class SessionTimeoutMiddleware(MiddlewareMixin):
             import time
             request.session['_last_activity'] = time.time()
         
-        return None
\ No newline at end of file
+        return None
+
+
+class EmployeeMiddleware(MiddlewareMixin):
+    """
+    میان‌افزار برای تنظیم request.employee (کارمند کاربر جاری)
+    مقدار lazy است و فقط در صورت استفاده (یک بار در هر درخواست) از کش خوانده می‌شود
+    """
+    
+    def process_request(self, request):
+        from core.employees import get_request_employee
+        
+        request.employee = SimpleLazyObject(lambda: get_request_employee(request))
+        return None
+
+
+class ActivityLogMiddleware:
+    """
+    میان‌افزار برای بررسی تخلیه صف لاگ فعالیت (core.activity_log) در پایان هر درخواست
+    صف با رسیدن به ACTIVITY_LOG_BUFFER_SIZE یا گذشت ACTIVITY_LOG_FLUSH_INTERVAL ثانیه از
+    آخرین تخلیه با یک INSERT دسته‌ای نوشته می‌شود، حتی اگر این درخواست لاگی نداشته باشد
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        from core.activity_log import flush_activity_logs_if_due
+        
+        try:
+            return self.get_response(request)
+        finally:
+            flush_activity_logs_if_due()
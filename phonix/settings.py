@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -88,6 +89,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "phonix.middleware.ActivityLogMiddleware",  # تخلیه صف لاگ فعالیت در پایان درخواست
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Static files optimization
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -97,6 +99,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "phonix.middleware.SessionTimeoutMiddleware",  # بررسی Session Timeout
     "phonix.middleware.RoleBasedAccessMiddleware",
+    "phonix.middleware.EmployeeMiddleware",  # request.employee (lazy و کش‌شده)
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -267,6 +270,48 @@ X_FRAME_OPTIONS = 'DENY'
 # STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 
+# ===== CACHE =====
+# پیش‌فرض: کش فایلی مشترک بین workerهای یک سرور. نسخه کش گزارش مالی، کش کارمند و کلیدهای
+# idempotency باید بین processها مشترک باشند؛ locmem (مختص هر process) فقط برای توسعه مناسب است
+# و با DEBUG خاموش کش گزارش مالی را غیرفعال می‌کند. برای چند سرور از Redis استفاده کنید:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache و CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    }
+}
+
+# ===== FINANCIAL REPORTS =====
+# خواندن نمودار مالی از جدول تجمیع ماهانه (پس از اجرای rebuild_financial_rollups فعال شود)
+FINANCIAL_ROLLUPS_ENABLED = os.getenv('FINANCIAL_ROLLUPS_ENABLED', 'False').lower() == 'true'
+# مدت اعتبار کش پاسخ نمودار مالی (ثانیه) - با هر تغییر داده مالی زودتر باطل می‌شود
+FINANCIAL_CHART_CACHE_TIMEOUT = int(os.getenv('FINANCIAL_CHART_CACHE_TIMEOUT', '3600'))
+# اسنپ‌شات‌های از پیش محاسبه‌شده نمودار (دستور build_financial_snapshots در cron)
+FINANCIAL_SNAPSHOTS_ENABLED = os.getenv('FINANCIAL_SNAPSHOTS_ENABLED', 'False').lower() == 'true'
+FINANCIAL_SNAPSHOT_DIR = os.getenv('FINANCIAL_SNAPSHOT_DIR', str(BASE_DIR / 'snapshots' / 'financial'))
+# اسنپ‌شات قدیمی‌تر از این مقدار (ثانیه) کهنه است و پاسخ به صورت زنده محاسبه می‌شود
+FINANCIAL_SNAPSHOT_MAX_AGE = int(os.getenv('FINANCIAL_SNAPSHOT_MAX_AGE', '900'))
+
+# ===== ATTENDANCE =====
+# مدت نگهداری تنظیمات ساعات کاری در حافظه هر process (ثانیه) - ذخیره تنظیمات کش همان process را فوراً باطل می‌کند
+WORK_SCHEDULE_CACHE_TIMEOUT = int(os.getenv('WORK_SCHEDULE_CACHE_TIMEOUT', '300'))
+
+# ===== ACTIVITY LOG =====
+# نوشتن دسته‌ای لاگ فعالیت (صف حافظه + bulk_create) - False یعنی INSERT هم‌زمان در هر سیگنال
+# در `manage.py test` همیشه هم‌زمان: صف باقی‌مانده پس از حذف دیتابیس تست تخلیه نمی‌شود
+ACTIVITY_LOG_BUFFERED = (
+    os.getenv('ACTIVITY_LOG_BUFFERED', 'True').lower() == 'true' and sys.argv[1:2] != ['test']
+)
+# تخلیه صف با رسیدن به این تعداد رکورد یا گذشت این مدت (ثانیه) از آخرین تخلیه
+ACTIVITY_LOG_BUFFER_SIZE = int(os.getenv('ACTIVITY_LOG_BUFFER_SIZE', '200'))
+ACTIVITY_LOG_FLUSH_INTERVAL = int(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', '5'))
+# حداکثر رکورد نگه‌داشته‌شده در صف هنگام در دسترس نبودن دیتابیس
+ACTIVITY_LOG_MAX_BUFFER = int(os.getenv('ACTIVITY_LOG_MAX_BUFFER', '5000'))
+# نگهداری لاگ فعالیت در جدول (روز) - رکوردهای قدیمی‌تر با دستور archive_activity_logs به فایل‌های فشرده منتقل می‌شوند
+ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', '180'))
+ACTIVITY_LOG_ARCHIVE_DIR = os.getenv('ACTIVITY_LOG_ARCHIVE_DIR', str(BASE_DIR / 'archives' / 'activity_logs'))
+
 # ===== LOGGING CONFIGURATION =====
 LOGGING = {
     'version': 1,
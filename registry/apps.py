@@ -7,4 +7,8 @@ from django.apps import AppConfig
 class RegistryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "registry"
-    verbose_name = "سیستم ثبتی خدمات"
\ No newline at end of file
+    verbose_name = "سیستم ثبتی خدمات"
+
+    def ready(self):
+        """بارگذاری سیگنال‌ها هنگام آغاز برنامه"""
+        import registry.signals  # noqa
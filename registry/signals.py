@@ -0,0 +1,48 @@
+"""
+سیگنال‌های سیستم ثبتی - نگهداری تجمیع ماهانه مالی
+Registry signals - keep the monthly financial rollups up to date
+"""
+import logging
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from core import financial_reports
+from .models import TradeAcquisition, TradePartnership, Company, License
+
+logger = logging.getLogger('phonix')
+
+
+@receiver([pre_save, pre_delete], sender=TradeAcquisition)
+@receiver([pre_save, pre_delete], sender=TradePartnership)
+@receiver([pre_save, pre_delete], sender=Company)
+@receiver([pre_save, pre_delete], sender=License)
+def remember_financial_rollup_cells(sender, instance, **kwargs):
+    """ذخیره خانه‌های تجمیع ماهانه وضعیت قبلی خدمت ثبتی"""
+    try:
+        financial_reports.remember_rollup_cells(instance)
+    except Exception as e:
+        logger.error(f"خطا در خواندن تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=TradeAcquisition)
+@receiver(post_save, sender=TradePartnership)
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=License)
+def update_financial_rollups_on_save(sender, instance, **kwargs):
+    """بروزرسانی درجای تجمیع ماهانه پس از ذخیره خدمت ثبتی"""
+    try:
+        financial_reports.refresh_rollups_for(instance)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=TradeAcquisition)
+@receiver(post_delete, sender=TradePartnership)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=License)
+def update_financial_rollups_on_delete(sender, instance, **kwargs):
+    """بروزرسانی درجای تجمیع ماهانه پس از حذف خدمت ثبتی"""
+    try:
+        financial_reports.refresh_rollups_for(instance, deleted=True)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class VekaletConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vekalet'
-    verbose_name = 'وکالت'
\ No newline at end of file
+    verbose_name = 'وکالت'
+
+    def ready(self):
+        """بارگذاری سیگنال‌ها هنگام آغاز برنامه"""
+        import vekalet.signals  # noqa
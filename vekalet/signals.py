@@ -0,0 +1,42 @@
+"""
+سیگنال‌های وکالت - نگهداری تجمیع ماهانه مالی
+Vekalet signals - keep the monthly financial rollups up to date
+"""
+import logging
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+
+from core import financial_reports
+from .models import Consultation, CaseFile
+
+logger = logging.getLogger('phonix')
+
+
+@receiver([pre_save, pre_delete], sender=Consultation)
+@receiver([pre_save, pre_delete], sender=CaseFile)
+def remember_financial_rollup_cells(sender, instance, **kwargs):
+    """ذخیره خانه‌های تجمیع ماهانه وضعیت قبلی مشاوره/پرونده"""
+    try:
+        financial_reports.remember_rollup_cells(instance)
+    except Exception as e:
+        logger.error(f"خطا در خواندن تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Consultation)
+@receiver(post_save, sender=CaseFile)
+def update_financial_rollups_on_save(sender, instance, **kwargs):
+    """بروزرسانی درجای تجمیع ماهانه پس از ذخیره مشاوره/پرونده"""
+    try:
+        financial_reports.refresh_rollups_for(instance)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)
+
+
+@receiver(post_delete, sender=Consultation)
+@receiver(post_delete, sender=CaseFile)
+def update_financial_rollups_on_delete(sender, instance, **kwargs):
+    """بروزرسانی درجای تجمیع ماهانه پس از حذف مشاوره/پرونده"""
+    try:
+        financial_reports.refresh_rollups_for(instance, deleted=True)
+    except Exception as e:
+        logger.error(f"خطا در بروزرسانی تجمیع مالی {sender.__name__}: {e}", exc_info=True)